@@ -66,4 +66,7 @@ setup(name="ties-lib",
           ]
       },
       python_requires=">=3.7",
-      install_requires=load_dependencies())
+      install_requires=load_dependencies(),
+      extras_require={
+          "fast": ["orjson >=3.8"]
+      })
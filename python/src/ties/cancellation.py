@@ -0,0 +1,82 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+import time
+
+
+class CancellationToken(object):
+
+    def __init__(self, deadline=None):
+        # deadline is a time.monotonic() value after which the token counts as cancelled
+        self.deadline = deadline
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    @property
+    def cancelled(self):
+        return self._cancelled or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+
+class _Interrupted(Exception):
+    pass
+
+
+class _Checkpoint(object):
+
+    def __init__(self, timeout, cancellation):
+        self._deadline = None if timeout is None else time.monotonic() + timeout
+        self._cancellation = cancellation
+        self.interrupted = False
+
+    def __call__(self):
+        if (self._deadline is not None and time.monotonic() >= self._deadline) or (self._cancellation is not None and self._cancellation.cancelled):
+            self.interrupted = True
+            raise _Interrupted()
+
+    def until_interrupted(self, iterable):
+        try:
+            for value in iterable:
+                yield value
+        except _Interrupted:
+            pass
+
+
+def make_checkpoint(timeout=None, cancellation=None):
+    # a callable that raises _Interrupted once the timeout has passed or the token has been cancelled, validation calls
+    # it between array elements; None when there is nothing to check
+    if timeout is None and cancellation is None:
+        return None
+    return _Checkpoint(timeout, cancellation)
+
+
+def checked(elements, checkpoint):
+    if checkpoint is None:
+        return elements
+    return _checked(elements, checkpoint)
+
+
+def _checked(elements, checkpoint):
+    for element in elements:
+        checkpoint()
+        yield element
+
+
+if __name__ == '__main__':
+    pass
@@ -23,7 +23,7 @@ from unittest import TestCase
 from ties.cli.ties_validate import main
 from ties.util.testing import cli_test
 
-short_usage = 'usage: ties-validate [-h] [--version] [FILE]...'
+short_usage = 'usage: ties-validate [-h] [--version] [--max-errors N | --summarize] [--stream] [--check-formats] [FILE]...'
 
 long_usage = """\
 {}
@@ -31,11 +31,15 @@ long_usage = """\
 Validate FILE(s), or standard input, against the TIES 1.0 schema.
 
 positional arguments:
-  FILE        the path to the JSON file(s) to be validated against the schema or - to read from stdin
+  FILE             the path to the JSON file(s) to be validated against the schema or - to read from stdin
 
 optional arguments:
-  -h, --help  show this help message and exit
-  --version   prints version information
+  -h, --help       show this help message and exit
+  --max-errors N   stop schema validation of each file after N errors have been found
+  --summarize      print each kind of schema error once, with its count and the array indexes it occurs at
+  --stream         validate against the schema while reading each file instead of loading it into memory, skips semantic validation
+  --check-formats  check that date-time properties are valid RFC 3339 date-times
+  --version        prints version information
 
 If FILE arguments are provided, attempts to validate all files. FILE arguments may be provided as either file paths or shell globs.
 
@@ -64,6 +68,8 @@ minimal_valid_json = """\
 
 minimal_invalid_json = '{}'
 
+multiple_errors_json = '{"version": "1.0", "authorityInformation": {}, "objectItems": [], "foo": 1}'
+
 
 def _make_status(message, status):
     return "{}{}{}".format(message, '.' * (160 - len(message) - 7), status)
@@ -119,6 +125,92 @@ class TiesValidateTests(TestCase):
             t.stderr('    required properties [authorityInformation, objectItems, version] are missing')
             t.stderr('    location: /')
 
+    def test_max_errors_truncated(self):
+        with cli_test(self, main) as t:
+            t.args(['--max-errors', '1'])
+            t.return_code(1)
+            t.stdin(multiple_errors_json)
+            t.stdout_text(_make_status('Validating stdin', 'ERROR'))
+            t.stderr('Schema validation was unsuccessful:')
+            t.stderr('error:')
+            t.stderr('    additional property foo is not allowed')
+            t.stderr('    location: /')
+            t.stderr('error output was truncated after 1 error(s)')
+
+    def test_max_errors_not_truncated(self):
+        with cli_test(self, main) as t:
+            t.args(['--max-errors', '3'])
+            t.return_code(1)
+            t.stdin(multiple_errors_json)
+            t.stdout_text(_make_status('Validating stdin', 'ERROR'))
+            t.stderr('Schema validation was unsuccessful:')
+            t.stderr('error:')
+            t.stderr('    additional property foo is not allowed')
+            t.stderr('    location: /')
+            t.stderr('error:')
+            t.stderr('    required property securityTag is missing')
+            t.stderr('    location: /authorityInformation')
+            t.stderr('error:')
+            t.stderr('    array property objectItems with 0 items is too small, minimum size 1')
+            t.stderr('    location: /objectItems')
+
+    def test_stream_success(self):
+        with cli_test(self, main) as t:
+            t.args(['--stream', '../build/ties_validate_tests/success1.json'])
+            t.return_code(0)
+            t.stdout_text(_make_status("Validating {}".format(abspath('../build/ties_validate_tests/success1.json')), 'done'))
+            t.stderr()
+
+    def test_stream_failure(self):
+        with cli_test(self, main) as t:
+            t.args(['--stream', '--max-errors', '2'])
+            t.return_code(1)
+            t.stdin(multiple_errors_json)
+            t.stdout_text(_make_status('Validating stdin', 'ERROR'))
+            t.stderr('Schema validation was unsuccessful:')
+            t.stderr('error:')
+            t.stderr('    additional property foo is not allowed')
+            t.stderr('    location: /')
+            t.stderr('error:')
+            t.stderr('    array property objectItems with 0 items is too small, minimum size 1')
+            t.stderr('    location: /objectItems')
+            t.stderr('error output was truncated after 2 error(s)')
+
+    def test_summarize_failure(self):
+        for args in [['--summarize'], ['--summarize', '--stream']]:
+            with cli_test(self, main) as t:
+                t.args(args)
+                t.return_code(1)
+                t.stdin(multiple_errors_json)
+                t.stdout_text(_make_status('Validating stdin', 'ERROR'))
+                t.stderr('Schema validation was unsuccessful with 3 error(s):')
+                t.stderr('errors:')
+                t.stderr('    additional property foo is not allowed')
+                t.stderr('    location: /')
+                t.stderr('    count: 1')
+                t.stderr('    samples: /')
+                t.stderr('errors:')
+                t.stderr('    required property securityTag is missing')
+                t.stderr('    location: /authorityInformation')
+                t.stderr('    count: 1')
+                t.stderr('    samples: /authorityInformation')
+                t.stderr('errors:')
+                t.stderr('    array property objectItems with 0 items is too small, minimum size 1')
+                t.stderr('    location: /objectItems')
+                t.stderr('    count: 1')
+                t.stderr('    samples: /objectItems')
+
+    def test_check_formats_failure(self):
+        with cli_test(self, main) as t:
+            t.args(['--check-formats'])
+            t.return_code(1)
+            t.stdin(minimal_valid_json.replace('"version": "1.0",', '"version": "1.0", "time": "2019-02-29T00:00:00Z",'))
+            t.stdout_text(_make_status('Validating stdin', 'ERROR'))
+            t.stderr('Schema validation was unsuccessful:')
+            t.stderr('error:')
+            t.stderr("    property value '2019-02-29T00:00:00Z' for time property is not a valid date-time")
+            t.stderr('    location: /time')
+
     def test_stdin_success(self):
         with cli_test(self, main) as t:
             t.args(['-'])
@@ -16,11 +16,11 @@
 
 from __future__ import print_function, unicode_literals
 
-import json
 import sys
 from argparse import ArgumentParser
 from os.path import abspath, expanduser
 
+from ties import json_backend
 from ties.convert import convert
 from ties.schema_order import reorder_ties_json
 from ties.util.version import VersionAction, version_string
@@ -44,7 +44,7 @@ def main(argv=None):
     if args.export_path == '-':
         # read input from stdin
         try:
-            export_json = json.load(sys.stdin)
+            export_json = json_backend.load(sys.stdin)
         except Exception:  # pylint: disable=broad-except
             print('error: could not parse JSON from stdin', file=sys.stderr)
             return 1
@@ -53,7 +53,7 @@ def main(argv=None):
         try:
             args.export_path = abspath(expanduser(args.export_path))
             with open(args.export_path, 'r', encoding='utf-8') as f:
-                export_json = json.load(f)
+                export_json = json_backend.load(f)
         except Exception:  # pylint: disable=broad-except
             print("error: could not read from file: {}".format(args.export_path), file=sys.stderr)
             return 1
@@ -66,7 +66,7 @@ def main(argv=None):
         try:
             args.output_file = abspath(expanduser(args.output_file))
             with open(args.output_file, 'w', encoding='utf-8') as f:
-                json.dump(export_json, f, indent=2)
+                json_backend.dump(export_json, f)
             return 0
         except Exception:  # pylint: disable=broad-except
             print("error: could not write to file: {}".format(args.output_file), file=sys.stderr)
@@ -74,21 +74,21 @@ def main(argv=None):
     elif args.in_place:
         if args.export_path == '-':
             # input came from stdin, write output to stdout
-            json.dump(export_json, sys.stdout, indent=2)
+            json_backend.dump(export_json, sys.stdout)
             return 0
         else:
             # input came from a file, write output back to the same file
             try:
                 args.export_path = abspath(expanduser(args.export_path))
                 with open(args.export_path, 'w', encoding='utf-8') as f:
-                    json.dump(export_json, f, indent=2)
+                    json_backend.dump(export_json, f)
                 return 0
             except Exception:  # pylint: disable=broad-except
                 print("error: could not write to file: {}".format(args.export_path), file=sys.stderr)
                 return 1
     else:
         # no output file and not in-place, write output to stdout
-        json.dump(export_json, sys.stdout, indent=2)
+        json_backend.dump(export_json, sys.stdout)
         return 0
 
 
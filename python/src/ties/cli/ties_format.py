@@ -16,11 +16,11 @@
 
 from __future__ import print_function, unicode_literals
 
-import json
 import sys
 from argparse import ArgumentParser
 from os.path import abspath, expanduser
 
+from ties import json_backend
 from ties.schema_order import reorder_ties_json
 from ties.util.version import VersionAction, version_string
 
@@ -39,7 +39,7 @@ def main(argv=None):
     if args.export_path == '-':
         # read input from stdin
         try:
-            export_json = json.load(sys.stdin)
+            export_json = json_backend.load(sys.stdin)
         except Exception:  # pylint: disable=broad-except
             print('error: could not parse JSON from stdin', file=sys.stderr)
             return 1
@@ -48,13 +48,13 @@ def main(argv=None):
         try:
             args.export_path = abspath(expanduser(args.export_path))
             with open(args.export_path, 'r', encoding='utf-8') as f:
-                export_json = json.load(f)
+                export_json = json_backend.load(f)
         except Exception:  # pylint: disable=broad-except
             print("error: could not read from file: {}".format(args.export_path), file=sys.stderr)
             return 1
 
     export_json = reorder_ties_json(export_json)
-    json.dump(export_json, sys.stdout, indent=2)
+    json_backend.dump(export_json, sys.stdout)
     return 0
 
 
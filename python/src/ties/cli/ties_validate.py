@@ -16,33 +16,56 @@
 
 from __future__ import print_function, unicode_literals
 
-import json
 import sys
-from argparse import ArgumentParser, RawDescriptionHelpFormatter
+from argparse import ArgumentParser, ArgumentTypeError, RawDescriptionHelpFormatter
 from glob import glob
 from os.path import abspath
 from textwrap import indent
 
+from ties import json_backend
 from ties.schema_validation import TiesSchemaValidator
 from ties.semantic_validation import TiesSemanticValidator
 from ties.util.version import VersionAction, version_string
 
 
-def _validate(instance_file, instance_path=None):
+def _validate(instance_file, instance_path=None, max_errors=None, stream=False, check_formats=False, summarize=False):
     try:
         if instance_path:
             _print_status("Validating {}".format(instance_path))
         else:
             _print_status('Validating stdin')
-        instance = json.load(instance_file)
-        validation_errors = TiesSchemaValidator().all_errors(instance)
-        if len(validation_errors) > 0:
-            print('ERROR')
-            print('Schema validation was unsuccessful:', file=sys.stderr)
-            for e in validation_errors:
-                print('error:', file=sys.stderr)
-                print(indent(str(e), ' ' * 4), file=sys.stderr)
-            return 1
+        schema_validator = TiesSchemaValidator(check_formats=check_formats)
+        instance = None if stream else json_backend.load(instance_file)
+        if summarize:
+            if stream:
+                error_groups = schema_validator.error_groups_stream(instance_file)
+            else:
+                error_groups = schema_validator.error_groups(instance)
+            if len(error_groups) > 0:
+                print('ERROR')
+                print("Schema validation was unsuccessful with {} error(s):".format(sum(g.count for g in error_groups)), file=sys.stderr)
+                for g in error_groups:
+                    print('errors:', file=sys.stderr)
+                    print(indent(str(g), ' ' * 4), file=sys.stderr)
+                return 1
+        else:
+            if stream:
+                validation_errors = schema_validator.all_errors_stream(instance_file, max_errors=max_errors)
+            else:
+                validation_errors = schema_validator.all_errors_object(instance, max_errors=max_errors)
+            if len(validation_errors) > 0:
+                print('ERROR')
+                print('Schema validation was unsuccessful:', file=sys.stderr)
+                for e in validation_errors:
+                    print('error:', file=sys.stderr)
+                    print(indent(str(e), ' ' * 4), file=sys.stderr)
+                if validation_errors.truncated:
+                    print("error output was truncated after {} error(s)".format(len(validation_errors)), file=sys.stderr)
+                return 1
+        if stream:
+            # semantic validation needs the whole export in memory
+            print('done')
+            return 0
         validation_warnings = TiesSemanticValidator().all_warnings(instance)
         if len(validation_warnings) > 0:
             print('WARNING')
@@ -65,9 +88,19 @@ def _print_status(status):
     sys.stdout.write("{}{}".format(status, '.' * (160 - len(status) - 7)))
 
 
+def _positive_int(value):
+    try:
+        value = int(value)
+    except ValueError:
+        raise ArgumentTypeError("invalid positive integer value: '{}'".format(value)) from None
+    if value < 1:
+        raise ArgumentTypeError("invalid positive integer value: '{}'".format(value))
+    return value
+
+
 def _configure_arg_parser():
     parser = ArgumentParser(prog='ties-validate', formatter_class=RawDescriptionHelpFormatter)
-    parser.usage = 'ties-validate [-h] [--version] [FILE]...'
+    parser.usage = 'ties-validate [-h] [--version] [--max-errors N | --summarize] [--stream] [--check-formats] [FILE]...'
     parser.description = 'Validate FILE(s), or standard input, against the TIES 1.0 schema.'
     parser.epilog = ('''\
 If FILE arguments are provided, attempts to validate all files. FILE arguments may be provided as either file paths or shell globs.
@@ -77,6 +110,11 @@ If no FILE arguments are provided, attempts to read a single JSON object from st
 Returns non-zero exit code if one or more input files fail to validate successfully.
 ''')
     parser.add_argument('files', metavar='FILE', nargs='*', help='the path to the JSON file(s) to be validated against the schema or - to read from stdin')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--max-errors', metavar='N', dest='max_errors', type=_positive_int, default=None, help='stop schema validation of each file after N errors have been found')
+    group.add_argument('--summarize', dest='summarize', action='store_true', default=False, help='print each kind of schema error once, with its count and the array indexes it occurs at')
+    parser.add_argument('--stream', dest='stream', action='store_true', default=False, help='validate against the schema while reading each file instead of loading it into memory, skips semantic validation')
+    parser.add_argument('--check-formats', dest='check_formats', action='store_true', default=False, help='check that date-time properties are valid RFC 3339 date-times')
     parser.add_argument('--version', action=VersionAction, version="TIES Schema Validator\n{}".format(version_string()), help='prints version information')
     return parser
 
@@ -104,7 +142,7 @@ def main(argv=None):
     has_errors = False
     if not args.files or args.files == ['-']:
         # no args were provided, look for input on stdin
-        if _validate(sys.stdin) != 0:
+        if _validate(sys.stdin, max_errors=args.max_errors, stream=args.stream, check_formats=args.check_formats, summarize=args.summarize) != 0:
             has_errors = True
     else:
         # a list of paths or shell globs was provided
@@ -113,7 +151,7 @@ def main(argv=None):
             file_path = abspath(file_path)
             try:
                 with open(file_path, 'r', encoding='utf-8') as f:
-                    if _validate(f, file_path) != 0:
+                    if _validate(f, file_path, max_errors=args.max_errors, stream=args.stream, check_formats=args.check_formats, summarize=args.summarize) != 0:
                         has_errors = True
             except Exception as e:  # pylint: disable=broad-except
                 _print_status("Validating {}".format(file_path))
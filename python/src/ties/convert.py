@@ -18,6 +18,8 @@ from __future__ import unicode_literals
 
 from copy import deepcopy
 
+from ties.index import TiesIndex
+
 
 def convert(ties, security_tag=None):
     _0_dot_2_to_0_dot_3(ties, security_tag)
@@ -187,12 +189,14 @@ def _0_dot_6_to_0_dot_7(ties):
             if sha256_hash:
                 object_item['systemId'] = sha256_hash
 
-    for object_item in ties.get('objectItems', []):
+    object_items = ties.get('objectItems', [])
+    index = TiesIndex(ties)
+    for object_item in object_items:
         for object_relationship in object_item.get('objectRelationships', [])[:]:
             linkage_sha256_hash = object_relationship.get('linkageSha256Hash')
             if linkage_sha256_hash:
                 # get a list of all systemIds that are associated with the linkageSha256Hash
-                linked_system_ids = [oi.get('systemId') for oi in ties.get('objectItems', []) if oi.get('sha256Hash') == linkage_sha256_hash]
+                linked_system_ids = [object_items[position].get('systemId') for position in index.sha256_hash_positions(linkage_sha256_hash)]
                 linked_system_ids = [system_id for system_id in linked_system_ids if system_id is not None]
                 linked_system_ids = sorted(list(set(linked_system_ids)))
                 if len(linked_system_ids) == 0:
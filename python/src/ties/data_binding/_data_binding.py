@@ -33,10 +33,10 @@ class TiesData(object):
     _validator = None
 
     def validate(self):
-        self._validator.validate(self.to_json())
+        self._validator.validate_object(self.to_json())
 
     def all_errors(self):
-        return self._validator.all_errors(self.to_json())
+        return self._validator.all_errors_object(self.to_json())
 
     def to_json(self):
         d = OrderedDict()
@@ -0,0 +1,232 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from itertools import groupby
+
+from ties.index import TiesIndex
+
+DEFAULT_MEMORY_BUDGET = 64 << 20
+
+# roughly what one buffered row costs in memory before it is written to the database
+_ROW_SIZE = 256
+
+
+class DiskTiesIndex(TiesIndex):
+
+    # a TiesIndex that keeps its tables in a temporary SQLite database instead of in memory, about half of memory_budget
+    # bytes is used for the rows waiting to be written and the rest for the SQLite page cache
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, directory=None):
+        self._directory = tempfile.mkdtemp(prefix='ties-index-', dir=directory)
+        self._connection = sqlite3.connect(os.path.join(self._directory, 'index.sqlite'))
+        self._connection.execute('PRAGMA journal_mode = OFF')
+        self._connection.execute('PRAGMA synchronous = OFF')
+        self._connection.execute('PRAGMA temp_store = FILE')
+        self._connection.execute("PRAGMA cache_size = {}".format(-max(memory_budget // 2048, 1024)))
+        self._batch_size = max(memory_budget // 2 // _ROW_SIZE, 1000)
+        self._buffered = 0
+        self._indexed = False
+        self._maps = []
+        self._object_relationship_rows = []
+        super(DiskTiesIndex, self).__init__()
+        self._connection.execute('CREATE TABLE object_relationships (position INTEGER PRIMARY KEY, object_relationship TEXT NOT NULL)')
+        self._object_ids = self._map('object_ids')
+        self._group_ids = self._map('group_ids')
+        self._sha256_hashes = self._map('sha256_hashes')
+        self._md5_hashes = self._map('md5_hashes')
+        self._assertion_ids = self._map('assertion_ids', _assertion_rank, _assertion_position)
+        self._linkage_member_ids = self._map('linkage_member_ids', _linkage_member_rank, _linkage_member_position)
+        self._linkage_assertion_ids = self._map('linkage_assertion_ids')
+        self._object_relationships = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+    def relationships(self, identifier):
+        # the objectRelationships are kept in the database as JSON, only the ones asked for are read back
+        query = 'SELECT object_relationship FROM object_relationships WHERE position = ?'
+        return [json.loads(self._query(query, (position,)).fetchone()[0]) for position in self.relationship_positions(identifier)]
+
+    def shared_object_and_group_ids(self):
+        shared_ids = [_decode_key(key, original) for key, original, _ in self._query('SELECT o.key, o.original, min(o.rank) AS first FROM object_ids o WHERE EXISTS (SELECT 1 FROM group_ids g WHERE g.key = o.key) GROUP BY o.key ORDER BY first')]
+        return [(object_id, self._object_ids[object_id], self._group_ids[object_id]) for object_id in shared_ids]
+
+    def unresolved_linkage_member_ids(self):
+        rows = self._query("SELECT m.rank, m.key, {} FROM linkage_member_ids m WHERE NOT EXISTS (SELECT 1 FROM object_ids o WHERE o.key = m.key) AND NOT EXISTS (SELECT 1 FROM group_ids g WHERE g.key = m.key) ORDER BY m.rank".format(_first_original('linkage_member_ids', 'm')))
+        return [_linkage_member_position(rank) + (_decode_key(key, original),) for rank, key, original in rows]
+
+    def unresolved_linkage_assertion_ids(self):
+        rows = self._query("SELECT l.rank, l.key, {} FROM linkage_assertion_ids l WHERE NOT EXISTS (SELECT 1 FROM assertion_ids a WHERE a.key = l.key) ORDER BY l.rank".format(_first_original('linkage_assertion_ids', 'l')))
+        return [(position, _decode_key(key, original)) for position, key, original in rows]
+
+    def _add_object_relationship(self, position, object_relationship):
+        self._object_relationship_rows.append((position, json.dumps(object_relationship)))
+        self._added()
+        super(DiskTiesIndex, self)._add_object_relationship(position, object_relationship)
+
+    def _map(self, table, rank=None, position=None):
+        self._connection.execute("CREATE TABLE {} (key, rank INTEGER NOT NULL, original TEXT)".format(table))
+        disk_map = _DiskMultiMap(table, self._query, self._added, rank, position)
+        self._maps.append(disk_map)
+        return disk_map
+
+    def _added(self):
+        self._buffered += 1
+        if self._buffered >= self._batch_size:
+            self._flush()
+
+    def _flush(self):
+        for disk_map in self._maps:
+            if disk_map.rows:
+                self._connection.executemany("INSERT INTO {} VALUES (?, ?, ?)".format(disk_map.table), disk_map.rows)
+                disk_map.rows = []
+        if self._object_relationship_rows:
+            self._connection.executemany('INSERT OR REPLACE INTO object_relationships VALUES (?, ?)', self._object_relationship_rows)
+            self._object_relationship_rows = []
+        self._buffered = 0
+
+    def _query(self, sql, parameters=()):
+        self._flush()
+        if not self._indexed:
+            # building the indexes once all the rows are in is much faster than keeping them up to date while inserting
+            for disk_map in self._maps:
+                self._connection.execute("CREATE INDEX {0}_key ON {0} (key, rank)".format(disk_map.table))
+            self._indexed = True
+        return self._connection.execute(sql, parameters)
+
+
+# a _MultiMap whose values are rows of a DiskTiesIndex table, each value is stored as an integer rank that orders the
+# values the way TiesIndex does, even when they are added out of order like the assertions of objectGroups that come
+# before the objectItems in a file, and that the value can be recovered from; a key is reported as it was first added,
+# like a dict does for the keys it takes to be equal
+class _DiskMultiMap(object):
+
+    def __init__(self, table, query, added, rank=None, position=None):
+        self.table = table
+        self._query = query
+        self._added = added
+        self._rank = rank
+        self._position = position
+        self.rows = []
+
+    def __contains__(self, key):
+        return self._query("SELECT 1 FROM {} WHERE key IS ? LIMIT 1".format(self.table), (_encode_key(key),)).fetchone() is not None
+
+    def __iter__(self):
+        return (_decode_key(key, original) for key, original, _ in self._query("SELECT key, original, min(rank) AS first FROM {} GROUP BY key ORDER BY first".format(self.table)))
+
+    def __getitem__(self, key):
+        values = [self._value(rank) for (rank,) in self._query("SELECT rank FROM {} WHERE key IS ? ORDER BY rank".format(self.table), (_encode_key(key),))]
+        if not values:
+            raise KeyError(key)
+        return values
+
+    def add(self, key, value):
+        self.rows.append((_encode_key(key), value if self._rank is None else self._rank(value), _original_key(key)))
+        self._added()
+
+    def duplicates(self):
+        rows = self._query("SELECT t.key, t.rank, t.original FROM {0} t JOIN (SELECT key, min(rank) AS first FROM {0} GROUP BY key HAVING count(*) > 1) d ON t.key IS d.key ORDER BY d.first, t.rank".format(self.table))
+        for key, key_rows in groupby(rows, key=lambda row: row[0]):
+            key_rows = list(key_rows)
+            yield _decode_key(key, key_rows[0][2]), [self._value(rank) for _, rank, _ in key_rows]
+
+    def _value(self, rank):
+        return rank if self._position is None else self._position(rank)
+
+
+def _encode_key(key):
+    # ids and hashes are strings in a valid export, anything else is kept apart from the strings as a JSON blob, with
+    # the keys that a dict takes to be equal (True, 1 and 1.0) written the same way
+    if key is None or isinstance(key, str):
+        return key
+    # an unhashable key fails here as it would in a TiesIndex
+    hash(key)
+    if isinstance(key, bool) or (isinstance(key, float) and key.is_integer()):
+        key = int(key)
+    return sqlite3.Binary(json.dumps(key).encode('utf-8'))
+
+
+def _original_key(key):
+    # the JSON of a key that _encode_key changed, so that it can be reported as it was
+    if isinstance(key, bool) or (isinstance(key, float) and key.is_integer()):
+        return json.dumps(key)
+    return None
+
+
+def _decode_key(key, original=None):
+    if original is not None:
+        return json.loads(original)
+    return json.loads(bytes(key).decode('utf-8')) if isinstance(key, bytes) else key
+
+
+def _first_original(table, alias):
+    # the original of the row of a key that was added first
+    return "(SELECT f.original FROM {0} f WHERE f.key IS {1}.key ORDER BY f.rank LIMIT 1)".format(table, alias)
+
+
+_ASSERTION_CONTAINERS = (('objectItems', 'objectAssertions'), ('objectGroups', 'groupAssertions'))
+_ASSERTION_KEYS = ('annotations', 'supplementalDescriptions')
+
+
+def _assertion_rank(position):
+    (key, index, _), assertions_key, assertion_index = position
+    _check_field(index, 32, key)
+    _check_field(assertion_index, 28, assertions_key)
+    return ((int(key == 'objectGroups') << 32 | index) << 1 | int(assertions_key == 'supplementalDescriptions')) << 28 | assertion_index
+
+
+def _assertion_position(rank):
+    key, assertions_container_key = _ASSERTION_CONTAINERS[rank >> 61]
+    return (key, rank >> 29 & 0xffffffff, assertions_container_key), _ASSERTION_KEYS[rank >> 28 & 1], rank & 0xfffffff
+
+
+def _linkage_member_rank(position):
+    object_relationship_index, linkage_member_id_index = position
+    # the rank has to fit in a 64 bit SQLite integer
+    _check_field(object_relationship_index, 35, 'objectRelationships')
+    _check_field(linkage_member_id_index, 28, 'linkageMemberIds')
+    return object_relationship_index << 28 | linkage_member_id_index
+
+
+def _linkage_member_position(rank):
+    return rank >> 28, rank & 0xfffffff
+
+
+def _check_field(index, bits, array):
+    # the ranks pack indexes into fixed width fields, an index that does not fit would be read back as another one
+    if not 0 <= index < 1 << bits:
+        raise ValueError("index {} of {} is too large for the disk index, which allows at most {}".format(index, array, (1 << bits) - 1))
+
+
+if __name__ == '__main__':
+    pass
@@ -16,271 +16,607 @@
 
 from __future__ import unicode_literals
 
-import json
-from collections import OrderedDict, deque
+import re
 from textwrap import indent
 
+from ties.util.canonical import duplicate_indexes
 
+
+# errors and warnings are values: they are compared and hashed by their contents, the hash and the rendered text are
+# computed once and kept until one of the contents is replaced
 class ValidationWarning(Exception):
 
+    __slots__ = ('_message', '_location', '_hash', '_text')
+
     def __init__(self, message, location, *args, **kwargs):
         super(ValidationWarning, self).__init__(*args, **kwargs)
-        self.message = message
-        self.location = location
+        self._message = message
+        self._location = location
+        self._hash = None
+        self._text = None
+
+    @property
+    def message(self):
+        return self._message
+
+    @message.setter
+    def message(self, message):
+        self._message = message
+        self._hash = self._text = None
+
+    @property
+    def location(self):
+        return self._location
+
+    @location.setter
+    def location(self, location):
+        self._location = location
+        self._hash = self._text = None
+
+    def __reduce__(self):
+        return ValidationWarning, (self._message, self._location)
 
     def __repr__(self):
-        return "ValidationWarning({}, {})".format(repr(self.message), repr(self.location))
+        return "ValidationWarning({}, {})".format(repr(self._message), repr(self._location))
 
     def __str__(self):
-        return "{}\nlocation: {}".format(self.message, self.location)
+        if self._text is None:
+            self._text = "{}\nlocation: {}".format(self._message, self._location)
+        return self._text
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, ValidationWarning):
             return False
-        return self.message == other.message and self.location == other.location
+        return self._message == other._message and self._location == other._location
 
     def __hash__(self):
-        return hash((self.message, self.location))
+        if self._hash is None:
+            self._hash = hash((self._message, self._location))
+        return self._hash
 
 
+# errors made from schema validation keep the keyword, path and values they were made from, their message is only
+# rendered and their causes only sorted and made distinct when they are needed
 class ValidationError(Exception):
 
+    __slots__ = ('_message', '_location', '_causes', '_cause_errors', '_hash', '_text', '_details')
+
     def __init__(self, message, location, causes, *args, **kwargs):
         super(ValidationError, self).__init__(*args, **kwargs)
-        self.message = message
-        self.location = location
-        if causes is None:
-            self.causes = ()
-        else:
-            self.causes = tuple(causes)
+        self._message = message
+        self._location = location
+        self._causes = () if causes is None else tuple(causes)
+        self._cause_errors = None
+        self._hash = None
+        self._text = None
+        self._details = None
+
+    @property
+    def message(self):
+        if self._message is None and self._details is not None:
+            self._message = _details_message(self._details)
+        return self._message
+
+    @message.setter
+    def message(self, message):
+        self._message = message
+        self._hash = self._text = None
+
+    @property
+    def location(self):
+        return self._location
+
+    @location.setter
+    def location(self, location):
+        self._location = location
+        self._hash = self._text = None
+
+    @property
+    def validator(self):
+        return None if self._details is None else self._details.validator
+
+    @property
+    def validator_value(self):
+        return None if self._details is None else self._details.validator_value
+
+    @property
+    def path(self):
+        return () if self._details is None else self._details.relative_path
+
+    @property
+    def causes(self):
+        if self._cause_errors is not None:
+            self._causes = tuple(_unique_errors(self._cause_errors))
+            self._cause_errors = None
+        return self._causes
+
+    @causes.setter
+    def causes(self, causes):
+        self._causes = () if causes is None else tuple(causes)
+        self._cause_errors = None
+        self._hash = self._text = None
+
+    def __reduce__(self):
+        return ValidationError, (self.message, self._location, self.causes)
 
     def __repr__(self):
-        return "ValidationError({}, {}, {})".format(repr(self.message), repr(self.location), repr(self.causes))
+        return "ValidationError({}, {}, {})".format(repr(self.message), repr(self._location), repr(self.causes))
 
     def __str__(self):
-        if self.causes:
-            return "{}\npossible causes:\n{}".format(self.message, '\n'.join([indent(str(cause), ' ' * 4) for cause in self.causes]))
-        else:
-            return "{}\nlocation: {}".format(self.message, self.location)
+        if self._text is None:
+            if self.causes:
+                self._text = "{}\npossible causes:\n{}".format(self.message, '\n'.join([indent(str(cause), ' ' * 4) for cause in self.causes]))
+            else:
+                self._text = "{}\nlocation: {}".format(self.message, self._location)
+        return self._text
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, ValidationError):
             return False
-        return self.message == other.message and self.location == other.location and self.causes == other.causes
+        # the cached hashes tell most unequal errors apart without walking their causes or rendering their messages
+        if self._hash is not None and other._hash is not None and self._hash != other._hash:
+            return False
+        return self._location == other._location and self.causes == other.causes and self.message == other.message
 
     def __hash__(self):
-        return hash((self.message, self.location, self.causes))
+        # only the locations are hashed, so that errors can be told apart without rendering their messages or making
+        # their causes distinct, top-level errors at the same location are rare
+        if self._hash is None:
+            if self._cause_errors is not None:
+                cause_locations = frozenset(e.location for _, e in self._cause_errors)
+            else:
+                cause_locations = frozenset(e.location for e in self._causes)
+            self._hash = hash((self._location, cause_locations))
+        return self._hash
+
+
+# incomplete is set when validation was stopped by its timeout or cancellation token before it could finish
+class ValidationErrorList(list):
+
+    __slots__ = ('truncated', 'incomplete')
+
+    def __init__(self, errors=(), truncated=False, incomplete=False):
+        super(ValidationErrorList, self).__init__(errors)
+        self.truncated = truncated
+        self.incomplete = incomplete
+
+    def __repr__(self):
+        return "ValidationErrorList({}, truncated={}, incomplete={})".format(list.__repr__(self), repr(self.truncated), repr(self.incomplete))
+
+
+class ValidationWarningList(list):
+
+    __slots__ = ('incomplete',)
+
+    def __init__(self, warnings=(), incomplete=False):
+        super(ValidationWarningList, self).__init__(warnings)
+        self.incomplete = incomplete
+
+    def __repr__(self):
+        return "ValidationWarningList({}, incomplete={})".format(list.__repr__(self), repr(self.incomplete))
+
+
+class ValidationErrorGroup(object):
+
+    __slots__ = ('message', 'location', 'count', 'ranges', 'ranges_truncated', 'samples')
+
+    def __init__(self, message, location, count, ranges, samples, ranges_truncated=False):
+        self.message = message
+        self.location = location
+        self.count = count
+        self.ranges = tuple(ranges)
+        self.ranges_truncated = ranges_truncated
+        self.samples = tuple(samples)
+
+    def __repr__(self):
+        return "ValidationErrorGroup({}, {}, {}, {}, {}, ranges_truncated={})".format(repr(self.message), repr(self.location), repr(self.count), repr(self.ranges), repr(self.samples), repr(self.ranges_truncated))
+
+    def __str__(self):
+        lines = [self.message, "location: {}".format(self.location), "count: {}".format(self.count)]
+        if self.ranges:
+            indexes = ', '.join(str(first) if first == last else "{}-{}".format(first, last) for first, last in self.ranges)
+            lines.append("indexes: {}{}".format(indexes, ', ...' if self.ranges_truncated else ''))
+        lines.append("samples: {}".format(', '.join(sample.location for sample in self.samples)))
+        return '\n'.join(lines)
+
+    def __eq__(self, other):
+        if not isinstance(other, ValidationErrorGroup):
+            return False
+        return (self.message, self.location, self.count, self.ranges, self.ranges_truncated, self.samples) == (other.message, other.location, other.count, other.ranges, other.ranges_truncated, other.samples)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def aggregate_errors(validation_errors, max_samples=3, max_ranges=16):
+    # groups errors that differ only in their array indexes and property values, the indexes of the outermost array of
+    # each group are kept as at most max_ranges ranges, so memory only grows with the number of groups; equal errors
+    # have the same outermost index, they are counted once as long as the errors for each index arrive together
+    aggregator = _ErrorAggregator(max_samples, max_ranges)
+    for validation_error in validation_errors:
+        aggregator.add(validation_error)
+    return aggregator.groups()
+
+
+class _ErrorAggregator(object):
+
+    def __init__(self, max_samples, max_ranges):
+        self._max_samples = max_samples
+        self._max_ranges = max_ranges
+        self._groups = {}
+        self._index = None
+        self._index_errors = set()
+
+    def add(self, validation_error):
+        path = validation_error.path
+        if path:
+            indexes = [p for p in path if isinstance(p, int)]
+            location = _schema_path([_ANY_INDEX if isinstance(p, int) else p for p in path])
+        else:
+            indexes = [int(index) for index in _LOCATION_INDEX_RE.findall(validation_error.location)]
+            location = _LOCATION_INDEX_RE.sub('[*]', validation_error.location)
+        index = indexes[0] if indexes else None
+        if index != self._index:
+            self._index = index
+            self._index_errors = set()
+        if validation_error in self._index_errors:
+            return
+        self._index_errors.add(validation_error)
+        key = (location, _message_template(validation_error))
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = [0, [], False, []]
+        group[0] += 1
+        if indexes:
+            group[2] = _add_index(group[1], indexes[0], self._max_ranges) or group[2]
+        if len(group[3]) < self._max_samples:
+            group[3].append(validation_error)
+
+    def groups(self):
+        groups = [ValidationErrorGroup(message, location, count, _merged_ranges(ranges), samples, ranges_truncated) for (location, message), (count, ranges, ranges_truncated, samples) in self._groups.items()]
+        return sorted(groups, key=lambda x: (x.location, x.message))
+
+
+def _add_index(ranges, index, max_ranges):
+    # errors mostly arrive in index order, so the index usually extends the last range, returns True if there was no
+    # room for a new range
+    if ranges and ranges[-1][0] <= index <= ranges[-1][1] + 1:
+        ranges[-1][1] = max(ranges[-1][1], index)
+        return False
+    for index_range in ranges:
+        if index_range[0] <= index <= index_range[1]:
+            return False
+    if len(ranges) >= max_ranges:
+        return True
+    ranges.append([index, index])
+    return False
+
+
+def _merged_ranges(ranges):
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+class _AnyIndex(int):
+
+    def __str__(self):
+        return '*'
+
+    def __format__(self, format_spec):
+        return '*'
+
+
+class _AnyValue(object):
+
+    def __str__(self):
+        return '<value>'
+
+    def __repr__(self):
+        return '<value>'
+
+    def __format__(self, format_spec):
+        return '<value>'
+
+
+_ANY_INDEX = _AnyIndex(0)
+_ANY_VALUE = _AnyValue()
+
+_LOCATION_INDEX_RE = re.compile(r'\[([0-9]+)\]')
+
+# the keywords whose messages quote the value that failed validation
+_VALUE_KEYWORDS = frozenset(['minimum', 'maximum', 'minLength', 'maxLength', 'pattern', 'enum', 'format'])
+
+
+def _message_template(validation_error):
+    # the message of the error with its array indexes and the value that failed validation left out
+    details = validation_error._details  # pylint: disable=protected-access
+    if details is None:
+        return _LOCATION_INDEX_RE.sub('[*]', validation_error.message)
+    template = _ErrorDetails.__new__(_ErrorDetails)
+    template.validator = details.validator
+    template.validator_value = details.validator_value
+    template.relative_path = tuple(_ANY_INDEX if isinstance(p, int) else p for p in details.relative_path)
+    template.found_type = details.found_type
+    template.property_names = details.property_names
+    template.value = _rendered_value(details.validator, _ANY_VALUE) if details.validator in _VALUE_KEYWORDS else None
+    template.item_count = details.item_count
+    template.duplicate_indexes = details.duplicate_indexes
+    if details.validator in _ERROR_MESSAGES:
+        template.message = None
+    elif details.validator == 'oneOf':
+        template.message = "{} is not valid under any of the given schemas".format(_ANY_VALUE)
+    else:
+        template.message = "{} is not valid under the given schema ({})".format(_ANY_VALUE, details.validator)
+    return _details_message(template)
 
 
 def make_validation_error(jsonschema_error):
-    return ValidationError(_jsonschema_error_message(jsonschema_error), _jsonschema_error_schema_path(jsonschema_error), _jsonschema_error_causes(jsonschema_error))
+    path = tuple(jsonschema_error.relative_path)
+    return _validation_error(jsonschema_error, path, _schema_path(path))
+
+
+def _validation_error(jsonschema_error, path, location):
+    # the causes are found relative to the error, their paths are joined to the error path instead of being rebased in
+    # place, so jsonschema_error is left as it is
+    validation_error = ValidationError(None, location or '/', None)
+    if jsonschema_error.context:
+        validation_error._cause_errors = [(cause.validator, _validation_error(cause, path + tuple(cause.relative_path), location + _schema_path(cause.relative_path))) for cause in jsonschema_error.context]  # pylint: disable=protected-access
+    validation_error._details = _ErrorDetails(jsonschema_error, path)  # pylint: disable=protected-access
+    return validation_error
+
+
+# only what the message of the keyword is rendered from is kept, never the instance or schema of the error, so that an
+# error does not keep the part of the export it was found in alive
+class _ErrorDetails(object):
+
+    __slots__ = ('validator', 'validator_value', 'relative_path', 'message', 'found_type', 'property_names', 'value', 'item_count', 'duplicate_indexes')
+
+    def __init__(self, jsonschema_error, path):
+        validator = jsonschema_error.validator
+        self.validator = validator
+        self.validator_value = getattr(jsonschema_error, 'validator_value', None)
+        self.relative_path = path
+        # compiled errors render their message on access, it is only needed when there is no message for the keyword
+        self.message = None if validator in _ERROR_MESSAGES else jsonschema_error.message
+        self.found_type = self.property_names = self.value = self.item_count = None
+        self.duplicate_indexes = getattr(jsonschema_error, 'duplicate_indexes', None)
+        if validator == 'type':
+            self.found_type = _json_type_for_instance(jsonschema_error.instance)
+        elif validator == 'required':
+            self.property_names = sorted(set(self.validator_value) - set(jsonschema_error.instance.keys()))
+        elif validator == 'additionalProperties':
+            self.property_names = sorted(set(jsonschema_error.instance.keys()) - set(jsonschema_error.schema.get('properties', {}).keys()))
+        elif validator in _VALUE_KEYWORDS:
+            self.value = _rendered_value(validator, jsonschema_error.instance)
+        elif validator in ('minItems', 'maxItems'):
+            self.item_count = len(jsonschema_error.instance)
+        elif validator == 'uniqueItems' and self.duplicate_indexes is None:
+            self.duplicate_indexes = duplicate_indexes(jsonschema_error.instance)
+
+
+def _rendered_value(validator, value):
+    # the value as the message of the keyword quotes it
+    if validator in ('minimum', 'maximum'):
+        return "{}".format(value)
+    return _quote_value(value)
 
 
 def _jsonschema_error_message(jsonschema_error):
-    if jsonschema_error.validator == 'type':
-        return _type_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'required':
-        return _required_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'additionalProperties':
-        return _additional_properties_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'minimum':
-        return _minimum_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'maximum':
-        return _maximum_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'minLength':
-        return _min_length_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'maxLength':
-        return _max_length_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'pattern':
-        return _pattern_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'enum':
-        return _enum_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'minItems':
-        return _min_items_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'maxItems':
-        return _max_items_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'uniqueItems':
-        return _unique_items_error_message(jsonschema_error)
-    if jsonschema_error.validator == 'anyOf':
-        return _anyof_error_message(jsonschema_error)
-    return _unknown_error_message(jsonschema_error)
-
-
-def _type_error_message(jsonschema_error):
-    property_name = jsonschema_error.relative_path[-1]
-    found_type = _json_type_for_instance(jsonschema_error.instance)
-    if isinstance(jsonschema_error.validator_value, list):
-        expected_types = ', '.join(jsonschema_error.validator_value)
+    return _details_message(_ErrorDetails(jsonschema_error, tuple(jsonschema_error.relative_path)))
+
+
+def _details_message(details):
+    return _ERROR_MESSAGES.get(details.validator, _unknown_error_message)(details)
+
+
+def _type_error_message(details):
+    property_name = details.relative_path[-1]
+    found_type = details.found_type
+    if isinstance(details.validator_value, list):
+        expected_types = ', '.join(details.validator_value)
         if found_type == 'null':
             return "property {} with null value should be one of the allowed types: [{}]".format(property_name, expected_types)
         else:
             return "property type {} for property {} is not one of the allowed types: [{}]".format(found_type, property_name, expected_types)
     else:
-        expected_type = jsonschema_error.validator_value
+        expected_type = details.validator_value
         if found_type == 'null':
             return "property {} with null value should be of type {}".format(property_name, expected_type)
         else:
             return "property type {} for property {} is not the allowed type: {}".format(found_type, property_name, expected_type)
 
 
-def _required_error_message(jsonschema_error):
-    missing_properties = sorted(set(jsonschema_error.validator_value) - set(jsonschema_error.instance.keys()))
+def _required_error_message(details):
+    missing_properties = details.property_names
     if len(missing_properties) == 1:
         return "required property {} is missing".format(missing_properties[0])
     else:
         return "required properties [{}] are missing".format(', '.join(missing_properties))
 
 
-def _additional_properties_error_message(jsonschema_error):
-    extra_properties = sorted(set(jsonschema_error.instance.keys()) - set(jsonschema_error.schema.get('properties', {}).keys()))
+def _additional_properties_error_message(details):
+    extra_properties = details.property_names
     if len(extra_properties) == 1:
         return "additional property {} is not allowed".format(extra_properties[0])
     else:
         return "additional properties [{}] are not allowed".format(', '.join(extra_properties))
 
 
-def _minimum_error_message(jsonschema_error):
-    property_value = jsonschema_error.instance
-    minimum = jsonschema_error.validator_value
-    property_name = jsonschema_error.relative_path[-1]
+def _minimum_error_message(details):
+    property_value = details.value
+    minimum = details.validator_value
+    property_name = details.relative_path[-1]
     try:
         int(property_name)
         property_index = property_name
-        property_name = jsonschema_error.relative_path[-2]
+        property_name = details.relative_path[-2]
         return "property value {} for element at index {} in {} is less than the minimum value of {}".format(property_value, property_index, property_name, minimum)
     except ValueError:
         return "property value {} for {} property is less than the minimum value of {}".format(property_value, property_name, minimum)
 
 
-def _maximum_error_message(jsonschema_error):
-    property_value = jsonschema_error.instance
-    maximum = jsonschema_error.validator_value
-    property_name = jsonschema_error.relative_path[-1]
+def _maximum_error_message(details):
+    property_value = details.value
+    maximum = details.validator_value
+    property_name = details.relative_path[-1]
     try:
         int(property_name)
         property_index = property_name
-        property_name = jsonschema_error.relative_path[-2]
+        property_name = details.relative_path[-2]
         return "property value {} for element at index {} in {} is greater than the maximum value of {}".format(property_value, property_index, property_name, maximum)
     except ValueError:
         return "property value {} for {} property is greater than the maximum value of {}".format(property_value, property_name, maximum)
 
 
-def _min_length_error_message(jsonschema_error):
-    property_value = jsonschema_error.instance
-    min_length = jsonschema_error.validator_value
-    property_name = jsonschema_error.relative_path[-1]
+def _min_length_error_message(details):
+    property_value = details.value
+    min_length = details.validator_value
+    property_name = details.relative_path[-1]
+    try:
+        int(property_name)
+        property_index = property_name
+        property_name = details.relative_path[-2]
+        return "property value {} for element at index {} in {} is too short, minimum length {}".format(property_value, property_index, property_name, min_length)
+    except ValueError:
+        return "property value {} for {} property is too short, minimum length {}".format(property_value, property_name, min_length)
+
+
+def _max_length_error_message(details):
+    property_value = details.value
+    max_length = details.validator_value
+    property_name = details.relative_path[-1]
     try:
         int(property_name)
         property_index = property_name
-        property_name = jsonschema_error.relative_path[-2]
-        return "property value {} for element at index {} in {} is too short, minimum length {}".format(_quote_value(property_value), property_index, property_name, min_length)
+        property_name = details.relative_path[-2]
+        return "property value {} for element at index {} in {} is too long, maximum length {}".format(property_value, property_index, property_name, max_length)
     except ValueError:
-        return "property value {} for {} property is too short, minimum length {}".format(_quote_value(property_value), property_name, min_length)
+        return "property value {} for {} property is too long, maximum length {}".format(property_value, property_name, max_length)
 
 
-def _max_length_error_message(jsonschema_error):
-    property_value = jsonschema_error.instance
-    max_length = jsonschema_error.validator_value
-    property_name = jsonschema_error.relative_path[-1]
+def _pattern_error_message(details):
+    property_value = details.value
+    pattern = details.validator_value
+    property_name = details.relative_path[-1]
     try:
         int(property_name)
         property_index = property_name
-        property_name = jsonschema_error.relative_path[-2]
-        return "property value {} for element at index {} in {} is too long, maximum length {}".format(_quote_value(property_value), property_index, property_name, max_length)
+        property_name = details.relative_path[-2]
+        return "property value {} for element at index {} in {} does not match the pattern '{}'".format(property_value, property_index, property_name, pattern)
     except ValueError:
-        return "property value {} for {} property is too long, maximum length {}".format(_quote_value(property_value), property_name, max_length)
+        return "property value {} for {} property does not match the pattern '{}'".format(property_value, property_name, pattern)
 
 
-def _pattern_error_message(jsonschema_error):
-    property_value = jsonschema_error.instance
-    pattern = jsonschema_error.validator_value
-    property_name = jsonschema_error.relative_path[-1]
+def _enum_error_message(details):
+    property_value = details.value
+    allowed_values = details.validator_value
+    property_name = details.relative_path[-1]
     try:
         int(property_name)
         property_index = property_name
-        property_name = jsonschema_error.relative_path[-2]
-        return "property value {} for element at index {} in {} does not match the pattern '{}'".format(_quote_value(property_value), property_index, property_name, pattern)
+        property_name = details.relative_path[-2]
+        return "property value {} for element at index {} in {} should have one of the allowed values: [{}]".format(property_value, property_index, property_name, ', '.join(allowed_values))
     except ValueError:
-        return "property value {} for {} property does not match the pattern '{}'".format(_quote_value(property_value), property_name, pattern)
+        return "enum property {} with value {} should have one of the allowed values: [{}]".format(property_name, property_value, ', '.join(allowed_values))
 
 
-def _enum_error_message(jsonschema_error):
-    property_value = jsonschema_error.instance
-    allowed_values = jsonschema_error.validator_value
-    property_name = jsonschema_error.relative_path[-1]
+def _format_error_message(details):
+    property_value = details.value
+    value_format = details.validator_value
+    property_name = details.relative_path[-1]
     try:
         int(property_name)
         property_index = property_name
-        property_name = jsonschema_error.relative_path[-2]
-        return "property value {} for element at index {} in {} should have one of the allowed values: [{}]".format(_quote_value(property_value), property_index, property_name, ', '.join(allowed_values))
+        property_name = details.relative_path[-2]
+        return "property value {} for element at index {} in {} is not a valid {}".format(property_value, property_index, property_name, value_format)
     except ValueError:
-        return "enum property {} with value {} should have one of the allowed values: [{}]".format(property_name, _quote_value(property_value), ', '.join(allowed_values))
+        return "property value {} for {} property is not a valid {}".format(property_value, property_name, value_format)
 
 
-def _min_items_error_message(jsonschema_error):
-    property_name = jsonschema_error.relative_path[-1]
-    item_count = len(jsonschema_error.instance)
-    min_items = jsonschema_error.validator_value
+def _min_items_error_message(details):
+    property_name = details.relative_path[-1]
+    item_count = details.item_count
+    min_items = details.validator_value
     return "array property {} with {} items is too small, minimum size {}".format(property_name, item_count, min_items)
 
 
-def _max_items_error_message(jsonschema_error):
-    property_name = jsonschema_error.relative_path[-1]
-    item_count = len(jsonschema_error.instance)
-    max_items = jsonschema_error.validator_value
+def _max_items_error_message(details):
+    property_name = details.relative_path[-1]
+    item_count = details.item_count
+    max_items = details.validator_value
     return "array property {} with {} items is too large, maximum size {}".format(property_name, item_count, max_items)
 
 
-def _unique_items_error_message(jsonschema_error):
-    property_name = jsonschema_error.relative_path[-1]
-    item_index = OrderedDict()
-    for item, i in zip(jsonschema_error.instance, range(len(jsonschema_error.instance))):
-        item_str = json.dumps(item, sort_keys=True)
-        item_index[item_str] = item_index.get(item_str, []) + [i]
-
-    for item_str in item_index:
-        duplicate_indexes = item_index[item_str]
-        if len(duplicate_indexes) > 1:
-            return "array property {} has duplicate items at index {}".format(property_name, list(duplicate_indexes))
+def _unique_items_error_message(details):
+    property_name = details.relative_path[-1]
+    duplicate_item_indexes = details.duplicate_indexes
+    if duplicate_item_indexes is not None:
+        return "array property {} has duplicate items at index {}".format(property_name, list(duplicate_item_indexes))
     return "array property {} has duplicate items".format(property_name)
 
 
-def _anyof_error_message(jsonschema_error):
-    property_name = jsonschema_error.relative_path[-1]
+def _anyof_error_message(details):
+    property_name = details.relative_path[-1]
     try:
         int(property_name)
         property_index = property_name
-        property_name = jsonschema_error.relative_path[-2]
+        property_name = details.relative_path[-2]
         return "content for array property at index {} in {} does not match any of the possible schema definitions".format(property_index, property_name)
     except ValueError:
         return "content for property {} does not match any of the possible schema definitions".format(property_name)
 
 
-def _unknown_error_message(jsonschema_error):
-    return jsonschema_error.message
-
-
-def _jsonschema_error_schema_path(jsonschema_error):
-    path_components = []
-    for p in jsonschema_error.relative_path:
-        if isinstance(p, int):
-            path_components.append("[{}]".format(p))
-        else:
-            path_components.append("/{}".format(p))
-
-    if len(path_components) == 0:
-        return '/'
-    else:
-        return ''.join(path_components)
-
-
-def _jsonschema_error_causes(jsonschema_error):
-    causes = []
-    for error_cause in sorted(jsonschema_error.context, key=lambda x: x.validator):
-        error_cause.relative_path = deque(list(jsonschema_error.relative_path) + list(error_cause.relative_path))
-        causes.append(ValidationError(_jsonschema_error_message(error_cause), _jsonschema_error_schema_path(error_cause), _jsonschema_error_causes(error_cause)))
-    # sorted is stable, so validation errors will be sorted by location and validator
-    return sorted(list(OrderedDict.fromkeys(causes)), key=lambda x: x.location)
+def _unknown_error_message(details):
+    return details.message
+
+
+def _schema_path(path):
+    # the location of a path, empty for the root so that the locations of causes can be joined to it
+    return ''.join(["[{}]".format(p) if isinstance(p, int) else "/{}".format(p) for p in path])
+
+
+def _unique_errors(errors):
+    # errors is an iterable of (validator keyword, ValidationError) pairs, the distinct errors are sorted by location
+    # and validator
+    return [e for e, _ in sorted(_first_errors(errors).items(), key=lambda x: (x[0].location, x[1]))]
+
+
+def _first_errors(errors):
+    # maps each distinct error to its (validator keyword, index) sort key, equal errors reported by more than one
+    # validator are kept where the first validator would put them
+    first_errors = {}
+    for index, (validator, validation_error) in enumerate(errors):
+        key = first_errors.get(validation_error)
+        if key is None or validator < key[0]:
+            first_errors[validation_error] = (validator, index)
+    return first_errors
+
+
+_ERROR_MESSAGES = {
+    'type': _type_error_message,
+    'required': _required_error_message,
+    'additionalProperties': _additional_properties_error_message,
+    'minimum': _minimum_error_message,
+    'maximum': _maximum_error_message,
+    'minLength': _min_length_error_message,
+    'maxLength': _max_length_error_message,
+    'pattern': _pattern_error_message,
+    'enum': _enum_error_message,
+    'format': _format_error_message,
+    'minItems': _min_items_error_message,
+    'maxItems': _max_items_error_message,
+    'uniqueItems': _unique_items_error_message,
+    'anyOf': _anyof_error_message,
+}
 
 
 def _json_type_for_instance(instance):
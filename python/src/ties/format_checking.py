@@ -0,0 +1,80 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+import re
+from functools import lru_cache
+
+from jsonschema import FormatChecker
+
+# RFC 3339 date-time with the field ranges spelled out, so that only February 29th needs a leap year check after a match
+_DATE_TIME_BODY = (
+    r'[0-9]{4}-'
+    r'(?:(?:0[1-9]|1[0-2])-(?:0[1-9]|1[0-9]|2[0-8])|(?:0[13-9]|1[0-2])-(?:29|30)|(?:0[13578]|1[02])-31|02-29)'
+    r'[Tt](?:[01][0-9]|2[0-3]):[0-5][0-9]:(?:[0-5][0-9]|60)(?:\.[0-9]+)?'
+    r'(?:[Zz]|[+-](?:[01][0-9]|2[0-3]):[0-5][0-9])'
+)
+
+_DATE_TIME_RE = re.compile(_DATE_TIME_BODY)
+
+# a column of date-times joined by newlines, none of the date-times can contain one
+_DATE_TIME_COLUMN_RE = re.compile("{0}(?:\n{0})*".format(_DATE_TIME_BODY))
+
+_LEAP_DAY = '-02-29'
+
+
+def _is_leap_year(year):
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+@lru_cache(maxsize=4096)
+def is_date_time(value):
+    # exports repeat the same few timestamps many times over, so recently seen strings are cached
+    if _DATE_TIME_RE.fullmatch(value) is None:
+        return False
+    return value[4:10] != _LEAP_DAY or _is_leap_year(int(value[:4]))
+
+
+def date_time_failures(values):
+    # the indexes of the strings in values that are not date-times, checked with one match over the whole column when
+    # they all are
+    if not values:
+        return []
+    joined = '\n'.join(values)
+    if _DATE_TIME_COLUMN_RE.fullmatch(joined) is not None and joined.count('\n') == len(values) - 1:
+        if _LEAP_DAY not in joined:
+            return []
+        return [i for i, value in enumerate(values) if value[4:10] == _LEAP_DAY and not _is_leap_year(int(value[:4]))]
+    return [i for i, value in enumerate(values) if not is_date_time(value)]
+
+
+def _check_date_time(instance):
+    # like every format, date-time only applies to strings
+    return not isinstance(instance, str) or is_date_time(instance)
+
+
+format_checker = FormatChecker(formats=())
+format_checker.checks('date-time')(_check_date_time)
+
+# the formats that are checked, jsonschema and compiled validators ignore all others
+checked_formats = {
+    'date-time': _check_date_time,
+}
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,541 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+from collections import namedtuple
+from copy import deepcopy
+
+from ties.exceptions import make_validation_error
+from ties.index import TiesIndex, _MultiMap
+from ties.schema_compilation import CompiledError
+from ties.schema_validation import TiesSchemaValidator, _ARRAY_INDEX_RE, _array_errors, _collect_errors, _copy_jsonschema_error, _item_digest, instance_pointer_tokens, schema_cache, streamed_arrays
+from ties.semantic_validation import TiesSemanticValidator, other_information_key_warnings, semantic_warnings
+from ties.util.canonical import canonical_form
+
+
+class IncrementalValidationSession(object):
+
+    def __init__(self, ties, engine='jsonschema', check_formats=False):
+        for pointer in streamed_arrays.values():
+            schema_cache.validator(pointer, engine=engine, check_formats=check_formats)
+        self._engine = engine
+        self._check_formats = check_formats
+        self._ties = ties
+        self._reset()
+
+    @property
+    def ties(self):
+        return self._ties
+
+    def apply_patch(self, patch):
+        # the operations are applied in order, if one of them fails the ones before it are undone and the export is
+        # left as it was
+        undo = []
+        try:
+            for operation in patch:
+                self._apply_operation(operation, undo)
+        except Exception:
+            for method, tokens, value in reversed(undo):
+                method(tokens, value, [])
+            raise
+
+    def all_errors(self):
+        if not isinstance(self._ties, dict):
+            return TiesSchemaValidator(engine=self._engine, check_formats=self._check_formats).all_errors_object(self._ties)
+        if self._envelope_errors is None:
+            skeleton = dict(self._ties)
+            skeleton.update((key, []) for key in self._schema_states)
+            self._envelope_errors = [(e.validator, make_validation_error(e)) for e in schema_cache.envelope_validator(engine=self._engine, check_formats=self._check_formats).iter_errors(skeleton)]
+        errors = list(self._envelope_errors)
+        for key, schema_state in self._schema_states.items():
+            errors.extend(schema_state.all_errors(self._ties[key]))
+        return _collect_errors(errors)
+
+    def all_warnings(self):
+        if not isinstance(self._ties, dict) or any(key in self._ties and key not in self._semantic_state.records for key in streamed_arrays):
+            return TiesSemanticValidator().all_warnings(self._ties)
+        if self._other_information_warnings is None:
+            self._other_information_warnings = other_information_key_warnings(self._ties.get('otherInformation', []), '/otherInformation')
+        return self._semantic_state.all_warnings(self._ties, self._other_information_warnings)
+
+    def _reset(self):
+        self._envelope_errors = None
+        self._other_information_warnings = None
+        self._schema_states = {}
+        self._semantic_state = _SemanticState()
+        if isinstance(self._ties, dict):
+            for key in streamed_arrays:
+                self._reset_array(key)
+
+    def _reset_array(self, key):
+        self._schema_states.pop(key, None)
+        self._semantic_state.records.pop(key, None)
+        if isinstance(self._ties.get(key), list):
+            self._schema_states[key] = _ArraySchemaState(key, self._engine, self._check_formats)
+            self._schema_states[key].records.reset(len(self._ties[key]))
+            self._semantic_state.records[key] = _ElementRecords(_semantic_facts[key])
+            self._semantic_state.records[key].reset(len(self._ties[key]))
+        self._semantic_state.rebuild = True
+
+    def _changed(self, tokens, change):
+        if not tokens or not isinstance(self._ties, dict):
+            self._reset()
+            return
+        key = tokens[0]
+        if len(tokens) > 1 and key in self._schema_states:
+            index = int(tokens[1])
+            for records in (self._schema_states[key].records, self._semantic_state.records[key]):
+                if len(tokens) > 2 or change == 'replace':
+                    records.invalidate(index)
+                elif change == 'add':
+                    records.insert(index)
+                else:
+                    records.remove(index)
+            return
+        self._envelope_errors = None
+        if key in streamed_arrays:
+            self._reset_array(key)
+        elif key == 'otherInformation':
+            self._other_information_warnings = None
+
+    def _apply_operation(self, operation, undo):
+        op = operation.get('op')
+        if op not in ('add', 'remove', 'replace', 'move', 'copy', 'test'):
+            raise ValueError("unknown json patch operation: {}".format(op))
+        path = _pointer_tokens(operation, 'path')
+        if op == 'add':
+            self._add(path, deepcopy(_operation_value(operation)), undo)
+        elif op == 'remove':
+            self._remove(path, None, undo)
+        elif op == 'replace':
+            self._replace(path, deepcopy(_operation_value(operation)), undo)
+        elif op == 'move':
+            from_path = _pointer_tokens(operation, 'from')
+            if from_path != path[:len(from_path)]:
+                self._add(path, self._remove(from_path, None, undo), undo)
+            elif from_path != path:
+                raise ValueError("json patch cannot move a value into one of its children: {}".format(operation['from']))
+        elif op == 'copy':
+            self._add(path, deepcopy(self._resolve(_pointer_tokens(operation, 'from'))), undo)
+        elif canonical_form(self._resolve(path)) != canonical_form(_operation_value(operation)):
+            raise ValueError("json patch test failed: {}".format(operation['path']))
+
+    def _resolve(self, tokens):
+        value = self._ties
+        for i in range(len(tokens)):
+            parent, token = self._parent(value, tokens[:i + 1], False)
+            value = parent[token]
+        return value
+
+    def _parent(self, parent, tokens, end):
+        # the container for the last token and the key or index within it, end allows the index one past the last element
+        token = tokens[-1]
+        if isinstance(parent, dict):
+            if not end and token not in parent:
+                raise ValueError("json patch path does not exist: {}".format(_pointer(tokens)))
+            return parent, token
+        if isinstance(parent, list):
+            if end and token == '-':
+                return parent, len(parent)
+            if _ARRAY_INDEX_RE.match(token) and int(token) < len(parent) + (1 if end else 0):
+                return parent, int(token)
+        raise ValueError("json patch path does not exist: {}".format(_pointer(tokens)))
+
+    def _container(self, tokens, end):
+        return self._parent(self._resolve(tokens[:-1]), tokens, end)
+
+    def _add(self, tokens, value, undo):
+        if not tokens:
+            return self._replace(tokens, value, undo)
+        parent, token = self._container(tokens, True)
+        resolved = tokens[:-1] + [token]
+        if isinstance(parent, list):
+            parent.insert(token, value)
+            undo.append((self._remove, _string_tokens(resolved), None))
+            self._changed(resolved, 'add')
+        elif token in parent:
+            undo.append((self._replace, resolved, parent[token]))
+            parent[token] = value
+            self._changed(resolved, 'replace')
+        else:
+            parent[token] = value
+            undo.append((self._remove, resolved, None))
+            self._changed(resolved, 'add')
+
+    def _remove(self, tokens, _, undo):
+        if not tokens:
+            raise ValueError('json patch cannot remove the whole document')
+        parent, token = self._container(tokens, False)
+        value = parent.pop(token)
+        undo.append((self._add, _string_tokens(tokens[:-1] + [token]), value))
+        self._changed(tokens[:-1] + [token], 'remove')
+        return value
+
+    def _replace(self, tokens, value, undo):
+        if not tokens:
+            undo.append((self._replace, [], self._ties))
+            self._ties = value
+            self._changed([], 'replace')
+            return
+        parent, token = self._container(tokens, False)
+        undo.append((self._replace, _string_tokens(tokens[:-1] + [token]), parent[token]))
+        parent[token] = value
+        self._changed(tokens[:-1] + [token], 'replace')
+
+
+def _operation_value(operation):
+    if 'value' not in operation:
+        raise ValueError("json patch operation is missing a value: {}".format(operation.get('op')))
+    return operation['value']
+
+
+def _pointer_tokens(operation, member):
+    if member not in operation:
+        raise ValueError("json patch operation is missing a {}: {}".format(member, operation.get('op')))
+    return instance_pointer_tokens(operation[member])
+
+
+def _pointer(tokens):
+    return ''.join('/' + str(token).replace('~', '~0').replace('/', '~1') for token in tokens)
+
+
+def _string_tokens(tokens):
+    return [str(token) for token in tokens]
+
+
+def _rebased_error(error, path):
+    if isinstance(error, CompiledError):
+        return error.copy(path)
+    copy = _copy_jsonschema_error(error)
+    copy.relative_path.extendleft(reversed(path))
+    return copy
+
+
+# the per-element results for one of the large top-level arrays, kept aligned with the array as it is patched; each
+# element is given an id that stays the same when elements are inserted or removed before it, so that what is indexed
+# for an element is keyed by its id and turned into a position only when it is reported, a stale element is recomputed
+# on the next refresh and only the stale elements are reindexed
+class _ElementRecords(object):
+
+    def __init__(self, compute):
+        self._compute = compute
+        self._next_id = 0
+        self.reset(0)
+
+    def reset(self, count):
+        self.records = [None] * count
+        self.ids = list(range(self._next_id, self._next_id + count))
+        self._next_id += count
+        self.stale = set(range(count))
+        self.indexed = {}
+        self._positions = None
+
+    def insert(self, index):
+        self._shift(index, 1)
+        self.records.insert(index, None)
+        self.ids.insert(index, self._next_id)
+        self._next_id += 1
+        self.stale.add(index)
+
+    def remove(self, index):
+        record = self.records.pop(index)
+        element_id = self.ids.pop(index)
+        self.stale.discard(index)
+        self._shift(index, -1)
+        if record is not None:
+            self.indexed.setdefault(element_id, record)
+
+    def invalidate(self, index):
+        if self.records[index] is not None:
+            self.indexed.setdefault(self.ids[index], self.records[index])
+        self.records[index] = None
+        self.stale.add(index)
+
+    def position(self, element_id):
+        # the table of positions is made again on the first lookup after elements were inserted or removed
+        if self._positions is None:
+            self._positions = dict(zip(self.ids, range(len(self.ids))))
+        return self._positions[element_id]
+
+    def refresh(self, elements):
+        # the (id, old record, new record) changes since the last refresh
+        computed = dict((position, self._compute(elements[position])) for position in self.stale)
+        for position, record in computed.items():
+            self.records[position] = record
+        computed = dict((self.ids[position], record) for position, record in computed.items())
+        self.stale = set()
+        changes = [(element_id, self.indexed.pop(element_id, None), computed.get(element_id)) for element_id in set(computed) | set(self.indexed)]
+        return changes
+
+    def _shift(self, index, delta):
+        self._positions = None
+        self.stale = set(position + delta if position >= index else position for position in self.stale)
+
+
+# a _MultiMap that values can also be removed from, the values of a key are turned into what is reported by position
+# and returned in sort_key order rather than the order they were added in, and the keys changed since changed was last
+# emptied are kept track of
+class _MutableMultiMap(_MultiMap):
+
+    def __init__(self, position, sort_key=None):
+        _MultiMap.__init__(self)
+        self._position = position
+        self._sort_key = sort_key
+        self.changed = set()
+
+    def __getitem__(self, key):
+        return sorted((self._position(value) for value in _MultiMap.__getitem__(self, key)), key=self._sort_key)
+
+    def add(self, key, value):
+        _MultiMap.add(self, key, value)
+        self.changed.add(key)
+
+    def remove(self, key, value):
+        values = self._repeated.get(key)
+        if values is None:
+            del self._first[key]
+        else:
+            values.remove(value)
+            self._first[key] = values[0]
+            if len(values) == 1:
+                del self._repeated[key]
+        self.changed.add(key)
+
+    def duplicates(self):
+        duplicates = [(key, self[key]) for key in self._repeated]
+        if self._sort_key is None:
+            return sorted(duplicates, key=lambda x: x[1][0])
+        return sorted(duplicates, key=lambda x: self._sort_key(x[1][0]))
+
+    def duplicate_indexes(self):
+        duplicates = self.duplicates()
+        if not duplicates:
+            return None
+        return duplicates[0][1]
+
+
+class _ArraySchemaState(object):
+
+    def __init__(self, key, engine, check_formats):
+        self.key = key
+        self.array_schema = schema_cache.streamed_array_schemas()[key]
+        self.unique = bool(self.array_schema.get('uniqueItems'))
+        validator = schema_cache.validator(streamed_arrays[key], engine=engine, check_formats=check_formats)
+        self.records = _ElementRecords(lambda element: (_item_digest(element) if self.unique else None, list(validator.iter_errors(element))))
+        # keyed by element id, the errors are rendered again when their element has moved
+        self.digests = _MutableMultiMap(self.records.position)
+        self.errors = {}
+        self.rendered = {}
+
+    def all_errors(self, elements):
+        for element_id, old, new in self.records.refresh(elements):
+            if old is not None:
+                if self.unique:
+                    self.digests.remove(old[0], element_id)
+                self.errors.pop(element_id, None)
+                self.rendered.pop(element_id, None)
+            if new is not None:
+                if self.unique:
+                    self.digests.add(new[0], element_id)
+                if new[1]:
+                    self.errors[element_id] = new[1]
+        errors = []
+        for element_id, element_errors in self.errors.items():
+            position = self.records.position(element_id)
+            rendered = self.rendered.get(element_id)
+            if rendered is None or rendered[0] != position:
+                rendered = self.rendered[element_id] = (position, [(e.validator, make_validation_error(_rebased_error(e, (self.key, position)))) for e in element_errors])
+            errors.extend(rendered[1])
+        errors.extend((e.validator, make_validation_error(e)) for e in _array_errors(self.key, self.array_schema, len(elements), self.digests if self.unique else None))
+        return errors
+
+
+_ElementFacts = namedtuple('_ElementFacts', ['sha256_hash', 'md5_hash', 'identifier', 'assertion_ids', 'linkage_member_ids', 'linkage_assertion_id', 'other_information'])
+
+
+def _assertion_ids(assertions):
+    assertion_ids = []
+    for assertions_key in ('annotations', 'supplementalDescriptions'):
+        for index, assertion in enumerate(assertions.get(assertions_key, [])):
+            assertion_id = assertion.get('assertionId')
+            if assertion_id is not None:
+                assertion_ids.append((assertions_key, index, assertion_id))
+    return assertion_ids
+
+
+def _has_duplicate_keys(element):
+    # only the elements with warnings are kept track of, their warnings are made when they are reported
+    return bool(other_information_key_warnings(element.get('otherInformation', []), None))
+
+
+def _object_item_facts(object_item):
+    return _ElementFacts(object_item.get('sha256Hash'), object_item.get('md5Hash'), object_item.get('objectId'), _assertion_ids(object_item.get('objectAssertions', {})), [], None, _has_duplicate_keys(object_item))
+
+
+def _object_group_facts(object_group):
+    return _ElementFacts(None, None, object_group.get('groupId'), _assertion_ids(object_group.get('groupAssertions', {})), [], None, _has_duplicate_keys(object_group))
+
+
+def _object_relationship_facts(object_relationship):
+    linkage_member_ids = [(index, linkage_member_id) for index, linkage_member_id in enumerate(object_relationship.get('linkageMemberIds', [])) if linkage_member_id is not None]
+    return _ElementFacts(None, None, None, [], linkage_member_ids, object_relationship.get('linkageAssertionId'), _has_duplicate_keys(object_relationship))
+
+
+_semantic_facts = {
+    'objectItems': _object_item_facts,
+    'objectGroups': _object_group_facts,
+    'objectRelationships': _object_relationship_facts,
+}
+
+_ASSERTION_CONTAINERS = {'objectItems': 'objectAssertions', 'objectGroups': 'groupAssertions'}
+
+
+def _assertion_order(position):
+    # the order TiesIndex adds assertions in, the objectItems before the objectGroups
+    (key, index, _), assertions_key, assertion_index = position
+    return key != 'objectItems', index, assertions_key, assertion_index
+
+
+# the TiesIndex that TiesSemanticValidator builds for each export, updated in place as elements change; it holds the
+# element ids of records, the _ElementRecords of each array, which are turned into positions when they are looked up,
+# and the ids that are shared or unresolved are kept track of so that reporting them does not look at every id
+class _IncrementalTiesIndex(TiesIndex):
+
+    def __init__(self, records):
+        TiesIndex.__init__(self)
+        self._records = records
+        self._object_ids = _MutableMultiMap(self._object_item_position)
+        self._group_ids = _MutableMultiMap(self._object_group_position)
+        self._sha256_hashes = _MutableMultiMap(self._object_item_position)
+        self._md5_hashes = _MutableMultiMap(self._object_item_position)
+        self._assertion_ids = _MutableMultiMap(self._assertion_position, _assertion_order)
+        self._linkage_member_ids = _MutableMultiMap(self._linkage_member_position)
+        self._linkage_assertion_ids = _MutableMultiMap(self._object_relationship_position)
+        self._shared_ids = set()
+        self._unresolved_member_ids = set()
+        self._unresolved_assertion_ids = set()
+
+    def shared_object_and_group_ids(self):
+        shared_ids = sorted(self._shared_ids, key=lambda i: self._object_ids[i][0])
+        return [(object_id, self._object_ids[object_id], self._group_ids[object_id]) for object_id in shared_ids]
+
+    def unresolved_linkage_member_ids(self):
+        return sorted((position, member_index, linkage_member_id) for linkage_member_id in self._unresolved_member_ids for position, member_index in self._linkage_member_ids[linkage_member_id])
+
+    def unresolved_linkage_assertion_ids(self):
+        return sorted((position, linkage_assertion_id) for linkage_assertion_id in self._unresolved_assertion_ids for position in self._linkage_assertion_ids[linkage_assertion_id])
+
+    def _object_item_position(self, element_id):
+        return self._records['objectItems'].position(element_id)
+
+    def _object_group_position(self, element_id):
+        return self._records['objectGroups'].position(element_id)
+
+    def _object_relationship_position(self, element_id):
+        return self._records['objectRelationships'].position(element_id)
+
+    def _assertion_position(self, value):
+        (key, element_id, assertions_container), assertions_key, assertion_index = value
+        return (key, self._records[key].position(element_id), assertions_container), assertions_key, assertion_index
+
+    def _linkage_member_position(self, value):
+        element_id, member_index = value
+        return self._object_relationship_position(element_id), member_index
+
+    def update(self, key, element_id, facts, add):
+        def update(multi_map, multi_map_key, value):
+            if add:
+                multi_map.add(multi_map_key, value)
+            else:
+                multi_map.remove(multi_map_key, value)
+
+        if key == 'objectItems':
+            update(self._sha256_hashes, facts.sha256_hash, element_id)
+            if facts.md5_hash is not None:
+                update(self._md5_hashes, facts.md5_hash, element_id)
+            if facts.identifier is not None:
+                update(self._object_ids, facts.identifier, element_id)
+        if key == 'objectGroups' and facts.identifier is not None:
+            update(self._group_ids, facts.identifier, element_id)
+        for assertions_key, assertion_index, assertion_id in facts.assertion_ids:
+            update(self._assertion_ids, assertion_id, ((key, element_id, _ASSERTION_CONTAINERS[key]), assertions_key, assertion_index))
+        for member_index, linkage_member_id in facts.linkage_member_ids:
+            update(self._linkage_member_ids, linkage_member_id, (element_id, member_index))
+        if facts.linkage_assertion_id is not None:
+            update(self._linkage_assertion_ids, facts.linkage_assertion_id, element_id)
+
+    def update_references(self, object_relationships):
+        self._object_relationships = object_relationships
+        for identifier in self._object_ids.changed | self._group_ids.changed | self._linkage_member_ids.changed:
+            if identifier in self._object_ids and identifier in self._group_ids:
+                self._shared_ids.add(identifier)
+            else:
+                self._shared_ids.discard(identifier)
+            if identifier in self._linkage_member_ids and identifier not in self._object_ids and identifier not in self._group_ids:
+                self._unresolved_member_ids.add(identifier)
+            else:
+                self._unresolved_member_ids.discard(identifier)
+        for assertion_id in self._assertion_ids.changed | self._linkage_assertion_ids.changed:
+            if assertion_id in self._linkage_assertion_ids and assertion_id not in self._assertion_ids:
+                self._unresolved_assertion_ids.add(assertion_id)
+            else:
+                self._unresolved_assertion_ids.discard(assertion_id)
+        for multi_map in (self._object_ids, self._group_ids, self._sha256_hashes, self._md5_hashes, self._assertion_ids, self._linkage_member_ids, self._linkage_assertion_ids):
+            multi_map.changed = set()
+
+
+class _SemanticState(object):
+
+    def __init__(self):
+        self.records = {}
+        self.rebuild = True
+        self._clear()
+
+    def _clear(self):
+        self.index = _IncrementalTiesIndex(self.records)
+        self.other_information_ids = dict((key, set()) for key in streamed_arrays)
+
+    def all_warnings(self, ties, top_level_warnings):
+        try:
+            changes = dict((key, records.refresh(ties[key])) for key, records in self.records.items())
+            if self.rebuild:
+                self._clear()
+                changes = dict((key, [(element_id, None, record) for element_id, record in zip(records.ids, records.records)]) for key, records in self.records.items())
+            self.rebuild = False
+            for key, key_changes in changes.items():
+                for element_id, old, new in key_changes:
+                    if old is not None:
+                        self.index.update(key, element_id, old, False)
+                        self.other_information_ids[key].discard(element_id)
+                    if new is not None:
+                        self.index.update(key, element_id, new, True)
+                        if new.other_information:
+                            self.other_information_ids[key].add(element_id)
+            self.index.update_references(ties.get('objectRelationships', []))
+        except Exception:
+            # an element the semantic checks cannot handle, everything is reindexed once it has been patched
+            self.rebuild = True
+            raise
+        other_information_warnings = {None: top_level_warnings}
+        for key, element_ids in self.other_information_ids.items():
+            positions = [self.records[key].position(element_id) for element_id in element_ids]
+            other_information_warnings[key] = [w for position in sorted(positions) for w in other_information_key_warnings(ties[key][position].get('otherInformation', []), "/{}[{}]/otherInformation".format(key, position))]
+        return semantic_warnings(self.index, other_information_warnings)
+
+
+if __name__ == '__main__':
+    pass
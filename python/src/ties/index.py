@@ -0,0 +1,214 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+
+from __future__ import unicode_literals
+
+from ties.cancellation import checked
+
+
+# values grouped by key in the order the keys first occur, a key only gets a list of its values once it occurs a second
+# time and that list is appended to in place, so building the index stays linear however many values share a key
+class _MultiMap(object):
+
+    def __init__(self):
+        self._first = {}
+        self._repeated = {}
+
+    def __contains__(self, key):
+        return key in self._first
+
+    def __iter__(self):
+        return iter(self._first)
+
+    def __getitem__(self, key):
+        values = self._repeated.get(key)
+        return [self._first[key]] if values is None else values
+
+    def add(self, key, value):
+        if key not in self._first:
+            self._first[key] = value
+        elif key in self._repeated:
+            self._repeated[key].append(value)
+        else:
+            self._repeated[key] = [self._first[key], value]
+
+    def duplicates(self):
+        # the keys that occur more than once with their values, ordered by where they first occur
+        if not self._repeated:
+            return []
+        return [(key, self._repeated[key]) for key in self._first if key in self._repeated]
+
+
+# lookup tables for the ids and hashes in an export, built in a single pass over its objectItems, objectGroups and
+# objectRelationships
+class TiesIndex(object):
+
+    def __init__(self, ties=None):
+        self._object_ids = _MultiMap()
+        self._group_ids = _MultiMap()
+        self._sha256_hashes = _MultiMap()
+        self._md5_hashes = _MultiMap()
+        self._assertion_ids = _MultiMap()
+        self._linkage_member_ids = _MultiMap()
+        self._linkage_assertion_ids = _MultiMap()
+        self._object_relationships = []
+        if ties is not None:
+            self.add_export(ties)
+
+    def add_export(self, ties, checkpoint=None, element_hook=None):
+        # element_hook is called with the array key, position and element of each element as it is added, so that
+        # callers can look at the elements in the same pass
+        if not isinstance(ties, dict):
+            ties = ties.to_json()
+        if checkpoint is not None:
+            checkpoint()
+        for position, object_item in enumerate(checked(ties.get('objectItems', []), checkpoint)):
+            self._add_object_item(position, object_item)
+            if element_hook is not None:
+                element_hook('objectItems', position, object_item)
+        for position, object_group in enumerate(checked(ties.get('objectGroups', []), checkpoint)):
+            self._add_object_group(position, object_group)
+            if element_hook is not None:
+                element_hook('objectGroups', position, object_group)
+        self.set_object_relationships(ties.get('objectRelationships', []))
+        for position, object_relationship in enumerate(checked(self._object_relationships, checkpoint)):
+            self._add_object_relationship(position, object_relationship)
+            if element_hook is not None:
+                element_hook('objectRelationships', position, object_relationship)
+
+    def add_element(self, key, position, element):
+        # adds one element of the objectItems, objectGroups or objectRelationships array key, relationships reads the
+        # objectRelationships from the array given to set_object_relationships
+        if key == 'objectItems':
+            self._add_object_item(position, element)
+        elif key == 'objectGroups':
+            self._add_object_group(position, element)
+        elif key == 'objectRelationships':
+            self._add_object_relationship(position, element)
+
+    def set_object_relationships(self, object_relationships):
+        self._object_relationships = object_relationships
+
+    def object_position(self, object_id):
+        return self._first_position(self._object_ids, object_id)
+
+    def object_positions(self, object_id):
+        return self._positions(self._object_ids, object_id)
+
+    def group_position(self, group_id):
+        return self._first_position(self._group_ids, group_id)
+
+    def group_positions(self, group_id):
+        return self._positions(self._group_ids, group_id)
+
+    def sha256_hash_positions(self, sha256_hash):
+        return self._positions(self._sha256_hashes, sha256_hash)
+
+    def md5_hash_positions(self, md5_hash):
+        return self._positions(self._md5_hashes, md5_hash)
+
+    def assertion_location(self, assertion_id):
+        locations = self.assertion_locations(assertion_id)
+        return locations[0] if locations else None
+
+    def assertion_locations(self, assertion_id):
+        return [_assertion_location(position) for position in self._positions(self._assertion_ids, assertion_id)]
+
+    def relationship_positions(self, identifier):
+        # the objectRelationships that reference an objectId, groupId or assertionId
+        positions = set(position for position, _ in self._positions(self._linkage_member_ids, identifier))
+        positions.update(self._positions(self._linkage_assertion_ids, identifier))
+        return sorted(positions)
+
+    def relationships(self, identifier):
+        return [self._object_relationships[position] for position in self.relationship_positions(identifier)]
+
+    def duplicate_object_ids(self):
+        return self._object_ids.duplicates()
+
+    def duplicate_group_ids(self):
+        return self._group_ids.duplicates()
+
+    def shared_object_and_group_ids(self):
+        # (id, objectItem positions, objectGroup positions) for the ids used by both, ordered by their first objectItem
+        return [(object_id, self._object_ids[object_id], self._group_ids[object_id]) for object_id in self._object_ids if object_id in self._group_ids]
+
+    def duplicate_sha256_hashes(self):
+        return self._sha256_hashes.duplicates()
+
+    def duplicate_assertion_ids(self):
+        return [(assertion_id, [_assertion_location(position) for position in positions]) for assertion_id, positions in self._assertion_ids.duplicates() if assertion_id]
+
+    def unresolved_linkage_member_ids(self):
+        # (objectRelationship position, linkageMemberIds index, id) for the linkageMemberIds that are neither an objectId
+        # nor a groupId, in the order they occur
+        return sorted((position, member_index, linkage_member_id) for linkage_member_id in self._linkage_member_ids if linkage_member_id not in self._object_ids and linkage_member_id not in self._group_ids for position, member_index in self._linkage_member_ids[linkage_member_id])
+
+    def unresolved_linkage_assertion_ids(self):
+        return sorted((position, linkage_assertion_id) for linkage_assertion_id in self._linkage_assertion_ids if linkage_assertion_id not in self._assertion_ids for position in self._linkage_assertion_ids[linkage_assertion_id])
+
+    @staticmethod
+    def _first_position(multi_map, key):
+        return multi_map[key][0] if key is not None and key in multi_map else None
+
+    @staticmethod
+    def _positions(multi_map, key):
+        return list(multi_map[key]) if key is not None and key in multi_map else []
+
+    def _add_object_item(self, position, object_item):
+        self._sha256_hashes.add(object_item.get('sha256Hash'), position)
+        md5_hash = object_item.get('md5Hash')
+        if md5_hash is not None:
+            self._md5_hashes.add(md5_hash, position)
+        object_id = object_item.get('objectId')
+        if object_id is not None:
+            self._object_ids.add(object_id, position)
+        self._add_assertions(object_item.get('objectAssertions', {}), ('objectItems', position, 'objectAssertions'))
+
+    def _add_object_group(self, position, object_group):
+        group_id = object_group.get('groupId')
+        if group_id is not None:
+            self._group_ids.add(group_id, position)
+        self._add_assertions(object_group.get('groupAssertions', {}), ('objectGroups', position, 'groupAssertions'))
+
+    def _add_object_relationship(self, position, object_relationship):
+        for linkage_member_id_index, linkage_member_id in enumerate(object_relationship.get('linkageMemberIds', [])):
+            if linkage_member_id is not None:
+                self._linkage_member_ids.add(linkage_member_id, (position, linkage_member_id_index))
+        linkage_assertion_id = object_relationship.get('linkageAssertionId')
+        if linkage_assertion_id is not None:
+            self._linkage_assertion_ids.add(linkage_assertion_id, position)
+
+    def _add_assertions(self, assertions, container):
+        for assertions_key in ('annotations', 'supplementalDescriptions'):
+            for assertion_index, assertion in enumerate(assertions.get(assertions_key, [])):
+                assertion_id = assertion.get('assertionId')
+                if assertion_id is not None:
+                    self._assertion_ids.add(assertion_id, (container, assertions_key, assertion_index))
+
+
+# the names of the _MultiMap attributes of a TiesIndex, without their underscore
+_TABLES = ('object_ids', 'group_ids', 'sha256_hashes', 'md5_hashes', 'assertion_ids', 'linkage_member_ids', 'linkage_assertion_ids')
+
+
+def _assertion_location(position):
+    (key, index, assertions_container_key), assertions_key, assertion_index = position
+    return "/{}[{}]/{}/{}[{}]/assertionId".format(key, index, assertions_container_key, assertions_key, assertion_index)
+
+
+if __name__ == '__main__':
+    pass
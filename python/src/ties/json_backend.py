@@ -0,0 +1,144 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+import json
+import re
+from collections import OrderedDict
+from json.encoder import encode_basestring_ascii
+from mmap import mmap
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:  # pragma: no cover
+    simdjson = None
+
+# runs of characters that json.dumps escapes with ensure_ascii but orjson writes as they are
+_UNESCAPED_RE = re.compile(r'[^\x00-\x7e]+')
+# with indent=2 every scalar value is the rest of its line, so a line ending in a number or null cannot be inside a string
+# orjson writes NaN and Infinity as null
+_NULL_RE = re.compile(r'(?m)null,?$')
+# orjson writes 1e16 and 0.00001 where repr writes 1e+16 and 1e-05
+_EXPONENT_RE = re.compile(r'(?m)e[-+]?\d+,?$')
+_FLOAT_RE = re.compile(r'(?m) (-?(?:\d+(?:\.\d+)?e[-+]?\d+|0\.0000\d+))(?=,?$)')
+
+
+def _stdlib_loads(data):
+    if isinstance(data, (memoryview, mmap)):
+        # decoding straight from the buffer avoids copying it into bytes first
+        data = str(data, 'utf-8')
+    return json.loads(data)
+
+
+class StdlibBackend(object):
+
+    name = 'json'
+
+    def loads(self, data):
+        return _stdlib_loads(data)
+
+    def dumps(self, obj, indent=2):
+        return json.dumps(obj, indent=indent)
+
+
+class OrjsonBackend(StdlibBackend):
+
+    name = 'orjson'
+
+    def loads(self, data):
+        try:
+            return orjson.loads(memoryview(data) if isinstance(data, mmap) else data)  # pylint: disable=no-member
+        except orjson.JSONDecodeError:  # pylint: disable=no-member
+            # the stdlib accepts NaN, Infinity and integers beyond 64 bits, and reports errors the way it always has
+            return _stdlib_loads(data)
+
+    def dumps(self, obj, indent=2):
+        if indent != 2 or not isinstance(obj, (dict, list)):
+            return json.dumps(obj, indent=indent)
+        try:
+            text = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')  # pylint: disable=no-member
+        except TypeError:
+            # integers beyond 64 bits, non-string keys, lone surrogates
+            return json.dumps(obj, indent=indent)
+        if _NULL_RE.search(text):
+            return json.dumps(obj, indent=indent)
+        if not text.isascii() or '\x7f' in text:
+            text = _UNESCAPED_RE.sub(lambda m: encode_basestring_ascii(m.group(0))[1:-1], text)
+        if _EXPONENT_RE.search(text) or '0.0000' in text:
+            text = _FLOAT_RE.sub(lambda m: " {}".format(repr(float(m.group(1)))), text)
+        return text
+
+
+class SimdjsonBackend(StdlibBackend):
+
+    name = 'simdjson'
+
+    def loads(self, data):
+        try:
+            return simdjson.loads(data)
+        except ValueError:
+            return _stdlib_loads(data)
+
+
+backends = OrderedDict([
+    (OrjsonBackend.name, OrjsonBackend if orjson is not None else None),
+    (SimdjsonBackend.name, SimdjsonBackend if simdjson is not None else None),
+    (StdlibBackend.name, StdlibBackend),
+])
+
+
+def available_backends():
+    return [name for name, backend_class in backends.items() if backend_class is not None]
+
+
+def set_backend(name):
+    global _backend  # pylint: disable=global-statement
+    if backends.get(name) is None:
+        raise ValueError("JSON backend is not available: {}".format(name))
+    _backend = backends[name]()
+
+
+def backend_name():
+    return _backend.name
+
+
+def loads(data):
+    return _backend.loads(data)
+
+
+def load(f):
+    return _backend.loads(f.read())
+
+
+def dumps(obj, indent=2):
+    return _backend.dumps(obj, indent=indent)
+
+
+def dump(obj, f, indent=2):
+    f.write(_backend.dumps(obj, indent=indent))
+
+
+_backend = backends[available_backends()[0]]()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,466 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+import re
+import threading
+from collections import deque
+from numbers import Number
+
+from ties.format_checking import checked_formats
+from ties.util.canonical import canonical_form
+
+# keywords that do not produce validation errors (format is only checked by compilers created with check_formats)
+_ANNOTATION_KEYWORDS = frozenset(['$schema', 'definitions', 'description', 'format', 'id', 'stability', 'title'])
+
+_STRING_KEYWORDS = ('minLength', 'maxLength', 'pattern')
+_NUMBER_KEYWORDS = ('minimum', 'maximum')
+_OBJECT_KEYWORDS = ('required', 'properties', 'additionalProperties')
+_ARRAY_KEYWORDS = ('minItems', 'maxItems', 'uniqueItems', 'items')
+
+_SUPPORTED_KEYWORDS = frozenset(('type', 'enum', 'anyOf', 'oneOf', 'exclusiveMinimum', 'exclusiveMaximum') + _STRING_KEYWORDS + _NUMBER_KEYWORDS + _OBJECT_KEYWORDS + _ARRAY_KEYWORDS) | _ANNOTATION_KEYWORDS
+
+_TYPE_CONDITIONS = {
+    'array': 'isinstance({0}, list)',
+    'boolean': 'isinstance({0}, bool)',
+    'integer': '(isinstance({0}, int) and not isinstance({0}, bool))',
+    'null': '{0} is None',
+    'number': '_is_number({0})',
+    'object': 'isinstance({0}, dict)',
+    'string': 'isinstance({0}, str)',
+}
+
+_MISSING = object()
+
+
+# error record produced by compiled validators, interchangeable with jsonschema.ValidationError in make_validation_error
+class CompiledError(object):
+
+    __slots__ = ('validator', 'validator_value', 'instance', 'schema', 'relative_path', 'context', '_message')
+
+    def __init__(self, validator, validator_value, instance, schema, path, context=(), message=None):
+        self.validator = validator
+        self.validator_value = validator_value
+        self.instance = instance
+        self.schema = schema
+        self.relative_path = deque(path)
+        self.context = context
+        self._message = message
+
+    @property
+    def message(self):
+        if self._message is None:
+            if self.validator in ('anyOf', 'oneOf'):
+                self._message = "{!r} is not valid under any of the given schemas".format(self.instance)
+            else:
+                self._message = "{!r} is not valid under the given schema ({})".format(self.instance, self.validator)
+        return self._message
+
+    def copy(self, path=()):
+        # context paths are relative to the instance, so only the top level error is rebased
+        context = [e.copy() for e in self.context]
+        return CompiledError(self.validator, self.validator_value, self.instance, self.schema, tuple(path) + tuple(self.relative_path), context, self._message)
+
+    def __repr__(self):
+        return "CompiledError({}, {})".format(repr(self.validator), repr(list(self.relative_path)))
+
+
+class _ErrorLimitReached(Exception):
+    pass
+
+
+# stops a compiled walk once max_errors distinct (keyword, path) pairs have been collected
+class _BoundedErrors(list):
+
+    def __init__(self, max_errors):
+        super(_BoundedErrors, self).__init__()
+        self._max_errors = max_errors
+        self._keys = set()
+
+    def append(self, error):
+        key = (error.validator, tuple(error.relative_path))
+        if key not in self._keys:
+            if len(self._keys) >= self._max_errors:
+                raise _ErrorLimitReached()
+            self._keys.add(key)
+        list.append(self, error)
+
+
+class CompiledValidator(object):
+
+    def __init__(self, function, schema):
+        self._function = function
+        self.schema = schema
+
+    def iter_errors(self, instance, max_errors=None):
+        if max_errors is None:
+            errors = []
+            self._function(instance, (), errors)
+        else:
+            errors = _BoundedErrors(max_errors)
+            try:
+                self._function(instance, (), errors)
+            except _ErrorLimitReached:
+                pass
+        return iter(errors)
+
+    def is_valid(self, instance):
+        errors = []
+        self._function(instance, (), errors)
+        return not errors
+
+
+# generates specialized Python validation functions for the draft 4 keywords used by the TIES schema
+class SchemaCompiler(object):
+
+    def __init__(self, root_schema, check_formats=False):
+        self._root_schema = root_schema
+        self.check_formats = check_formats
+        self._lock = threading.RLock()
+        self._namespace = {
+            '_E': CompiledError,
+            '_MISSING': _MISSING,
+            '_any_of': _any_of,
+            '_enum': _enum,
+            '_is_number': _is_number,
+            '_one_of': _one_of,
+            '_unique': _unique,
+        }
+        self._functions = {}
+        self._constants = {}
+        self._counter = 0
+        self._pending = []
+        self._source = []
+
+    @property
+    def source(self):
+        return '\n'.join(self._source)
+
+    def compile_all(self):
+        with self._lock:
+            self._function_name('')
+            for name in self._root_schema.get('definitions', {}):
+                self._function_name("/definitions/{}".format(name))
+            self._flush()
+
+    def validator(self, json_pointer=''):
+        with self._lock:
+            function_name = self._function_name(json_pointer)
+            self._flush()
+            return CompiledValidator(self._namespace[function_name], _resolve_pointer(self._root_schema, json_pointer))
+
+    def wrapped_validator(self, json_pointer, wrap):
+        # a private copy of the compiled functions in which each definition function is replaced by
+        # wrap(pointer, function), unless that returns None
+        with self._lock:
+            function_name = self._function_name(json_pointer)
+            self._flush()
+            namespace = dict(self._namespace)
+            exec(compile(self.source, '<ties compiled schema>', 'exec'), namespace)  # pylint: disable=exec-used
+            for pointer, name in self._functions.items():
+                wrapped_function = wrap(pointer, namespace[name])
+                if wrapped_function is not None:
+                    namespace[name] = wrapped_function
+            return CompiledValidator(namespace[function_name], _resolve_pointer(self._root_schema, json_pointer))
+
+    def _function_name(self, json_pointer):
+        function_name = self._functions.get(json_pointer)
+        if function_name is None:
+            label = json_pointer.rsplit('/', 1)[-1] or 'root'
+            function_name = self._name("_v_{}".format(re.sub(r'\W', '_', label)))
+            self._functions[json_pointer] = function_name
+            self._pending.append((function_name, _resolve_pointer(self._root_schema, json_pointer)))
+        return function_name
+
+    def _flush(self):
+        lines = []
+        while self._pending:
+            function_name, schema = self._pending.pop(0)
+            lines.append("def {}(instance, path, errors):".format(function_name))
+            body = _FunctionBody(self)
+            body.emit(schema, 'instance', 'path', 'errors', 1)
+            lines.extend(body.lines)
+            lines.append('')
+        if lines:
+            source = '\n'.join(lines)
+            exec(compile(source, '<ties compiled schema>', 'exec'), self._namespace)  # pylint: disable=exec-used
+            self._source.append(source)
+
+    def _name(self, prefix):
+        self._counter += 1
+        return "{}_{}".format(prefix, self._counter)
+
+    def _constant(self, value):
+        name = self._constants.get(id(value))
+        if name is None:
+            name = self._name('_c')
+            self._namespace[name] = value
+            self._constants[id(value)] = name
+        return name
+
+    def _ref_function_name(self, ref):
+        if not ref.startswith('#'):
+            raise ValueError("cannot compile non-local schema reference: {}".format(ref))
+        return self._function_name(ref[1:])
+
+    def _branch_function_name(self, schema):
+        function_name = self._name('_b')
+        self._pending.append((function_name, schema))
+        return function_name
+
+
+class _FunctionBody(object):
+
+    def __init__(self, compiler):
+        self._compiler = compiler
+        self.lines = []
+
+    def _line(self, depth, text):
+        self.lines.append("{}{}".format('    ' * depth, text))
+
+    def _var(self):
+        return self._compiler._name('v')  # pylint: disable=protected-access
+
+    def _constant(self, value):
+        return self._compiler._constant(value)  # pylint: disable=protected-access
+
+    def _error(self, depth, keyword, schema, var, path, errors):
+        self._line(depth, "{}.append(_E({!r}, {}, {}, {}, {}))".format(errors, keyword, self._constant(schema[keyword]), var, self._constant(schema), path))
+
+    def emit(self, schema, var, path, errors, depth):
+        start = len(self.lines)
+        self._emit(schema, var, path, errors, depth)
+        if len(self.lines) == start:
+            self._line(depth, 'pass')
+
+    def _emit(self, schema, var, path, errors, depth):
+        if '$ref' in schema:
+            # draft 4 ignores all siblings of $ref
+            function_name = self._compiler._ref_function_name(schema['$ref'])  # pylint: disable=protected-access
+            self._line(depth, "{}({}, {}, {})".format(function_name, var, path, errors))
+            return
+
+        unsupported = set(schema) - _SUPPORTED_KEYWORDS
+        if unsupported:
+            raise ValueError("cannot compile schema keywords: {}".format(', '.join(sorted(unsupported))))
+
+        if 'type' in schema:
+            types = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+            condition = ' or '.join(_TYPE_CONDITIONS[t].format(var) for t in types)
+            self._line(depth, "if not ({}):".format(condition))
+            self._error(depth + 1, 'type', schema, var, path, errors)
+
+        if 'enum' in schema:
+            enum = schema['enum']
+            if all(isinstance(e, str) for e in enum):
+                self._line(depth, "if not (isinstance({0}, str) and {0} in {1}):".format(var, self._constant(frozenset(enum))))
+            else:
+                self._line(depth, "if not _enum({}, {}):".format(var, self._constant(enum)))
+            self._error(depth + 1, 'enum', schema, var, path, errors)
+
+        check_format = self._compiler.check_formats and schema.get('format') in checked_formats
+        if check_format or any(k in schema for k in _STRING_KEYWORDS):
+            self._line(depth, "if isinstance({}, str):".format(var))
+            if check_format:
+                self._line(depth + 1, "if not {}({}):".format(self._constant(checked_formats[schema['format']]), var))
+                self._error(depth + 2, 'format', schema, var, path, errors)
+            if 'minLength' in schema:
+                self._line(depth + 1, "if len({}) < {!r}:".format(var, schema['minLength']))
+                self._error(depth + 2, 'minLength', schema, var, path, errors)
+            if 'maxLength' in schema:
+                self._line(depth + 1, "if len({}) > {!r}:".format(var, schema['maxLength']))
+                self._error(depth + 2, 'maxLength', schema, var, path, errors)
+            if 'pattern' in schema:
+                self._line(depth + 1, "if not {}.search({}):".format(self._constant(re.compile(schema['pattern'])), var))
+                self._error(depth + 2, 'pattern', schema, var, path, errors)
+
+        if any(k in schema for k in _NUMBER_KEYWORDS):
+            self._line(depth, "if _is_number({}):".format(var))
+            if 'minimum' in schema:
+                operator = '<=' if schema.get('exclusiveMinimum', False) else '<'
+                self._line(depth + 1, "if {} {} {!r}:".format(var, operator, schema['minimum']))
+                self._error(depth + 2, 'minimum', schema, var, path, errors)
+            if 'maximum' in schema:
+                operator = '>=' if schema.get('exclusiveMaximum', False) else '>'
+                self._line(depth + 1, "if {} {} {!r}:".format(var, operator, schema['maximum']))
+                self._error(depth + 2, 'maximum', schema, var, path, errors)
+
+        if any(k in schema for k in _OBJECT_KEYWORDS):
+            self._line(depth, "if isinstance({}, dict):".format(var))
+            for name in schema.get('required', []):
+                self._line(depth + 1, "if {!r} not in {}:".format(name, var))
+                self._error(depth + 2, 'required', schema, var, path, errors)
+            for name, subschema in schema.get('properties', {}).items():
+                property_var = self._var()
+                self._line(depth + 1, "{} = {}.get({!r}, _MISSING)".format(property_var, var, name))
+                self._line(depth + 1, "if {} is not _MISSING:".format(property_var))
+                self.emit(subschema, property_var, "{} + ({!r},)".format(path, name), errors, depth + 2)
+            additional_properties = schema.get('additionalProperties', True)
+            if additional_properties is not True:
+                properties = self._constant(frozenset(schema.get('properties', {})))
+                if additional_properties is False:
+                    self._line(depth + 1, "if not {}.issuperset({}):".format(properties, var))
+                    self._error(depth + 2, 'additionalProperties', schema, var, path, errors)
+                else:
+                    key_var = self._var()
+                    self._line(depth + 1, "for {} in {}:".format(key_var, var))
+                    self._line(depth + 2, "if {} not in {}:".format(key_var, properties))
+                    self.emit(additional_properties, "{}[{}]".format(var, key_var), "{} + ({},)".format(path, key_var), errors, depth + 3)
+
+        if any(k in schema for k in _ARRAY_KEYWORDS):
+            self._line(depth, "if isinstance({}, list):".format(var))
+            if 'minItems' in schema:
+                self._line(depth + 1, "if len({}) < {!r}:".format(var, schema['minItems']))
+                self._error(depth + 2, 'minItems', schema, var, path, errors)
+            if 'maxItems' in schema:
+                self._line(depth + 1, "if len({}) > {!r}:".format(var, schema['maxItems']))
+                self._error(depth + 2, 'maxItems', schema, var, path, errors)
+            if schema.get('uniqueItems', False):
+                self._line(depth + 1, "if not _unique({}):".format(var))
+                self._error(depth + 2, 'uniqueItems', schema, var, path, errors)
+            if 'items' in schema:
+                items = schema['items']
+                if isinstance(items, list):
+                    for index, subschema in enumerate(items):
+                        self._line(depth + 1, "if len({}) > {}:".format(var, index))
+                        self.emit(subschema, "{}[{}]".format(var, index), "{} + ({},)".format(path, index), errors, depth + 2)
+                else:
+                    index_var = self._var()
+                    item_var = self._var()
+                    self._line(depth + 1, "for {}, {} in enumerate({}):".format(index_var, item_var, var))
+                    self.emit(items, item_var, "{} + ({},)".format(path, index_var), errors, depth + 2)
+
+        if 'anyOf' in schema:
+            branches = [self._compiler._branch_function_name(subschema) for subschema in schema['anyOf']]  # pylint: disable=protected-access
+            discriminators = discriminating_properties(self._compiler._root_schema, schema['anyOf'])  # pylint: disable=protected-access
+            self._line(depth, "_any_of({}, {}, {}, ({},), {}, {}, {})".format(var, path, errors, ', '.join(branches), self._constant(schema['anyOf']), self._constant(schema), self._constant(discriminators)))
+        if 'oneOf' in schema:
+            branches = [self._compiler._branch_function_name(subschema) for subschema in schema['oneOf']]  # pylint: disable=protected-access
+            self._line(depth, "_one_of({}, {}, {}, ({},), {}, {})".format(var, path, errors, ', '.join(branches), self._constant(schema['oneOf']), self._constant(schema)))
+
+
+def compile_validator(root_schema, json_pointer='', check_formats=False):
+    return SchemaCompiler(root_schema, check_formats=check_formats).validator(json_pointer)
+
+
+def _resolve_pointer(schema, json_pointer):
+    for p in json_pointer.strip('/').split('/'):
+        if p != '':
+            schema = schema[int(p)] if isinstance(schema, list) else schema[p]
+    return schema
+
+
+def _is_number(instance):
+    return isinstance(instance, Number) and not isinstance(instance, bool)
+
+
+def discriminating_properties(root_schema, branches):
+    # for an anyOf over closed object definitions, the required properties of each branch that no other branch allows,
+    # an instance with one of them can only be valid under that branch
+    definitions = []
+    for branch in branches:
+        if list(branch) != ['$ref'] or not branch['$ref'].startswith('#'):
+            return None
+        definition = _resolve_pointer(root_schema, branch['$ref'][1:])
+        if definition.get('additionalProperties') is not False or 'patternProperties' in definition or '$ref' in definition:
+            return None
+        definitions.append(definition)
+    discriminators = []
+    for index, definition in enumerate(definitions):
+        allowed = set()
+        for other in definitions[:index] + definitions[index + 1:]:
+            allowed.update(other.get('properties', {}))
+        discriminators.append(tuple(sorted(set(definition.get('required', [])) - allowed)))
+    if not any(discriminators):
+        return None
+    return tuple(discriminators)
+
+
+def predicted_branch(instance, discriminators):
+    # the only branch that can be valid for the instance, or None if that cannot be told from its properties
+    if discriminators is None or not isinstance(instance, dict):
+        return None
+    for index, properties in enumerate(discriminators):
+        for name in properties:
+            if name in instance:
+                return index
+    return None
+
+
+def _unique(items):
+    seen = set()
+    for item in items:
+        key = canonical_form(item)
+        if key in seen:
+            return False
+        seen.add(key)
+    return True
+
+
+def _enum(instance, enum):
+    key = canonical_form(instance)
+    return any(key == canonical_form(e) for e in enum)
+
+
+def _any_of(instance, path, errors, branches, value, schema, discriminators=None):
+    predicted = predicted_branch(instance, discriminators)
+    if predicted is not None:
+        predicted_errors = []
+        branches[predicted](instance, (), predicted_errors)
+        if not predicted_errors:
+            return
+    context = []
+    for index, branch in enumerate(branches):
+        if index == predicted:
+            branch_errors = predicted_errors
+        else:
+            branch_errors = []
+            branch(instance, (), branch_errors)
+            if not branch_errors:
+                return
+        context.extend(branch_errors)
+    errors.append(CompiledError('anyOf', value, instance, schema, path, context))
+
+
+def _one_of(instance, path, errors, branches, value, schema):
+    context = []
+    first_valid = None
+    for index, branch in enumerate(branches):
+        branch_errors = []
+        branch(instance, (), branch_errors)
+        if not branch_errors:
+            first_valid = index
+            break
+        context.extend(branch_errors)
+    else:
+        errors.append(CompiledError('oneOf', value, instance, schema, path, context))
+        return
+
+    more_valid = []
+    for index in range(first_valid + 1, len(branches)):
+        branch_errors = []
+        branches[index](instance, (), branch_errors)
+        if not branch_errors:
+            more_valid.append(value[index])
+    if more_valid:
+        more_valid.append(value[first_valid])
+        message = "{!r} is valid under each of {}".format(instance, ', '.join(repr(s) for s in more_valid))
+        errors.append(CompiledError('oneOf', value, instance, schema, path, (), message))
+
+
+if __name__ == '__main__':
+    pass
@@ -16,15 +16,29 @@
 
 from __future__ import unicode_literals
 
+import gc
 import json
-from collections import OrderedDict
+import math
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha1
+from mmap import mmap
 from os.path import abspath, isfile
 
-import jsonschema
-from jsonschema import Draft4Validator, RefResolver
+from jsonschema import Draft4Validator, validators
+from jsonschema.exceptions import ValidationError as JsonSchemaValidationError
 from pkg_resources import resource_filename
 
-from ties.exceptions import make_validation_error
+from ties import json_backend
+from ties.cancellation import make_checkpoint
+from ties.exceptions import ValidationErrorList, _unique_errors, aggregate_errors, make_validation_error
+from ties.format_checking import date_time_failures, format_checker, is_date_time
+from ties.schema_compilation import CompiledValidator, SchemaCompiler, compile_validator, discriminating_properties, predicted_branch
+from ties.util.canonical import canonical_form, duplicate_indexes
+from ties.util.json_stream import iter_events
 
 annotation_pointer = '/definitions/annotation-object'
 assertions_pointer = '/definitions/assertions-object'
@@ -37,77 +51,1052 @@ supplemental_description_data_file_pointer = '/definitions/supplementalDescripti
 supplemental_description_data_object_pointer = '/definitions/supplementalDescriptionDataObject-object'
 ties_pointer = ''
 
+engines = ('jsonschema', 'compiled')
+
+# the top-level arrays that are validated one element at a time when streaming, with their element definitions
+streamed_arrays = OrderedDict([
+    ('objectItems', object_item_pointer),
+    ('objectGroups', object_group_pointer),
+    ('objectRelationships', object_relationship_pointer),
+])
+
+# the scalar objectItem properties that all_errors_bulk checks a whole column at a time
+bulk_column_paths = (
+    ('sha256Hash',),
+    ('md5Hash',),
+    ('size',),
+    ('authorityInformation', 'collectionUuid'),
+    ('authorityInformation', 'subCollectionUuid'),
+    ('authorityInformation', 'registrationDate'),
+    ('authorityInformation', 'expirationDate'),
+)
+
+_preloaded_pointers = (
+    ties_pointer,
+    annotation_pointer,
+    assertions_pointer,
+    authority_information_pointer,
+    object_group_pointer,
+    object_item_pointer,
+    object_relationship_pointer,
+    other_information_pointer,
+    supplemental_description_data_file_pointer,
+    supplemental_description_data_object_pointer,
+)
+
+_ARRAY_ELEMENT_KEYWORDS = frozenset(['items', 'maxItems', 'minItems', 'uniqueItems'])
+
+_READ_BUFFER_SIZE = 1 << 20
+
+_ARRAY_INDEX_RE = re.compile(r'^(0|[1-9][0-9]*)$')
+
+# patterns made of fixed size character classes and literals, such as the hash and UUID patterns
+_FIXED_WIDTH_PATTERN_RE = re.compile(r'^\^((?:\[[^\]\\]+\]\{[0-9]+\}|[-A-Za-z0-9])+)\$$')
+_FIXED_WIDTH_PART_RE = re.compile(r'\[[^\]\\]+\]\{([0-9]+)\}|[-A-Za-z0-9]')
+
+_ANNOTATION_KEYWORDS = frozenset(['description', 'title'])
+
+
+def _unique_items(validator, unique_items, instance, _schema):
+    # jsonschema compares unhashable items pairwise, which is quadratic for arrays of objects
+    if unique_items and validator.is_type(instance, 'array'):
+        duplicate_item_indexes = duplicate_indexes(instance)
+        if duplicate_item_indexes is not None:
+            error = JsonSchemaValidationError("array has non-unique elements at index {}".format(duplicate_item_indexes))
+            error.duplicate_indexes = duplicate_item_indexes
+            yield error
+
+
+def _any_of(validator, any_of, instance, _schema):
+    # the branch that the instance's properties single out is validated first, the others are only validated when it
+    # fails, which keeps the errors of every branch in schema order
+    predicted = predicted_branch(instance, schema_cache.any_of_discriminators(any_of))
+    if predicted is not None:
+        predicted_errors = list(validator.descend(instance, any_of[predicted], schema_path=predicted))
+        if not predicted_errors:
+            return
+    all_errors = []
+    for index, subschema in enumerate(any_of):
+        if index == predicted:
+            errors = predicted_errors
+        else:
+            errors = list(validator.descend(instance, subschema, schema_path=index))
+            if not errors:
+                return
+        all_errors.extend(errors)
+    yield JsonSchemaValidationError("{!r} is not valid under any of the given schemas".format(instance), context=all_errors)
+
+
+def _ref(validator, ref, instance, schema):
+    # local references are looked up in the table built once per process instead of being resolved as URLs
+    target = schema_cache.references().get(ref)
+    if target is None:
+        return _resolve_ref(validator, ref, instance, schema)
+    resolver = getattr(validator, '_resolver', None)
+    if resolver is not None:
+        # the target is part of the same schema document, so the validator's resolver already applies to it
+        return validator.descend(instance, target, resolver=resolver)
+    return validator.descend(instance, target)
+
+
+def _local_references(schema, root_schema, references):
+    if isinstance(schema, dict):
+        ref = schema.get('$ref')
+        if isinstance(ref, str) and ref.startswith('#') and ref not in references:
+            references[ref] = _resolve_pointer(root_schema, ref[1:])
+        for value in schema.values():
+            _local_references(value, root_schema, references)
+    elif isinstance(schema, list):
+        for value in schema:
+            _local_references(value, root_schema, references)
+    return references
+
+
+def _any_of_pointers(schema, json_pointer, pointers):
+    # the json pointer of every anyOf list in the schema, keyed by the id of the list
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            value_pointer = "{}/{}".format(json_pointer, key.replace('~', '~0').replace('/', '~1'))
+            if key == 'anyOf' and isinstance(value, list):
+                pointers[id(value)] = value_pointer
+            _any_of_pointers(value, value_pointer, pointers)
+    elif isinstance(schema, list):
+        for index, value in enumerate(schema):
+            _any_of_pointers(value, "{}/{}".format(json_pointer, index), pointers)
+    return pointers
+
+
+_resolve_ref = Draft4Validator.VALIDATORS['$ref']
+
+TiesDraft4Validator = validators.extend(Draft4Validator, {'$ref': _ref, 'anyOf': _any_of, 'uniqueItems': _unique_items})
+
 
 def load_schema(json_pointer=''):
+    return _resolve_pointer(json.loads(schema_cache.schema_text()), json_pointer)
+
+
+def _read_schema_text():
     schema_path = abspath(resource_filename(__name__, 'schemata/ties-base.json'))
 
     if not isfile(schema_path):
         raise FileNotFoundError('could not find schema')
 
     with open(schema_path, 'r', encoding='utf-8') as f:
-        schema = json.load(f)
+        return f.read()
 
+
+def _resolve_pointer(schema, json_pointer):
     for p in json_pointer.strip('/').split('/'):
         if p != '':
-            schema = schema[p]
+            schema = schema[int(p)] if isinstance(schema, list) else schema[p]
 
     return schema
 
 
+def instance_pointer_tokens(json_pointer):
+    if json_pointer and not json_pointer.startswith('/'):
+        raise ValueError("invalid JSON pointer: {}".format(json_pointer))
+    return [token.replace('~1', '/').replace('~0', '~') for token in json_pointer.split('/')[1:]]
+
+
+class _LocationNode(object):
+
+    __slots__ = ('json_pointer', 'properties', 'items')
+
+    def __init__(self, json_pointer):
+        self.json_pointer = json_pointer
+        self.properties = {}
+        self.items = None
+
+
+_AMBIGUOUS_LOCATION = _LocationNode(None)
+
+
+def _dereference(schema, json_pointer):
+    seen = set()
+    subschema = _resolve_pointer(schema, json_pointer)
+    while '$ref' in subschema and subschema['$ref'].startswith('#') and json_pointer not in seen:
+        seen.add(json_pointer)
+        json_pointer = subschema['$ref'][1:]
+        subschema = _resolve_pointer(schema, json_pointer)
+    return json_pointer
+
+
+def _location_node(schema, json_pointer, ancestors):
+    json_pointer = _dereference(schema, json_pointer)
+    node = _LocationNode(json_pointer)
+    if json_pointer in ancestors:
+        return node
+    # the children of every anyOf/oneOf/allOf branch apply at the same instance location
+    properties = OrderedDict()
+    items = []
+    pending = [json_pointer]
+    while pending:
+        pointer = pending.pop(0)
+        subschema = _resolve_pointer(schema, pointer)
+        for name in subschema.get('properties', {}):
+            properties.setdefault(name, []).append(_dereference(schema, "{}/properties/{}".format(pointer, name)))
+        if isinstance(subschema.get('items'), dict):
+            items.append(_dereference(schema, "{}/items".format(pointer)))
+        for keyword in ('allOf', 'anyOf', 'oneOf'):
+            pending.extend(_dereference(schema, "{}/{}/{}".format(pointer, keyword, i)) for i in range(len(subschema.get(keyword, []))))
+    ancestors = ancestors + (json_pointer,)
+    for name, pointers in properties.items():
+        node.properties[name] = _child_location_node(schema, pointers, ancestors)
+    if items:
+        node.items = _child_location_node(schema, items, ancestors)
+    return node
+
+
+def _child_location_node(schema, pointers, ancestors):
+    # branches often repeat the same property definition, only differing definitions make a location ambiguous
+    if any(_resolve_pointer(schema, pointer) != _resolve_pointer(schema, pointers[0]) for pointer in pointers[1:]):
+        return _AMBIGUOUS_LOCATION
+    return _location_node(schema, pointers[0], ancestors)
+
+
+def _without_properties(schema, json_pointer, paths):
+    # a copy of the definition in which the properties at paths accept anything, definitions on the way to them are
+    # copied inline so that the ones shared with other parts of the schema are left as they are
+    json_pointer = _dereference(schema, json_pointer)
+    definition = dict(_resolve_pointer(schema, json_pointer))
+    definition['properties'] = dict(definition['properties'])
+    for name in OrderedDict.fromkeys(path[0] for path in paths):
+        nested_paths = [path[1:] for path in paths if path[0] == name and len(path) > 1]
+        if nested_paths:
+            definition['properties'][name] = _without_properties(schema, "{}/properties/{}".format(json_pointer, name), nested_paths)
+        else:
+            definition['properties'][name] = {}
+    return definition
+
+
+def _strip_annotations(definition):
+    return dict((k, v) for k, v in definition.items() if k not in _ANNOTATION_KEYWORDS)
+
+
+def _column_check(schema, json_pointer, check_formats=False):
+    # a check of a whole column of values against the definition, or None if it cannot be checked in bulk
+    definition = _strip_annotations(_resolve_pointer(schema, json_pointer))
+    if definition == {'type': 'string', 'format': 'date-time'}:
+        return _DateTimeColumnCheck(check_formats)
+    if list(definition) != ['oneOf']:
+        alternatives = [definition]
+    elif len(definition['oneOf']) == 1:
+        alternatives = definition['oneOf']
+    else:
+        # each of several alternatives is looked up through its $ref
+        alternatives = [_strip_annotations(_resolve_pointer(schema, _dereference(schema, "{}/oneOf/{}".format(json_pointer, i)))) for i in range(len(definition['oneOf']))]
+    if len(alternatives) == 1:
+        alternative = alternatives[0]
+        if alternative.get('type') == 'integer' and set(alternative) <= {'type', 'minimum', 'maximum'}:
+            return _IntegerColumnCheck(alternative.get('minimum'), alternative.get('maximum'))
+    patterns = {}
+    for alternative in alternatives:
+        if alternative.get('type') != 'string' or set(alternative) - {'type', 'pattern', 'minLength', 'maxLength'}:
+            return None
+        match = _FIXED_WIDTH_PATTERN_RE.match(alternative.get('pattern', ''))
+        if match is None:
+            return None
+        body = match.group(1)
+        width = sum(int(part.group(1) or 1) for part in _FIXED_WIDTH_PART_RE.finditer(body))
+        if alternative.get('minLength') != width or alternative.get('maxLength') != width or width in patterns:
+            return None
+        patterns[width] = re.compile("(?:{})*".format(body))
+    return _StringColumnCheck(patterns)
+
+
+class _StringColumnCheck(object):
+
+    def __init__(self, patterns):
+        # fixed width pattern bodies by the length of the strings they match, a column of strings of one length is
+        # valid if the pattern matches their concatenation
+        self._patterns = patterns
+
+    def failures(self, values):
+        if self._valid(values):
+            return []
+        return [i for i, value in enumerate(values) if not self._valid([value])]
+
+    def _valid(self, values):
+        if set(map(type, values)) - {str}:
+            return False
+        lengths = set(map(len, values))
+        if lengths - set(self._patterns):
+            return False
+        if len(lengths) == 1:
+            return self._patterns[lengths.pop()].fullmatch(''.join(values)) is not None
+        return all(self._patterns[length].fullmatch(''.join(value for value in values if len(value) == length)) is not None for length in lengths)
+
+
+class _IntegerColumnCheck(object):
+
+    def __init__(self, minimum, maximum):
+        self._minimum = minimum
+        self._maximum = maximum
+
+    def failures(self, values):
+        if self._valid(values):
+            return []
+        return [i for i, value in enumerate(values) if not self._valid([value])]
+
+    def _valid(self, values):
+        if not values:
+            return True
+        if set(map(type, values)) - {int}:
+            return False
+        if self._minimum is not None and min(values) < self._minimum:
+            return False
+        return self._maximum is None or max(values) <= self._maximum
+
+
+class _DateTimeColumnCheck(object):
+
+    def __init__(self, check_formats):
+        self._check_formats = check_formats
+
+    def failures(self, values):
+        if set(map(type, values)) - {str}:
+            return [i for i, value in enumerate(values) if not isinstance(value, str) or (self._check_formats and not is_date_time(value))]
+        if self._check_formats:
+            return date_time_failures(values)
+        return []
+
+
+def _column(elements, path):
+    indexes = []
+    values = []
+    for index, element in enumerate(elements):
+        for name in path:
+            if not isinstance(element, dict) or name not in element:
+                break
+            element = element[name]
+        else:
+            indexes.append(index)
+            values.append(element)
+    return indexes, values
+
+
+class SchemaCache(object):
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._schema_text = None
+        self._schema = None
+        self._references = None
+        self._any_of_pointers = None
+        self._any_of_discriminators = {}
+        self._compilers = {}
+        self._location_index = None
+        self._fingerprint = None
+        self._bulk_columns = {}
+        self._validators = {}
+
+    def schema_text(self):
+        schema_text = self._schema_text
+        if schema_text is None:
+            with self._lock:
+                if self._schema_text is None:
+                    self._schema_text = _read_schema_text()
+                schema_text = self._schema_text
+        return schema_text
+
+    def fingerprint(self):
+        fingerprint = self._fingerprint
+        if fingerprint is None:
+            with self._lock:
+                if self._fingerprint is None:
+                    self._fingerprint = sha1(self.schema_text().encode('utf-8')).hexdigest()
+                fingerprint = self._fingerprint
+        return fingerprint
+
+    def schema(self):
+        schema = self._schema
+        if schema is None:
+            with self._lock:
+                if self._schema is None:
+                    self._schema = json.loads(self.schema_text())
+                schema = self._schema
+        return schema
+
+    def references(self):
+        # every local $ref in the schema bound to the subschema it refers to
+        references = self._references
+        if references is None:
+            with self._lock:
+                if self._references is None:
+                    self._references = _local_references(self.schema(), self.schema(), {})
+                references = self._references
+        return references
+
+    def any_of_discriminators(self, any_of):
+        # the discriminating properties of an anyOf in the schema are cached by its json pointer, the pointers are
+        # found by the id of the anyOf list, which is only looked up while this cache holds the schema the list is in
+        any_of_pointers = self._any_of_pointers
+        if any_of_pointers is None:
+            with self._lock:
+                if self._any_of_pointers is None:
+                    self._any_of_pointers = _any_of_pointers(self.schema(), '', {})
+                any_of_pointers = self._any_of_pointers
+        json_pointer = any_of_pointers.get(id(any_of))
+        if json_pointer is None:
+            # an anyOf from a schema this cache does not hold
+            return discriminating_properties(self.schema(), any_of)
+        any_of_discriminators = self._any_of_discriminators
+        if json_pointer not in any_of_discriminators:
+            any_of_discriminators[json_pointer] = discriminating_properties(self.schema(), any_of)
+        return any_of_discriminators[json_pointer]
+
+    def compiler(self, check_formats=False):
+        compiler = self._compilers.get(check_formats)
+        if compiler is None:
+            with self._lock:
+                compiler = self._compilers.get(check_formats)
+                if compiler is None:
+                    compiler = SchemaCompiler(self.schema(), check_formats=check_formats)
+                    compiler.compile_all()
+                    self._compilers[check_formats] = compiler
+        return compiler
+
+    def validator(self, json_pointer='', engine='jsonschema', check_formats=False):
+        validator = self._validators.get((engine, json_pointer, check_formats))
+        if validator is None:
+            if engine not in engines:
+                raise ValueError("unknown validation engine: {}".format(engine))
+            with self._lock:
+                validator = self._validators.get((engine, json_pointer, check_formats))
+                if validator is None:
+                    if engine == 'compiled':
+                        validator = self.compiler(check_formats=check_formats).validator(json_pointer)
+                    else:
+                        validator = _draft4_validator(_resolve_pointer(self.schema(), json_pointer), check_formats)
+                    self._validators[(engine, json_pointer, check_formats)] = validator
+        return validator
+
+    def streamed_array_schemas(self):
+        schema = self.schema()
+        array_schemas = {}
+        for key in streamed_arrays:
+            array_schema = schema['properties'][key]
+            if '$ref' in array_schema:
+                array_schema = _resolve_pointer(schema, array_schema['$ref'].lstrip('#'))
+            array_schemas[key] = array_schema
+        return array_schemas
+
+    def bulk_columns(self, check_formats=False):
+        # (path, column check, definition pointer) for each of the bulk columns the schema allows checking in bulk
+        bulk_columns = self._bulk_columns.get(check_formats)
+        if bulk_columns is None:
+            with self._lock:
+                bulk_columns = self._bulk_columns.get(check_formats)
+                if bulk_columns is None:
+                    bulk_columns = []
+                    for path in bulk_column_paths:
+                        json_pointer, _ = self.locate(''.join('/' + p for p in ('objectItems', '0') + path))
+                        column_check = _column_check(self.schema(), json_pointer, check_formats)
+                        if column_check is not None:
+                            bulk_columns.append((path, column_check, json_pointer))
+                    self._bulk_columns[check_formats] = bulk_columns
+        return bulk_columns
+
+    def bulk_validator(self, engine='jsonschema', check_formats=False):
+        # the objectItem definition with the bulk columns accepting anything, they are checked separately
+        validator = self._validators.get((engine, 'bulk', check_formats))
+        if validator is None:
+            if engine not in engines:
+                raise ValueError("unknown validation engine: {}".format(engine))
+            with self._lock:
+                validator = self._validators.get((engine, 'bulk', check_formats))
+                if validator is None:
+                    schema = self.schema()
+                    bulk_schema = _without_properties(schema, object_item_pointer, [path for path, _, _ in self.bulk_columns(check_formats)])
+                    if engine == 'compiled':
+                        bulk_root = dict(schema)
+                        bulk_root['definitions'] = dict(schema['definitions'])
+                        bulk_root['definitions']['bulkObjectItem-object'] = bulk_schema
+                        validator = compile_validator(bulk_root, '/definitions/bulkObjectItem-object', check_formats=check_formats)
+                    else:
+                        validator = _draft4_validator(bulk_schema, check_formats)
+                    self._validators[(engine, 'bulk', check_formats)] = validator
+        return validator
+
+    def envelope_validator(self, engine='jsonschema', check_formats=False):
+        # the ties schema with the per-element keywords of the streamed arrays removed
+        validator = self._validators.get((engine, None, check_formats))
+        if validator is None:
+            if engine not in engines:
+                raise ValueError("unknown validation engine: {}".format(engine))
+            with self._lock:
+                validator = self._validators.get((engine, None, check_formats))
+                if validator is None:
+                    envelope_schema = dict(self.schema())
+                    envelope_schema['properties'] = dict(envelope_schema['properties'])
+                    for key, array_schema in self.streamed_array_schemas().items():
+                        envelope_schema['properties'][key] = dict((k, v) for k, v in array_schema.items() if k not in _ARRAY_ELEMENT_KEYWORDS)
+                    if engine == 'compiled':
+                        validator = compile_validator(envelope_schema, check_formats=check_formats)
+                    else:
+                        validator = _draft4_validator(envelope_schema, check_formats)
+                    self._validators[(engine, None, check_formats)] = validator
+        return validator
+
+    def location_index(self):
+        location_index = self._location_index
+        if location_index is None:
+            with self._lock:
+                if self._location_index is None:
+                    self._location_index = _location_node(self.schema(), '', ())
+                location_index = self._location_index
+        return location_index
+
+    def locate(self, location):
+        # the schema pointer that governs an instance location and the location as a path of property names and
+        # array indexes
+        node = self.location_index()
+        path = []
+        for token in instance_pointer_tokens(location):
+            if node.items is not None and _ARRAY_INDEX_RE.match(token):
+                node = node.items
+                path.append(int(token))
+            elif token in node.properties:
+                node = node.properties[token]
+                path.append(token)
+            else:
+                raise ValueError("no schema definition for instance location: {}".format(location))
+            if node is _AMBIGUOUS_LOCATION:
+                raise ValueError("more than one schema definition for instance location: {}".format(location))
+        return node.json_pointer, path
+
+    def clear(self):
+        with self._lock:
+            self._schema_text = None
+            self._schema = None
+            self._references = None
+            self._any_of_pointers = None
+            self._any_of_discriminators = {}
+            self._compilers = {}
+            self._location_index = None
+            self._fingerprint = None
+            self._bulk_columns = {}
+            self._validators = {}
+
+
+def _draft4_validator(schema, check_formats):
+    if check_formats:
+        return TiesDraft4Validator(schema, format_checker=format_checker)
+    return TiesDraft4Validator(schema)
+
+
+# the parsed schema, reference table and validators are shared by every SchemaValidator in the process
+schema_cache = SchemaCache()
+
+MemoInfo = namedtuple('MemoInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class ValidationMemo(object):
+
+    def __init__(self, maxsize=4096, pointers=(authority_information_pointer, other_information_pointer)):
+        self.maxsize = maxsize
+        self.pointers = frozenset(pointers)
+        self._lock = threading.RLock()
+        self._errors = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._validator_class = None
+        self._validators = {}
+
+    def __reduce__(self):
+        # the cached errors are process local, a memo is unpickled empty
+        return ValidationMemo, (self.maxsize, self.pointers)
+
+    def cache_info(self):
+        with self._lock:
+            return MemoInfo(self._hits, self._misses, self.maxsize, len(self._errors))
+
+    def cache_clear(self):
+        with self._lock:
+            self._errors = OrderedDict()
+            self._hits = 0
+            self._misses = 0
+
+    def validator(self, json_pointer='', engine='jsonschema', check_formats=False):
+        if engine not in engines:
+            raise ValueError("unknown validation engine: {}".format(engine))
+        with self._lock:
+            validator = self._validators.get((engine, json_pointer, check_formats))
+            if validator is None:
+                if engine == 'compiled':
+                    validator = schema_cache.compiler(check_formats=check_formats).wrapped_validator(json_pointer, lambda pointer, function: self._memoized_function(pointer, function, check_formats))
+                else:
+                    if self._validator_class is None:
+                        self._validator_class = validators.extend(TiesDraft4Validator, {'$ref': self._memoized_ref})
+                    validator = self._validator_class(_resolve_pointer(schema_cache.schema(), json_pointer), format_checker=format_checker if check_formats else None)
+                self._validators[(engine, json_pointer, check_formats)] = validator
+            return validator
+
+    def _cached_errors(self, key, validate):
+        with self._lock:
+            errors = self._errors.get(key)
+            if errors is not None:
+                self._errors.move_to_end(key)
+                self._hits += 1
+                return errors
+            self._misses += 1
+        errors = tuple(validate())
+        with self._lock:
+            self._errors[key] = errors
+            if len(self._errors) > self.maxsize:
+                self._errors.popitem(last=False)
+        return errors
+
+    def _memoized_ref(self, validator, ref, instance, schema):
+        pointer = ref[1:] if ref.startswith('#') else None
+        if pointer not in self.pointers:
+            return _ref(validator, ref, instance, schema)
+        # the errors of a $ref are relative to its instance, copies are handed out because jsonschema rebases them in place
+        errors = self._cached_errors(('jsonschema', pointer, validator.format_checker is not None, _memo_key(instance)), lambda: _ref(validator, ref, instance, schema))
+        return [_copy_jsonschema_error(e) for e in errors]
+
+    def _memoized_function(self, pointer, function, check_formats):
+        if pointer not in self.pointers:
+            return None
+
+        def validate(instance):
+            errors = []
+            function(instance, (), errors)
+            return errors
+
+        def memoized_function(instance, path, errors):
+            for e in self._cached_errors(('compiled', pointer, check_formats, _memo_key(instance)), lambda: validate(instance)):
+                errors.append(e.copy(path))
+        return memoized_function
+
+
+def _memo_key(instance):
+    # like canonical_form, but 1, 1.0 and -0.0 stay distinct because error messages include the value and its type
+    if isinstance(instance, dict):
+        return (1, tuple(sorted((k, _memo_key(v)) for k, v in instance.items())))
+    if isinstance(instance, list):
+        return (2, tuple(_memo_key(v) for v in instance))
+    if isinstance(instance, bool):
+        return (3, instance)
+    if isinstance(instance, float):
+        return (4, repr(instance))
+    return instance
+
+
+def _copy_jsonschema_error(error):
+    contents = error._contents()  # pylint: disable=protected-access
+    contents['context'] = [_copy_jsonschema_error(e) for e in error.context]
+    contents['parent'] = None
+    copy = type(error)(**contents)
+    if hasattr(error, 'duplicate_indexes'):
+        copy.duplicate_indexes = error.duplicate_indexes
+    return copy
+
+
 class SchemaValidator(object):
 
-    def __init__(self, json_pointer=''):
-        schema = load_schema(json_pointer=json_pointer)
-        resolver = RefResolver.from_schema(load_schema())
-        self.validator = Draft4Validator(schema, resolver=resolver)
+    def __init__(self, json_pointer='', engine='jsonschema', memo=None, check_formats=False):
+        if memo is None:
+            self.validator = schema_cache.validator(json_pointer, engine=engine, check_formats=check_formats)
+        else:
+            self.validator = memo.validator(json_pointer, engine=engine, check_formats=check_formats)
+        self._json_pointer = json_pointer
+        self._engine = engine
+        self._memo = memo
+        self._check_formats = check_formats
+
+    def __reduce__(self):
+        # the validator is rebuilt from the schema cache of the process it is unpickled in
+        return _unpickle_validator, (type(self), self._json_pointer, self._engine, self._memo, schema_cache.fingerprint(), self._check_formats)
 
     def validate(self, instance):
-        try:
-            instance = json.loads(instance)
-        except Exception:  # pylint: disable=broad-except
-            pass
-        try:
-            instance = json.load(instance)
-        except Exception:  # pylint: disable=broad-except
-            pass
+        self.validate_object(_parse_instance(instance))
 
-        try:
-            self.validator.validate(instance)
-        except jsonschema.ValidationError as e:
-            raise make_validation_error(e)  # pylint: disable=raise-missing-from
+    def validate_object(self, instance):
+        for e in self.validator.iter_errors(instance):
+            raise make_validation_error(e)
 
-    def all_errors(self, instance):
-        try:
-            instance = json.loads(instance)
-        except Exception:  # pylint: disable=broad-except
-            pass
+    def validate_text(self, text):
+        self.validate_object(json_backend.loads(text))
+
+    def validate_bytes(self, data):
+        self.validate_object(json_backend.loads(data))
+
+    def validate_path(self, path):
+        self.validate_object(_load_path(path))
+
+    def all_errors(self, instance, max_errors=None, timeout=None, cancellation=None):
+        return self.all_errors_object(_parse_instance(instance), max_errors=max_errors, timeout=timeout, cancellation=cancellation)
+
+    def all_errors_object(self, instance, max_errors=None, timeout=None, cancellation=None):
+        # with a timeout in seconds or a CancellationToken, the errors found before either runs out are returned with
+        # incomplete set
+        checkpoint = make_checkpoint(timeout, cancellation)
+        if checkpoint is None and max_errors is None:
+            return _collect_errors((e.validator, make_validation_error(e)) for e in self._iter_errors(instance))
+        if checkpoint is None:
+            # the checked walk goes through the large arrays of an export one element at a time, so that it stops soon
+            # after the budget instead of first checking uniqueItems over a whole array
+            return _collect_errors(self._iter_checked_errors(instance, None, max_errors=max_errors), max_errors=max_errors)
+        validation_errors = _collect_errors(checkpoint.until_interrupted(self._iter_checked_errors(instance, checkpoint, max_errors=max_errors)), max_errors=max_errors)
+        validation_errors.incomplete = checkpoint.interrupted
+        return validation_errors
+
+    def all_errors_text(self, text, max_errors=None, timeout=None, cancellation=None):
+        return self.all_errors_object(json_backend.loads(text), max_errors=max_errors, timeout=timeout, cancellation=cancellation)
+
+    def all_errors_bytes(self, data, max_errors=None, timeout=None, cancellation=None):
+        return self.all_errors_object(json_backend.loads(data), max_errors=max_errors, timeout=timeout, cancellation=cancellation)
+
+    def all_errors_path(self, path, max_errors=None, timeout=None, cancellation=None):
+        return self.all_errors_object(_load_path(path), max_errors=max_errors, timeout=timeout, cancellation=cancellation)
+
+    def error_groups(self, instance, max_samples=3, max_ranges=16):
+        return aggregate_errors((make_validation_error(e) for e in self._iter_errors(_parse_instance(instance))), max_samples=max_samples, max_ranges=max_ranges)
+
+    def first_error(self, instance):
+        validation_errors = self.all_errors(instance, max_errors=1)
+        if validation_errors:
+            return validation_errors[0]
+        return None
+
+    def _iter_errors(self, instance, max_errors=None):
+        if max_errors is not None and isinstance(self.validator, CompiledValidator):
+            # one more than the budget, so that the caller can tell whether the errors were truncated
+            return self.validator.iter_errors(instance, max_errors=max_errors + 1)
+        return self.validator.iter_errors(instance)
+
+    def _iter_checked_errors(self, instance, checkpoint, max_errors=None):
+        # a single instance is only checked between its errors
+        if checkpoint is not None:
+            checkpoint()
+        for e in self._iter_errors(instance, max_errors=max_errors):
+            yield e.validator, make_validation_error(e)
+            if checkpoint is not None:
+                checkpoint()
+
+
+def _unpickle_validator(cls, json_pointer, engine, memo, fingerprint, check_formats=False):
+    if fingerprint != schema_cache.fingerprint():
+        raise ValueError('validator was pickled with a different TIES schema')
+    schema_validator = cls.__new__(cls)
+    SchemaValidator.__init__(schema_validator, json_pointer=json_pointer, engine=engine, memo=memo, check_formats=check_formats)
+    return schema_validator
+
+
+def preload(engines=('jsonschema',), freeze=False, check_formats=False):  # pylint: disable=redefined-outer-name
+    # builds every validator up front, so that processes forked afterwards share them instead of building their own;
+    # freeze moves everything allocated so far out of the garbage collector's reach so that collections in the forked
+    # processes do not copy the shared pages
+    schema_cache.location_index()
+    schema_cache.references()
+    for engine in engines:
+        for json_pointer in _preloaded_pointers:
+            schema_cache.validator(json_pointer, engine=engine, check_formats=check_formats)
+        schema_cache.envelope_validator(engine=engine, check_formats=check_formats)
+        schema_cache.bulk_validator(engine=engine, check_formats=check_formats)
+    if freeze:
+        gc.freeze()
+
+
+def _parse_instance(instance):
+    # JSON text, bytes or a file are parsed, anything else is validated as it is
+    if isinstance(instance, str):
         try:
-            instance = json.load(instance)
-        except Exception:  # pylint: disable=broad-except
-            pass
+            return json_backend.loads(instance)
+        except ValueError:
+            return instance
+    if isinstance(instance, (bytes, bytearray, memoryview, mmap)):
+        return json_backend.loads(instance)
+    if hasattr(instance, 'read'):
+        return json_backend.load(instance)
+    return instance
+
 
-        validation_errors = [make_validation_error(e) for e in sorted(self.validator.iter_errors(instance), key=lambda x: x.validator)]
-        # sorted is stable, so validation errors will be sorted by location and validator
-        return sorted(list(OrderedDict.fromkeys(validation_errors)), key=lambda x: x.location)
+def _load_path(path):
+    with open(path, 'rb', buffering=_READ_BUFFER_SIZE) as f:
+        return json_backend.loads(f.read())
 
 
-def _validator_factory(json_pointer):
+def _collect_errors(errors, max_errors=None):
+    # errors is an iterable of (validator keyword, ValidationError) pairs
+    if max_errors is None:
+        return ValidationErrorList(_unique_errors(errors))
+
+    if max_errors < 1:
+        raise ValueError('max_errors must be at least 1')
+
+    # the first max_errors distinct errors in the order the engine finds them, iteration stops at the next distinct error
+    # which is only read to tell that the list was truncated, so which errors are kept depends on the engine
+    first_errors = OrderedDict()
+    truncated = False
+    for validator, validation_error in errors:
+        first_validator = first_errors.get(validation_error)
+        if first_validator is not None:
+            first_errors[validation_error] = min(validator, first_validator)
+            continue
+        if len(first_errors) == max_errors:
+            truncated = True
+            break
+        first_errors[validation_error] = validator
+    # sorted is stable, so validation errors will be sorted by location and validator
+    return ValidationErrorList([e for e, _ in sorted(first_errors.items(), key=lambda x: (x[0].location, x[1]))], truncated=truncated)
+
+
+def _validator_factory(name, json_pointer):
     class Validator(SchemaValidator):
-        def __init__(self):
-            SchemaValidator.__init__(self, json_pointer=json_pointer)
+        def __init__(self, engine='jsonschema', memo=None, check_formats=False):
+            SchemaValidator.__init__(self, json_pointer=json_pointer, engine=engine, memo=memo, check_formats=check_formats)
+    # named after the module attribute it is assigned to, so that pickle can find the class
+    Validator.__name__ = Validator.__qualname__ = name
     return Validator
 
 
-AnnotationSchemaValidator = _validator_factory(annotation_pointer)
-AssertionsSchemaValidator = _validator_factory(assertions_pointer)
-AuthorityInformationSchemaValidator = _validator_factory(authority_information_pointer)
-ObjectGroupSchemaValidator = _validator_factory(object_group_pointer)
-ObjectItemSchemaValidator = _validator_factory(object_item_pointer)
-ObjectRelationshipSchemaValidator = _validator_factory(object_relationship_pointer)
-OtherInformationSchemaValidator = _validator_factory(other_information_pointer)
-SupplementalDescriptionDataFileSchemaValidator = _validator_factory(supplemental_description_data_file_pointer)
-SupplementalDescriptionDataObjectSchemaValidator = _validator_factory(supplemental_description_data_object_pointer)
-TiesSchemaValidator = _validator_factory(ties_pointer)
+AnnotationSchemaValidator = _validator_factory('AnnotationSchemaValidator', annotation_pointer)
+AssertionsSchemaValidator = _validator_factory('AssertionsSchemaValidator', assertions_pointer)
+AuthorityInformationSchemaValidator = _validator_factory('AuthorityInformationSchemaValidator', authority_information_pointer)
+ObjectGroupSchemaValidator = _validator_factory('ObjectGroupSchemaValidator', object_group_pointer)
+ObjectItemSchemaValidator = _validator_factory('ObjectItemSchemaValidator', object_item_pointer)
+ObjectRelationshipSchemaValidator = _validator_factory('ObjectRelationshipSchemaValidator', object_relationship_pointer)
+OtherInformationSchemaValidator = _validator_factory('OtherInformationSchemaValidator', other_information_pointer)
+SupplementalDescriptionDataFileSchemaValidator = _validator_factory('SupplementalDescriptionDataFileSchemaValidator', supplemental_description_data_file_pointer)
+SupplementalDescriptionDataObjectSchemaValidator = _validator_factory('SupplementalDescriptionDataObjectSchemaValidator', supplemental_description_data_object_pointer)
+
+
+class TiesSchemaValidator(SchemaValidator):
+
+    def __init__(self, engine='jsonschema', memo=None, check_formats=False):
+        SchemaValidator.__init__(self, json_pointer=ties_pointer, engine=engine, memo=memo, check_formats=check_formats)
+
+    def validate_at(self, location, fragment):
+        for _, validation_error in self._iter_errors_at(location, fragment):
+            raise validation_error
+
+    def all_errors_at(self, location, fragment, max_errors=None):
+        return _collect_errors(self._iter_errors_at(location, fragment, max_errors=max_errors), max_errors=max_errors)
+
+    def validate_bulk(self, instance):
+        validation_errors = self.all_errors_bulk(instance)
+        if validation_errors:
+            raise validation_errors[0]
+
+    def all_errors_bulk(self, instance, max_errors=None):
+        instance = _parse_instance(instance)
+        if not isinstance(instance, dict):
+            return self.all_errors_object(instance, max_errors=max_errors)
+
+        # the bulk columns of the objectItems are checked a column at a time, the rest of each element is validated
+        # against the objectItem definition with those properties accepting anything
+        array_schemas = schema_cache.streamed_array_schemas()
+        arrays = [(key, instance[key]) for key in streamed_arrays if isinstance(instance.get(key), list)]
+        skeleton = dict(instance)
+        skeleton.update((key, []) for key, _ in arrays)
+        errors = [(e.validator, make_validation_error(e)) for e in schema_cache.envelope_validator(engine=self._engine, check_formats=self._check_formats).iter_errors(skeleton)]
+        for key, elements in arrays:
+            if key == 'objectItems':
+                validator = schema_cache.bulk_validator(engine=self._engine, check_formats=self._check_formats)
+                errors.extend(_bulk_column_errors(key, elements, self._engine, self._check_formats))
+            else:
+                validator = (self._memo or schema_cache).validator(streamed_arrays[key], engine=self._engine, check_formats=self._check_formats)
+            for index, element in enumerate(elements):
+                errors.extend(_element_errors(validator, key, index, element))
+            item_index = None
+            if array_schemas[key].get('uniqueItems'):
+                item_index = _ItemIndex()
+                for index, element in enumerate(elements):
+                    item_index.add(_item_digest(element), index)
+            errors.extend((e.validator, make_validation_error(e)) for e in _array_errors(key, array_schemas[key], len(elements), item_index))
+        return _collect_errors(errors, max_errors=max_errors)
+
+    def validate_stream(self, instance_file):
+        for _, validation_error in self._iter_stream_errors(instance_file):
+            raise validation_error
+
+    def all_errors_stream(self, instance_file, max_errors=None, timeout=None, cancellation=None):
+        checkpoint = make_checkpoint(timeout, cancellation)
+        if checkpoint is None:
+            return _collect_errors(self._iter_stream_errors(instance_file), max_errors=max_errors)
+        validation_errors = _collect_errors(checkpoint.until_interrupted(self._iter_stream_errors(instance_file, checkpoint)), max_errors=max_errors)
+        validation_errors.incomplete = checkpoint.interrupted
+        return validation_errors
+
+    def error_groups_stream(self, instance_file, max_samples=3, max_ranges=16):
+        return aggregate_errors((e for _, e in self._iter_stream_errors(instance_file)), max_samples=max_samples, max_ranges=max_ranges)
+
+    def validate_parallel(self, instance, workers=None, executor=None):
+        validation_errors = self.all_errors_parallel(instance, workers=workers, executor=executor)
+        if validation_errors:
+            raise validation_errors[0]
+
+    def all_errors_parallel(self, instance, workers=None, executor=None):
+        instance = _parse_instance(instance)
+        if not isinstance(instance, dict):
+            return self.all_errors_object(instance)
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker, initargs=(self._engine, self._check_formats)) as executor:
+                return self.all_errors_parallel(instance, workers=workers, executor=executor)
+
+        # contiguous slices of the large top-level arrays are validated in the worker processes, the rest of the
+        # export is validated here against the schema with those arrays left empty
+        array_schemas = schema_cache.streamed_array_schemas()
+        arrays = [(key, instance[key]) for key in streamed_arrays if isinstance(instance.get(key), list)]
+        # a few slices per worker so that a slow slice does not hold up the others
+        slice_count = (workers or os.cpu_count() or 1) * 4
+        slice_size = max(1, int(math.ceil(sum(len(elements) for _, elements in arrays) / float(slice_count))))
+        futures = []
+        for key, elements in arrays:
+            for start in range(0, len(elements), slice_size):
+                futures.append((key, executor.submit(_slice_errors, key, start, elements[start:start + slice_size], self._engine, bool(array_schemas[key].get('uniqueItems')), self._check_formats)))
+
+        skeleton = dict(instance)
+        skeleton.update((key, []) for key, _ in arrays)
+        errors = [(e.validator, make_validation_error(e)) for e in schema_cache.envelope_validator(engine=self._engine, check_formats=self._check_formats).iter_errors(skeleton)]
+        item_indexes = dict((key, _ItemIndex()) for key, _ in arrays)
+        for key, future in futures:
+            slice_errors, start, digests = future.result()
+            errors.extend(slice_errors)
+            for index, digest in enumerate(digests, start):
+                item_indexes[key].add(digest, index)
+        for key, elements in arrays:
+            item_index = item_indexes[key] if array_schemas[key].get('uniqueItems') else None
+            errors.extend((e.validator, make_validation_error(e)) for e in _array_errors(key, array_schemas[key], len(elements), item_index))
+        return _collect_errors(errors)
+
+    def _iter_errors_at(self, location, fragment, max_errors=None):
+        # the fragment is validated against the definition that governs its location, errors are reported at their
+        # location in the export
+        json_pointer, path = schema_cache.locate(location)
+        schema_validator = SchemaValidator(json_pointer=json_pointer, engine=self._engine, memo=self._memo, check_formats=self._check_formats)
+        for e in schema_validator._iter_errors(fragment, max_errors=max_errors):  # pylint: disable=protected-access
+            e.relative_path.extendleft(reversed(path))
+            yield e.validator, make_validation_error(e)
+
+    def _iter_checked_errors(self, instance, checkpoint, max_errors=None):
+        if not isinstance(instance, dict):
+            return SchemaValidator._iter_checked_errors(self, instance, checkpoint, max_errors=max_errors)
+        return self._iter_element_errors(instance, checkpoint)
+
+    def _iter_element_errors(self, instance, checkpoint):
+        # the elements of the large top-level arrays are validated one at a time, so that the checkpoint can be called
+        # between them, the rest of the export is validated against the schema with those arrays left empty
+        array_schemas = schema_cache.streamed_array_schemas()
+        arrays = [(key, instance[key]) for key in streamed_arrays if isinstance(instance.get(key), list)]
+        skeleton = dict(instance)
+        skeleton.update((key, []) for key, _ in arrays)
+        if checkpoint is not None:
+            checkpoint()
+        for e in schema_cache.envelope_validator(engine=self._engine, check_formats=self._check_formats).iter_errors(skeleton):
+            yield e.validator, make_validation_error(e)
+        for key, elements in arrays:
+            validator = (self._memo or schema_cache).validator(streamed_arrays[key], engine=self._engine, check_formats=self._check_formats)
+            item_index = _ItemIndex() if array_schemas[key].get('uniqueItems') else None
+            for index, element in enumerate(elements):
+                if checkpoint is not None:
+                    checkpoint()
+                for error in _element_errors(validator, key, index, element):
+                    yield error
+                if item_index is not None:
+                    item_index.add(_item_digest(element), index)
+            for e in _array_errors(key, array_schemas[key], len(elements), item_index):
+                yield e.validator, make_validation_error(e)
+
+    def _iter_stream_errors(self, instance_file, checkpoint=None):
+        # the elements of the large top-level arrays are validated one at a time as they are read, everything else is
+        # collected into a skeleton export that is validated against the schema with those arrays left empty
+        array_schemas = schema_cache.streamed_array_schemas()
+        element_validators = dict((key, (self._memo or schema_cache).validator(pointer, engine=self._engine, check_formats=self._check_formats)) for key, pointer in streamed_arrays.items())
+        skeleton = {}
+        item_indexes = {}
+        for event in iter_events(instance_file, streamed_arrays):
+            if checkpoint is not None:
+                checkpoint()
+            if event[0] == 'element':
+                _, key, index, element = event
+                for error in _element_errors(element_validators[key], key, index, element):
+                    yield error
+                if array_schemas[key].get('uniqueItems'):
+                    item_indexes.setdefault(key, _ItemIndex()).add(_item_digest(element), index)
+            elif event[0] == 'array':
+                _, key, count = event
+                skeleton[key] = []
+                for e in _array_errors(key, array_schemas[key], count, item_indexes.pop(key, None)):
+                    yield e.validator, make_validation_error(e)
+            else:
+                _, key, value = event
+                skeleton[key] = value
+        if checkpoint is not None:
+            checkpoint()
+        for e in schema_cache.envelope_validator(engine=self._engine, check_formats=self._check_formats).iter_errors(skeleton):
+            yield e.validator, make_validation_error(e)
+
+
+def _element_errors(validator, key, index, element):
+    for e in validator.iter_errors(element):
+        e.relative_path.extendleft((index, key))
+        yield e.validator, make_validation_error(e)
+
+
+def _bulk_column_errors(key, elements, engine, check_formats):
+    errors = []
+    for path, column_check, json_pointer in schema_cache.bulk_columns(check_formats):
+        indexes, values = _column(elements, path)
+        failures = column_check.failures(values)
+        if failures:
+            # only the values that fail the column check are validated one at a time, for the usual error messages
+            validator = schema_cache.validator(json_pointer, engine=engine, check_formats=check_formats)
+            for i in failures:
+                for e in validator.iter_errors(values[i]):
+                    e.relative_path.extendleft(reversed((key, indexes[i]) + path))
+                    errors.append((e.validator, make_validation_error(e)))
+    return errors
+
+
+def _item_digest(item):
+    return sha1(repr(canonical_form(item)).encode('utf-8')).digest()
+
+
+def _warm_worker(engine, check_formats):
+    for pointer in streamed_arrays.values():
+        schema_cache.validator(pointer, engine=engine, check_formats=check_formats)
+
+
+def _slice_errors(key, start, elements, engine, unique, check_formats):
+    validator = schema_cache.validator(streamed_arrays[key], engine=engine, check_formats=check_formats)
+    errors = []
+    for index, element in enumerate(elements, start):
+        errors.extend(_element_errors(validator, key, index, element))
+    digests = [_item_digest(element) for element in elements] if unique else []
+    return errors, start, digests
+
+
+class _ItemIndex(object):
+
+    def __init__(self):
+        self._first_indexes = {}
+        self._duplicate_indexes = {}
+
+    def add(self, digest, index):
+        first_index = self._first_indexes.setdefault(digest, index)
+        if first_index != index:
+            self._duplicate_indexes.setdefault(first_index, [first_index]).append(index)
+
+    def duplicate_indexes(self):
+        # the duplicates of the earliest item that has any, matching the in-memory error message
+        if not self._duplicate_indexes:
+            return None
+        return self._duplicate_indexes[min(self._duplicate_indexes)]
+
+
+def _array_errors(key, array_schema, count, item_index):
+    if 'minItems' in array_schema and count < array_schema['minItems']:
+        yield JsonSchemaValidationError("array is too short", validator='minItems', validator_value=array_schema['minItems'], instance=range(count), path=(key,))
+    if 'maxItems' in array_schema and count > array_schema['maxItems']:
+        yield JsonSchemaValidationError("array is too long", validator='maxItems', validator_value=array_schema['maxItems'], instance=range(count), path=(key,))
+    if item_index is not None and item_index.duplicate_indexes() is not None:
+        error = JsonSchemaValidationError("array has non-unique elements", validator='uniqueItems', validator_value=True, path=(key,))
+        error.duplicate_indexes = item_index.duplicate_indexes()
+        yield error
 
 
 if __name__ == '__main__':
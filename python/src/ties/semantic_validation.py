@@ -16,237 +16,387 @@
 
 from __future__ import unicode_literals
 
-from collections import OrderedDict
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from hashlib import blake2b
 
-from ties.exceptions import ValidationWarning
+from ties.cancellation import _Interrupted, checked, make_checkpoint
+from ties.disk_index import DEFAULT_MEMORY_BUDGET, DiskTiesIndex
+from ties.exceptions import ValidationWarning, ValidationWarningList
+from ties.index import TiesIndex, _MultiMap, _TABLES
+from ties.util.json_stream import iter_events
 
 
 class TiesSemanticValidator(object):
 
-    def all_warnings(self, ties):
-        warnings = []
-        warnings += _check_duplicate_object_item_sha256_hashes(ties)
-        warnings += _check_duplicate_object_item_other_information_keys(ties)
-        warnings += _check_duplicate_object_group_other_information_keys(ties)
-        warnings += _check_duplicate_object_ids_and_group_ids(ties)
-        warnings += _check_duplicate_assertion_ids(ties)
-        warnings += _check_object_relationship_linkage_member_ids(ties)
-        warnings += _check_object_relationship_linkage_assertion_ids(ties)
-        warnings += _check_duplicate_object_relationship_other_information_keys(ties)
-        warnings += _check_duplicate_top_level_other_information_keys(ties)
+    def all_warnings(self, ties, timeout=None, cancellation=None, index=None):
+        # index is a TiesIndex already built for this export, with a timeout in seconds or a CancellationToken the
+        # warnings found in the elements visited before either runs out are returned with incomplete set
+        checkpoint = make_checkpoint(timeout, cancellation)
+        other_information_warnings = _empty_other_information_warnings()
+        incomplete = False
+        try:
+            if index is None:
+                index = TiesIndex()
+                _add_export(index, ties, other_information_warnings, checkpoint)
+            else:
+                _add_other_information_warnings(ties, other_information_warnings, checkpoint)
+        except _Interrupted:
+            incomplete = True
+        warnings = semantic_warnings(index, other_information_warnings)
+        warnings.incomplete = incomplete
         return warnings
 
+    def all_warnings_stream(self, instance_file, memory_budget=DEFAULT_MEMORY_BUDGET, directory=None):
+        # reads the export one element at a time and keeps the id, hash and assertion indexes in a temporary database
+        # in directory, for exports too large to validate in memory
+        other_information_warnings = _empty_other_information_warnings()
+        with DiskTiesIndex(memory_budget=memory_budget, directory=directory) as index:
+            for event in iter_events(instance_file, _ELEMENT_KEYS):
+                if event[0] == 'element':
+                    _, key, position, element = event
+                    index.add_element(key, position, element)
+                    _add_element_other_information_warnings(key, position, element, other_information_warnings)
+                elif event[0] == 'member' and event[1] == 'otherInformation':
+                    other_information_warnings[None] = other_information_key_warnings(event[2], '/otherInformation')
+            return semantic_warnings(index, other_information_warnings)
+
+    def all_warnings_parallel(self, ties, workers=None, executor=None):
+        if executor is None:
+            # the export is handed to each worker process once, where it is inherited instead of pickled when the
+            # processes are forked, so that the tasks only say which range of which array to index
+            with ProcessPoolExecutor(max_workers=workers, initializer=_share_export, initargs=(ties,)) as executor:
+                return self._all_warnings_parallel(ties, workers, executor, True)
+        # the processes of an executor passed in do not have the export, so each task is sent its slice of it
+        return self._all_warnings_parallel(ties, workers, executor, False)
+
+    def _all_warnings_parallel(self, ties, workers, executor, shared):
+        # each worker process walks a contiguous range of one of the large top-level arrays and returns a fingerprint of
+        # each id and hash in it with the position of its element, only the elements with an id or hash that could be
+        # in a warning are then indexed here, so that the warnings are the ones all_warnings reports
+        arrays = [(key, ties.get(key, [])) for key in _ELEMENT_KEYS]
+        # a few ranges per worker so that a slow range does not hold up the others
+        range_count = (workers or os.cpu_count() or 1) * 4
+        range_size = max(1, int(math.ceil(sum(len(elements) for _, elements in arrays) / float(range_count))))
+        futures = []
+        for key, elements in arrays:
+            for start in range(0, len(elements), range_size):
+                stop = min(start + range_size, len(elements))
+                futures.append((key, executor.submit(_range_fingerprints, key, start, stop, None if shared else elements[start:stop])))
+
+        fingerprints = dict((name, []) for name in _FINGERPRINTED_TABLES)
+        other_information_warnings = _empty_other_information_warnings()
+        other_information_warnings[None].extend(other_information_key_warnings(ties.get('otherInformation', []), '/otherInformation'))
+        for key, future in futures:
+            range_fingerprints, range_warnings = future.result()
+            for name, (first_positions, repeated_positions) in range_fingerprints.items():
+                fingerprints[name].append((key, first_positions, repeated_positions))
+            other_information_warnings[key].extend(range_warnings)
+
+        candidates = _candidate_fingerprints(fingerprints)
+        index = _CandidateIndex(candidates)
+        index.set_object_relationships(ties.get('objectRelationships', []))
+        elements = set()
+        for name, ranges in fingerprints.items():
+            for key, first_positions, repeated_positions in ranges:
+                for fingerprint in first_positions.keys() & candidates[name]:
+                    elements.update((key, position) for position in repeated_positions.get(fingerprint, (first_positions[fingerprint],)))
+        # in array order, so that the ids and hashes are in the order all_warnings finds them in
+        for key, position in sorted(elements, key=lambda element: (_ELEMENT_KEYS.index(element[0]), element[1])):
+            index.add_element(key, position, ties[key][position])
+        return semantic_warnings(index, other_information_warnings)
+
+
+_ELEMENT_KEYS = ('objectItems', 'objectGroups', 'objectRelationships')
+
+
+def _empty_other_information_warnings():
+    return dict((key, []) for key in _ELEMENT_KEYS + (None,))
+
+
+def _add_export(index, ties, other_information_warnings, checkpoint=None):
+    # indexes the export and finds the otherInformation warnings of its elements in the same pass
+    index.add_export(ties, checkpoint, partial(_add_element_other_information_warnings, other_information_warnings=other_information_warnings))
+    other_information_warnings[None].extend(other_information_key_warnings(ties.get('otherInformation', []), '/otherInformation'))
+
+
+def _add_other_information_warnings(ties, other_information_warnings, checkpoint=None):
+    for key in _ELEMENT_KEYS:
+        for position, element in enumerate(checked(ties.get(key, []), checkpoint)):
+            _add_element_other_information_warnings(key, position, element, other_information_warnings)
+    other_information_warnings[None].extend(other_information_key_warnings(ties.get('otherInformation', []), '/otherInformation'))
+
+
+# the export of the worker processes of all_warnings_parallel
+_worker_export = {}
+
+
+def _share_export(ties):
+    _worker_export['ties'] = ties
+
+
+def _range_fingerprints(key, start, stop, elements=None):
+    # elements is None in the worker processes that were given the export when they started
+    if elements is None:
+        elements = _worker_export['ties'][key][start:stop]
+    index = _FingerprintIndex()
+    other_information_warnings = _empty_other_information_warnings()
+    for position, element in enumerate(elements, start):
+        index.add_element(key, position, element)
+        _add_element_other_information_warnings(key, position, element, other_information_warnings)
+    return index.fingerprints(), other_information_warnings[key]
+
+
+# the tables that the semantic checks read, the md5Hash table is only used for lookups
+_FINGERPRINTED_TABLES = tuple(name for name in _TABLES if name != 'md5_hashes')
+
+
+def _fingerprint(key):
+    # the same for equal ids and hashes in every process, unlike hash which is seeded differently in processes that are
+    # not forked, the keys that are not strings all have the fingerprint 0, which is always a candidate so that they are
+    # compared as they are, and are hashed so that an unhashable key fails here as it would in a TiesIndex
+    if isinstance(key, str):
+        return int.from_bytes(blake2b(key.encode('utf-8', 'surrogatepass'), digest_size=16).digest(), 'little')
+    hash(key)
+    return 0
+
+
+def _candidate_fingerprints(fingerprints):
+    # the fingerprints of the ids and hashes that could be in a warning, the ones that occur more than once, the
+    # objectIds and groupIds that could be both and the linkage ids that no id or assertionId has the fingerprint of,
+    # found with set operations on the fingerprints of each range
+    seen = {}
+    candidates = {}
+    for name, ranges in fingerprints.items():
+        seen[name] = set()
+        candidates[name] = set()
+        for _, first_positions, repeated_positions in ranges:
+            candidates[name].update(repeated_positions)
+            candidates[name].update(seen[name].intersection(first_positions))
+            seen[name].update(first_positions)
+    shared = seen['object_ids'] & seen['group_ids']
+    candidates['object_ids'].update(shared)
+    candidates['group_ids'].update(shared)
+    candidates['linkage_member_ids'] = seen['linkage_member_ids'] - seen['object_ids'] - seen['group_ids']
+    candidates['linkage_assertion_ids'] = seen['linkage_assertion_ids'] - seen['assertion_ids']
+    for name in candidates:
+        if 0 in seen[name]:
+            candidates[name].add(0)
+    candidates['md5_hashes'] = set()
+    return candidates
 
-def _all_object_ids(ties):
-    object_ids = [object_item.get('objectId') for object_item in ties.get('objectItems', [])]
-    return set([object_id for object_id in object_ids if object_id is not None])
 
+# a TiesIndex over a range of one of the large top-level arrays that only keeps a fingerprint of each id and hash with
+# the position of its element
+class _FingerprintIndex(TiesIndex):
 
-def _all_group_ids(ties):
-    group_ids = [object_group.get('groupId') for object_group in ties.get('objectGroups', [])]
-    return set([group_id for group_id in group_ids if group_id is not None])
+    def __init__(self):
+        TiesIndex.__init__(self)
+        self._maps = dict((name, _FingerprintMap()) for name in _FINGERPRINTED_TABLES)
+        for name, fingerprint_map in self._maps.items():
+            setattr(self, '_' + name, fingerprint_map)
+        self._md5_hashes = _CandidateMap(set())
 
+    def add_element(self, key, position, element):
+        for fingerprint_map in self._maps.values():
+            fingerprint_map.position = position
+        TiesIndex.add_element(self, key, position, element)
 
-def _all_assertion_ids(ties):
-    assertion_ids = []
-    object_items = ties.get('objectItems', [])
-    for object_item in object_items:
-        assertions = object_item.get('objectAssertions', {})
-        for annotation in assertions.get('annotations', []):
-            assertion_ids.append(annotation.get('assertionId'))
-        for supplemental_description in assertions.get('supplementalDescriptions', []):
-            assertion_ids.append(supplemental_description.get('assertionId'))
-    object_groups = ties.get('objectGroups', [])
-    for object_group in object_groups:
-        assertions = object_group.get('groupAssertions', {})
-        for annotation in assertions.get('annotations', []):
-            assertion_ids.append(annotation.get('assertionId'))
-        for supplemental_description in assertions.get('supplementalDescriptions', []):
-            assertion_ids.append(supplemental_description.get('assertionId'))
-    return set([assertion_id for assertion_id in assertion_ids if assertion_id is not None])
+    def fingerprints(self):
+        return dict((name, fingerprint_map.positions()) for name, fingerprint_map in self._maps.items())
 
 
-def _check_duplicate_object_item_sha256_hashes(ties):
-    object_item_index = OrderedDict()
-    object_items = ties.get('objectItems', [])
-    for object_item, i in zip(object_items, range(len(object_items))):
-        sha256_hash = object_item.get('sha256Hash')
-        object_item_index[sha256_hash] = object_item_index.get(sha256_hash, []) + [i]
+# the positions of the elements keyed by the fingerprints of their ids or hashes
+class _FingerprintMap(_MultiMap):
+
+    def __init__(self):
+        _MultiMap.__init__(self)
+        self.position = None
+
+    def add(self, key, _value):
+        _MultiMap.add(self, _fingerprint(key), self.position)
+
+    def positions(self):
+        # the first position of each fingerprint and all the positions of the ones that occur more than once
+        return self._first, self._repeated
+
+
+# a TiesIndex that only keeps the ids and hashes with a candidate fingerprint
+class _CandidateIndex(TiesIndex):
+
+    def __init__(self, candidates):
+        TiesIndex.__init__(self)
+        for name in _TABLES:
+            setattr(self, '_' + name, _CandidateMap(candidates[name]))
+
+
+class _CandidateMap(_MultiMap):
+
+    def __init__(self, candidates):
+        _MultiMap.__init__(self)
+        self._candidates = candidates
+
+    def add(self, key, value):
+        if self._candidates and _fingerprint(key) in self._candidates:
+            _MultiMap.add(self, key, value)
+
+
+def _add_element_other_information_warnings(key, position, element, other_information_warnings):
+    other_information_warnings[key].extend(other_information_key_warnings(element.get('otherInformation', []), "/{}[{}]/otherInformation".format(key, position)))
+
 
+def _sha256_hash_warnings(index, _other_information_warnings):
     warnings = []
-    for sha256_hash in object_item_index:
-        duplicate_indexes = object_item_index[sha256_hash]
-        if len(duplicate_indexes) > 1:
-            message = "objectItems at indexes {} have duplicate sha256Hash value ('{}')".format(duplicate_indexes, sha256_hash)
-            location = '/objectItems'
-            warnings.append(ValidationWarning(message, location))
+    for sha256_hash, duplicate_indexes in index.duplicate_sha256_hashes():
+        message = "objectItems at indexes {} have duplicate sha256Hash value ('{}')".format(duplicate_indexes, sha256_hash)
+        warnings.append(ValidationWarning(message, '/objectItems'))
     return warnings
 
 
-def _check_duplicate_object_item_other_information_keys(ties):
+def _object_id_and_group_id_warnings(index, _other_information_warnings):
     warnings = []
-    object_items = ties.get('objectItems', [])
-    for object_item, object_item_index in zip(object_items, range(len(object_items))):
-        other_information = object_item.get('otherInformation', [])
-        location = "/objectItems[{}]/otherInformation".format(object_item_index)
-        warnings.extend(_check_duplicate_other_information_keys(other_information, location))
+    for object_id, duplicate_indexes in index.duplicate_object_ids():
+        message = "objectItems at indexes {} have duplicate objectId value ('{}')".format(duplicate_indexes, object_id)
+        warnings.append(ValidationWarning(message, '/objectItems'))
+    for group_id, duplicate_indexes in index.duplicate_group_ids():
+        message = "objectGroups at indexes {} have duplicate groupId value ('{}')".format(duplicate_indexes, group_id)
+        warnings.append(ValidationWarning(message, '/objectGroups'))
+    for object_id, object_item_indexes, object_group_indexes in index.shared_object_and_group_ids():
+        if len(object_item_indexes) == 1:
+            message = "objectItem at index {} ".format(object_item_indexes[0])
+        else:
+            message = "objectItems at indexes {} ".format(object_item_indexes)
+        if len(object_group_indexes) == 1:
+            message += "and objectGroup at index {} ".format(object_group_indexes[0])
+        else:
+            message += "and objectGroups at indexes {} ".format(object_group_indexes)
+        message += "have duplicate objectId/groupId value ('{}')".format(object_id)
+        warnings.append(ValidationWarning(message, '/'))
     return warnings
 
 
-def _check_duplicate_object_group_other_information_keys(ties):
+def _assertion_id_warnings(index, _other_information_warnings):
     warnings = []
-    object_groups = ties.get('objectGroups', [])
-    for object_group, object_group_index in zip(object_groups, range(len(object_groups))):
-        other_information = object_group.get('otherInformation', [])
-        location = "/objectGroups[{}]/otherInformation".format(object_group_index)
-        warnings.extend(_check_duplicate_other_information_keys(other_information, location))
+    for assertion_id, locations in index.duplicate_assertion_ids():
+        message = "assertion has duplicate assertionId value ('{}')".format(assertion_id)
+        warnings.extend(ValidationWarning(message, location) for location in locations)
     return warnings
 
 
-def _check_duplicate_object_ids_and_group_ids(ties):
-    object_id_index = OrderedDict()
-    object_items = ties.get('objectItems', [])
-    for object_item, object_item_index in zip(object_items, range(len(object_items))):
-        object_id = object_item.get('objectId')
-        if object_id is not None:
-            object_id_index[object_id] = object_id_index.get(object_id, []) + [object_item_index]
-    group_id_index = OrderedDict()
-    object_groups = ties.get('objectGroups', [])
-    for object_group, object_group_index in zip(object_groups, range(len(object_groups))):
-        group_id = object_group.get('groupId')
-        if group_id is not None:
-            group_id_index[group_id] = group_id_index.get(group_id, []) + [object_group_index]
+def _linkage_member_id_warnings(index, _other_information_warnings):
+    warnings = []
+    for object_relationship_index, linkage_member_id_index, linkage_member_id in index.unresolved_linkage_member_ids():
+        message = "objectRelationship has a linkageMemberId ('{}') that does not reference an objectItem or objectGroup in this export".format(linkage_member_id)
+        location = "/objectRelationships[{}]/linkageMemberIds[{}]".format(object_relationship_index, linkage_member_id_index)
+        warnings.append(ValidationWarning(message, location))
+    return warnings
+
 
+def _linkage_assertion_id_warnings(index, _other_information_warnings):
     warnings = []
-    for object_id in object_id_index:
-        duplicate_indexes = object_id_index[object_id]
-        if len(duplicate_indexes) > 1:
-            message = "objectItems at indexes {} have duplicate objectId value ('{}')".format(duplicate_indexes, object_id)
-            location = '/objectItems'
-            warnings.append(ValidationWarning(message, location))
-    for group_id in group_id_index:
-        duplicate_indexes = group_id_index[group_id]
-        if len(duplicate_indexes) > 1:
-            message = "objectGroups at indexes {} have duplicate groupId value ('{}')".format(duplicate_indexes, group_id)
-            location = '/objectGroups'
-            warnings.append(ValidationWarning(message, location))
-    for object_id in object_id_index:
-        if object_id in group_id_index:
-            object_item_indexes = object_id_index[object_id]
-            object_group_indexes = group_id_index[object_id]
-            if len(object_item_indexes) == 1:
-                message = "objectItem at index {} ".format(object_item_indexes[0])
-            else:
-                message = "objectItems at indexes {} ".format(object_item_indexes)
-            if len(object_group_indexes) == 1:
-                message += "and objectGroup at index {} ".format(object_group_indexes[0])
-            else:
-                message += "and objectGroups at indexes {} ".format(object_group_indexes)
-            message += "have duplicate objectId/groupId value ('{}')".format(object_id)
-            location = '/'
-            warnings.append(ValidationWarning(message, location))
+    for object_relationship_index, linkage_assertion_id in index.unresolved_linkage_assertion_ids():
+        message = "objectRelationship has a linkageAssertionId ('{}') that does not reference an assertion in this export".format(linkage_assertion_id)
+        location = "/objectRelationships[{}]/linkageAssertionId".format(object_relationship_index)
+        warnings.append(ValidationWarning(message, location))
     return warnings
 
 
-def _check_duplicate_assertion_ids(ties):
-    assertion_id_location_index = OrderedDict()
-    object_items = ties.get('objectItems', [])
-    for object_item, object_item_index in zip(object_items, range(len(object_items))):
-        assertions = object_item.get('objectAssertions', {})
-        annotations = assertions.get('annotations', [])
-        for annotation, annotation_index in zip(annotations, range(len(annotations))):
-            assertion_id = annotation.get('assertionId')
-            if assertion_id is not None and assertion_id:
-                location = "/objectItems[{}]/objectAssertions/annotations[{}]/assertionId".format(object_item_index, annotation_index)
-                assertion_id_location_index[assertion_id] = assertion_id_location_index.get(assertion_id, []) + [location]
-        supplemental_descriptions = assertions.get('supplementalDescriptions', [])
-        for supplemental_description, supplemental_description_index in zip(supplemental_descriptions, range(len(supplemental_descriptions))):
-            assertion_id = supplemental_description.get('assertionId')
-            if assertion_id is not None and assertion_id:
-                location = "/objectItems[{}]/objectAssertions/supplementalDescriptions[{}]/assertionId".format(object_item_index, supplemental_description_index)
-                assertion_id_location_index[assertion_id] = assertion_id_location_index.get(assertion_id, []) + [location]
-    object_groups = ties.get('objectGroups', [])
-    for object_group, object_group_index in zip(object_groups, range(len(object_groups))):
-        assertions = object_group.get('groupAssertions', {})
-        annotations = assertions.get('annotations', [])
-        for annotation, annotation_index in zip(annotations, range(len(annotations))):
-            assertion_id = annotation.get('assertionId')
-            if assertion_id is not None and assertion_id:
-                location = "/objectGroups[{}]/groupAssertions/annotations[{}]/assertionId".format(object_group_index, annotation_index)
-                assertion_id_location_index[assertion_id] = assertion_id_location_index.get(assertion_id, []) + [location]
-        supplemental_descriptions = assertions.get('supplementalDescriptions', [])
-        for supplemental_description, supplemental_description_index in zip(supplemental_descriptions, range(len(supplemental_descriptions))):
-            assertion_id = supplemental_description.get('assertionId')
-            if assertion_id is not None and assertion_id:
-                location = "/objectGroups[{}]/groupAssertions/supplementalDescriptions[{}]/assertionId".format(object_group_index, supplemental_description_index)
-                assertion_id_location_index[assertion_id] = assertion_id_location_index.get(assertion_id, []) + [location]
+def _object_item_other_information_warnings(_index, other_information_warnings):
+    return other_information_warnings['objectItems']
 
-    warnings = []
-    for assertion_id in assertion_id_location_index:
-        locations = assertion_id_location_index[assertion_id]
-        if len(locations) > 1:
-            for location in locations:
-                message = "assertion has duplicate assertionId value ('{}')".format(assertion_id)
-                warnings.append(ValidationWarning(message, location))
+
+def _object_group_other_information_warnings(_index, other_information_warnings):
+    return other_information_warnings['objectGroups']
+
+
+def _object_relationship_other_information_warnings(_index, other_information_warnings):
+    return other_information_warnings['objectRelationships']
+
+
+def _top_level_other_information_warnings(_index, other_information_warnings):
+    return other_information_warnings[None]
+
+
+# in the order TiesSemanticValidator.all_warnings reports their warnings, each check is a function of the TiesIndex of
+# the export and its otherInformation warnings
+_CHECKS = (
+    _sha256_hash_warnings,
+    _object_item_other_information_warnings,
+    _object_group_other_information_warnings,
+    _object_id_and_group_id_warnings,
+    _assertion_id_warnings,
+    _linkage_member_id_warnings,
+    _linkage_assertion_id_warnings,
+    _object_relationship_other_information_warnings,
+    _top_level_other_information_warnings,
+)
+
+
+def semantic_warnings(index, other_information_warnings):
+    # the warnings for an export from its TiesIndex and the otherInformation warnings of its objectItems,
+    # objectGroups and objectRelationships and of the export itself, keyed by the array key or None
+    warnings = ValidationWarningList()
+    for check in _CHECKS:
+        warnings += check(index, other_information_warnings)
     return warnings
 
 
+def _check_warnings(ties, check):
+    index = TiesIndex()
+    other_information_warnings = _empty_other_information_warnings()
+    _add_export(index, ties, other_information_warnings)
+    return check(index, other_information_warnings)
+
+
+def _check_duplicate_object_item_sha256_hashes(ties):
+    return _check_warnings(ties, _sha256_hash_warnings)
+
+
+def _check_duplicate_object_item_other_information_keys(ties):
+    return _check_warnings(ties, _object_item_other_information_warnings)
+
+
+def _check_duplicate_object_group_other_information_keys(ties):
+    return _check_warnings(ties, _object_group_other_information_warnings)
+
+
+def _check_duplicate_object_ids_and_group_ids(ties):
+    return _check_warnings(ties, _object_id_and_group_id_warnings)
+
+
+def _check_duplicate_assertion_ids(ties):
+    return _check_warnings(ties, _assertion_id_warnings)
+
+
 def _check_object_relationship_linkage_member_ids(ties):
-    object_ids = _all_object_ids(ties)
-    group_ids = _all_group_ids(ties)
-    warnings = []
-    object_relationships = ties.get('objectRelationships', [])
-    for object_relationship, object_relationship_index in zip(object_relationships, range(len(object_relationships))):
-        linkage_member_ids = object_relationship.get('linkageMemberIds', [])
-        for linkage_member_id, linkage_member_id_index in zip(linkage_member_ids, range(len(linkage_member_ids))):
-            if linkage_member_id is not None and linkage_member_id not in object_ids and linkage_member_id not in group_ids:
-                message = "objectRelationship has a linkageMemberId ('{}') that does not reference an objectItem or objectGroup in this export".format(linkage_member_id)
-                location = "/objectRelationships[{}]/linkageMemberIds[{}]".format(object_relationship_index, linkage_member_id_index)
-                warnings.append(ValidationWarning(message, location))
-    return warnings
+    return _check_warnings(ties, _linkage_member_id_warnings)
 
 
 def _check_object_relationship_linkage_assertion_ids(ties):
-    assertion_ids = _all_assertion_ids(ties)
-    warnings = []
-    object_relationships = ties.get('objectRelationships', [])
-    for object_relationship, object_relationship_index in zip(object_relationships, range(len(object_relationships))):
-        linkage_assertion_id = object_relationship.get('linkageAssertionId')
-        if linkage_assertion_id is not None and linkage_assertion_id not in assertion_ids:
-            message = "objectRelationship has a linkageAssertionId ('{}') that does not reference an assertion in this export".format(linkage_assertion_id)
-            location = "/objectRelationships[{}]/linkageAssertionId".format(object_relationship_index)
-            warnings.append(ValidationWarning(message, location))
-    return warnings
+    return _check_warnings(ties, _linkage_assertion_id_warnings)
 
 
 def _check_duplicate_object_relationship_other_information_keys(ties):
-    warnings = []
-    object_relationships = ties.get('objectRelationships', [])
-    for object_relationship, object_relationship_index in zip(object_relationships, range(len(object_relationships))):
-        other_information = object_relationship.get('otherInformation', [])
-        location = "/objectRelationships[{}]/otherInformation".format(object_relationship_index)
-        warnings.extend(_check_duplicate_other_information_keys(other_information, location))
-    return warnings
+    return _check_warnings(ties, _object_relationship_other_information_warnings)
 
 
 def _check_duplicate_top_level_other_information_keys(ties):
-    other_information = ties.get('otherInformation', [])
-    return _check_duplicate_other_information_keys(other_information, '/otherInformation')
+    return _check_warnings(ties, _top_level_other_information_warnings)
 
 
-def _check_duplicate_other_information_keys(other_information, location):
-    key_index = OrderedDict()
+def other_information_key_warnings(other_information, location):
+    key_index = _MultiMap()
     for key_value, i in zip(other_information, range(len(other_information))):
         key = key_value.get('key')
         if key is not None:
-            key_index[key] = key_index.get(key, []) + [i]
+            key_index.add(key, i)
 
     warnings = []
-    for key in key_index:
-        duplicate_indexes = key_index[key]
-        if len(duplicate_indexes) > 1:
-            message = "otherInformation array contains duplicate key ('{}') at indexes {}".format(key, duplicate_indexes)
-            warnings.append(ValidationWarning(message, location))
+    for key, duplicate_indexes in key_index.duplicates():
+        message = "otherInformation array contains duplicate key ('{}') at indexes {}".format(key, duplicate_indexes)
+        warnings.append(ValidationWarning(message, location))
     return warnings
 
 
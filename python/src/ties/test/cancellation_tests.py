@@ -0,0 +1,107 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+
+from __future__ import unicode_literals
+
+import io
+import json
+import time
+import unittest
+from unittest import TestCase
+
+from ties.cancellation import CancellationToken
+from ties.exceptions import ValidationWarning
+from ties.schema_validation import TiesSchemaValidator
+from ties.semantic_validation import TiesSemanticValidator
+from ties.util.testing import example_export
+
+
+class _CountdownToken(CancellationToken):
+
+    def __init__(self, count):
+        super(_CountdownToken, self).__init__()
+        self.count = count
+
+    @property
+    def cancelled(self):
+        self.count -= 1
+        return self.count < 0
+
+
+def _invalid_export():
+    export = example_export(10)
+    for object_item in export['objectItems']:
+        del object_item['sha256Hash']
+    export['objectItems'].append(export['objectItems'][0])
+    export['otherInformation'] = [{'key': 'a', 'value': 1}, {'key': 'a', 'value': 2}]
+    return export
+
+
+class CancellationTests(TestCase):
+
+    def test_cancellation_token(self):
+        token = CancellationToken()
+        self.assertFalse(token.cancelled)
+        token.cancel()
+        self.assertTrue(token.cancelled)
+        self.assertFalse(CancellationToken(deadline=time.monotonic() + 100).cancelled)
+        self.assertTrue(CancellationToken(deadline=time.monotonic()).cancelled)
+
+    def test_all_errors_complete(self):
+        export = _invalid_export()
+        for engine in ('jsonschema', 'compiled'):
+            validator = TiesSchemaValidator(engine=engine)
+            validation_errors = validator.all_errors(export)
+            self.assertFalse(validation_errors.incomplete)
+            self.assertEqual(validator.all_errors(export, timeout=100), validation_errors)
+            self.assertFalse(validator.all_errors(export, timeout=100).incomplete)
+            self.assertEqual(validator.all_errors(export, cancellation=CancellationToken()), validation_errors)
+            self.assertEqual(validator.all_errors_stream(io.StringIO(json.dumps(export)), timeout=100), validation_errors)
+
+    def test_all_errors_incomplete(self):
+        export = _invalid_export()
+        validator = TiesSchemaValidator()
+        validation_errors = validator.all_errors(export)
+        self.assertEqual(len(validation_errors), 12)
+        for partial_errors in [validator.all_errors(export, timeout=0), validator.all_errors_stream(io.StringIO(json.dumps(export)), timeout=0)]:
+            self.assertTrue(partial_errors.incomplete)
+            self.assertEqual(partial_errors, [])
+        partial_errors = validator.all_errors(export, cancellation=_CountdownToken(4))
+        self.assertTrue(partial_errors.incomplete)
+        self.assertEqual(partial_errors, [e for e in validation_errors if e.location in ('/objectItems[0]', '/objectItems[1]', '/objectItems[2]')])
+
+    def test_all_warnings_complete(self):
+        export = _invalid_export()
+        warnings = TiesSemanticValidator().all_warnings(export)
+        self.assertFalse(warnings.incomplete)
+        self.assertEqual(TiesSemanticValidator().all_warnings(export, timeout=100), warnings)
+        self.assertFalse(TiesSemanticValidator().all_warnings(export, timeout=100).incomplete)
+
+    def test_all_warnings_incomplete(self):
+        export = _invalid_export()
+        warnings = TiesSemanticValidator().all_warnings(export)
+        self.assertEqual(len(warnings), 9)
+        partial_warnings = TiesSemanticValidator().all_warnings(export, timeout=0)
+        self.assertTrue(partial_warnings.incomplete)
+        self.assertEqual(partial_warnings, [])
+        partial_warnings = TiesSemanticValidator().all_warnings(export, cancellation=_CountdownToken(3))
+        self.assertTrue(partial_warnings.incomplete)
+        self.assertEqual(partial_warnings, [ValidationWarning("objectItems at indexes [0, 1] have duplicate sha256Hash value ('None')", '/objectItems')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+
+from __future__ import unicode_literals
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import TestCase
+
+from ties.disk_index import DiskTiesIndex, _assertion_position, _assertion_rank, _linkage_member_position, _linkage_member_rank
+from ties.index import TiesIndex
+from ties.semantic_validation import TiesSemanticValidator
+from ties.util.testing import example_export
+
+
+def _export():
+    ties = example_export(5)
+    ties['objectItems'].append(dict(ties['objectItems'][1], objectId='object-5'))
+    ties['objectItems'].append(dict(ties['objectItems'][2], sha256Hash=None))
+    ties['objectItems'][3]['otherInformation'] = [{'key': 'a', 'value': 1}, {'key': 'a', 'value': 2}]
+    ties['objectGroups'].append({'groupId': 'object-0', 'groupType': 'a', 'groupMemberIds': ['object-2'], 'groupAssertions': {'annotations': [{'assertionId': 'annotation-3'}]}})
+    ties['objectRelationships'].append({'linkageMemberIds': ['object-2', 'object-9', 'object-9'], 'linkageDirectionality': 'DIRECTED', 'linkageAssertionId': 'annotation-9'})
+    ties['otherInformation'].append({'key': 'a', 'value': False})
+    return ties
+
+
+class DiskTiesIndexTests(TestCase):
+
+    def test_lookups(self):
+        ties = _export()
+        index = TiesIndex(ties)
+        with DiskTiesIndex() as disk_index:
+            disk_index.add_export(ties)
+            for object_id in ['object-0', 'object-5', 'group-0', 'missing']:
+                self.assertEqual(disk_index.object_position(object_id), index.object_position(object_id))
+                self.assertEqual(disk_index.group_positions(object_id), index.group_positions(object_id))
+                self.assertEqual(disk_index.relationship_positions(object_id), index.relationship_positions(object_id))
+                self.assertEqual(disk_index.relationships(object_id), index.relationships(object_id))
+            for i in range(6):
+                self.assertEqual(disk_index.sha256_hash_positions("{:064x}".format(i)), index.sha256_hash_positions("{:064x}".format(i)))
+                self.assertEqual(disk_index.md5_hash_positions("{:032x}".format(i)), index.md5_hash_positions("{:032x}".format(i)))
+            self.assertEqual(disk_index.assertion_locations('annotation-3'), index.assertion_locations('annotation-3'))
+            self.assertEqual(list(disk_index.duplicate_sha256_hashes()), index.duplicate_sha256_hashes())
+            self.assertEqual(disk_index.duplicate_assertion_ids(), index.duplicate_assertion_ids())
+            self.assertEqual(disk_index.shared_object_and_group_ids(), index.shared_object_and_group_ids())
+            self.assertEqual(disk_index.unresolved_linkage_member_ids(), index.unresolved_linkage_member_ids())
+            self.assertEqual(disk_index.unresolved_linkage_assertion_ids(), index.unresolved_linkage_assertion_ids())
+
+    def test_equal_keys(self):
+        # keys that a dict takes to be equal are one key, reported as it was first added
+        ties = {
+            'objectItems': [{'objectId': True, 'sha256Hash': 0}, {'objectId': 1, 'sha256Hash': False}, {'objectId': 1.0, 'sha256Hash': -0.0}, {'objectId': 'true', 'sha256Hash': 1.5}],
+            'objectGroups': [{'groupId': 1.0}, {'groupId': 2}],
+            'objectRelationships': [{'linkageMemberIds': [2.0, 3.0, 3], 'linkageAssertionId': False}],
+        }
+        index = TiesIndex(ties)
+        with DiskTiesIndex() as disk_index:
+            disk_index.add_export(ties)
+            self.assertEqual(disk_index.object_positions(1), [0, 1, 2])
+            self.assertEqual(disk_index.object_positions('true'), [3])
+            self.assertEqual(list(disk_index.duplicate_object_ids()), index.duplicate_object_ids())
+            self.assertEqual(list(disk_index.duplicate_sha256_hashes()), index.duplicate_sha256_hashes())
+            self.assertEqual(disk_index.shared_object_and_group_ids(), index.shared_object_and_group_ids())
+            self.assertEqual(disk_index.unresolved_linkage_member_ids(), index.unresolved_linkage_member_ids())
+            self.assertEqual(disk_index.unresolved_linkage_assertion_ids(), index.unresolved_linkage_assertion_ids())
+            self.assertIs(list(disk_index.duplicate_object_ids())[0][0], True)
+
+    def test_index_too_large(self):
+        largest = (('objectGroups', (1 << 32) - 1, 'groupAssertions'), 'supplementalDescriptions', (1 << 28) - 1)
+        self.assertEqual(_assertion_position(_assertion_rank(largest)), largest)
+        self.assertEqual(_linkage_member_position(_linkage_member_rank(((1 << 35) - 1, (1 << 28) - 1))), ((1 << 35) - 1, (1 << 28) - 1))
+        for position in [(('objectItems', 1 << 32, 'objectAssertions'), 'annotations', 0), (('objectItems', 0, 'objectAssertions'), 'annotations', 1 << 28)]:
+            self.assertRaises(ValueError, _assertion_rank, position)
+        for position in [(1 << 35, 0), (0, 1 << 28)]:
+            self.assertRaises(ValueError, _linkage_member_rank, position)
+        with DiskTiesIndex() as disk_index:
+            self.assertRaises(ValueError, disk_index.add_element, 'objectItems', 1 << 32, {'objectAssertions': {'annotations': [{'assertionId': 'a'}]}})
+
+    def test_close(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with DiskTiesIndex(directory=directory) as disk_index:
+                disk_index.add_export(_export())
+                self.assertEqual(len(os.listdir(directory)), 1)
+            self.assertEqual(os.listdir(directory), [])
+        finally:
+            os.rmdir(directory)
+
+    def test_all_warnings_stream(self):
+        ties = _export()
+        warnings = TiesSemanticValidator().all_warnings(ties)
+        self.assertEqual(len(warnings), 22)
+        for memory_budget in [1, 1 << 20]:
+            self.assertEqual(TiesSemanticValidator().all_warnings_stream(io.StringIO(json.dumps(ties)), memory_budget=memory_budget), warnings)
+        reordered = dict(reversed(list(ties.items())))
+        self.assertEqual(TiesSemanticValidator().all_warnings_stream(io.StringIO(json.dumps(reordered))), warnings)
+        self.assertEqual(TiesSemanticValidator().all_warnings_stream(io.StringIO(json.dumps(example_export()))), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,10 +16,13 @@
 
 from __future__ import unicode_literals
 
+import pickle
 import unittest
 from unittest import TestCase
 
-from ties.exceptions import _jsonschema_error_message
+from jsonschema import Draft4Validator
+
+from ties.exceptions import ValidationError, ValidationErrorGroup, ValidationWarning, _jsonschema_error_message, _unique_errors, aggregate_errors, make_validation_error
 
 
 class _TestJsonSchemaValidationError(object):
@@ -99,6 +102,82 @@ class ExceptionsTests(TestCase):
         error_message = _jsonschema_error_message(_TestJsonSchemaValidationError(validator='UNKNOWN', message='an error message', relative_path=[]))
         self.assertEqual(error_message, 'an error message')
 
+    def test_validation_error_pickle(self):
+        error = ValidationError('a message', '/foo', [ValidationError('a cause', '/foo/bar', [])])
+        self.assertEqual(pickle.loads(pickle.dumps(error)), error)
+
+    def test_validation_warning_pickle(self):
+        warning = ValidationWarning('a message', '/foo')
+        self.assertEqual(pickle.loads(pickle.dumps(warning)), warning)
+
+    def test_validation_error_value(self):
+        error = ValidationError('a message', '/foo', [ValidationError('a cause', '/foo/bar', [])])
+        other = ValidationError('a message', '/foo', (ValidationError('a cause', '/foo/bar', None),))
+        self.assertEqual(error, other)
+        self.assertEqual(hash(error), hash(other))
+        self.assertEqual(str(error), 'a message\npossible causes:\n    a cause\n    location: /foo/bar')
+        self.assertEqual(repr(error), "ValidationError('a message', '/foo', (ValidationError('a cause', '/foo/bar', ()),))")
+        other.causes = None
+        self.assertNotEqual(error, other)
+        self.assertEqual(str(other), 'a message\nlocation: /foo')
+        other.location = '/bar'
+        self.assertEqual(hash(other), hash(ValidationError('a message', '/bar', [])))
+        with self.assertRaises(ValidationError) as context:
+            raise error
+        self.assertIs(context.exception, error)
+
+    def test_validation_warning_value(self):
+        warning = ValidationWarning('a message', '/foo')
+        self.assertEqual(warning, ValidationWarning('a message', '/foo'))
+        self.assertEqual(hash(warning), hash(ValidationWarning('a message', '/foo')))
+        self.assertEqual(str(warning), 'a message\nlocation: /foo')
+        warning.message = 'another message'
+        self.assertEqual(warning, ValidationWarning('another message', '/foo'))
+        self.assertEqual(str(warning), 'another message\nlocation: /foo')
+        self.assertNotEqual(warning, ValidationError('another message', '/foo', []))
+
+    def test_make_validation_error(self):
+        schema = {'properties': {'foo': {'type': 'array', 'items': {'anyOf': [{'type': 'string'}, {'type': 'object', 'required': ['bar']}]}}}}
+        jsonschema_error = next(Draft4Validator(schema).iter_errors({'foo': ['a', 1]}))
+        error = make_validation_error(jsonschema_error)
+        self.assertEqual(error.validator, 'anyOf')
+        self.assertEqual(error.path, ('foo', 1))
+        self.assertEqual(error.validator_value, [{'type': 'string'}, {'type': 'object', 'required': ['bar']}])
+        self.assertEqual(error.location, '/foo[1]')
+        self.assertEqual([list(e.relative_path) for e in jsonschema_error.context], [[], []])
+        self.assertEqual(error, ValidationError('content for array property at index 1 in foo does not match any of the possible schema definitions', '/foo[1]', [
+            ValidationError('property type integer for property 1 is not the allowed type: string', '/foo[1]', []),
+            ValidationError('property type integer for property 1 is not the allowed type: object', '/foo[1]', []),
+        ]))
+        self.assertEqual(hash(error), hash(pickle.loads(pickle.dumps(error))))
+        self.assertEqual([e.validator for e in tuple(error.causes)], ['type', 'type'])
+        self.assertIsNone(ValidationError('a message', '/', []).validator)
+
+    def test_aggregate_errors(self):
+        schema = {'properties': {'foo': {'type': 'array', 'items': {'type': 'object', 'properties': {'bar': {'type': 'integer', 'minimum': 0}}, 'required': ['bar']}}}}
+        instance = {'foo': [{'bar': -1}, {'bar': -2}, {}, {'bar': -3}, {'bar': 1}, {'bar': -4}]}
+        validation_errors = [make_validation_error(e) for e in Draft4Validator(schema).iter_errors(instance)]
+        validation_errors.append(ValidationError('required property bar is missing', '/foo[7]', []))
+        error_groups = aggregate_errors(validation_errors, max_samples=2)
+        self.assertEqual(error_groups, [
+            ValidationErrorGroup('required property bar is missing', '/foo[*]', 2, [(2, 2), (7, 7)], [validation_errors[2], validation_errors[5]]),
+            ValidationErrorGroup("property value <value> for bar property is less than the minimum value of 0", '/foo[*]/bar', 4, [(0, 1), (3, 3), (5, 5)], validation_errors[:2]),
+        ])
+        self.assertEqual(str(error_groups[1]), 'property value <value> for bar property is less than the minimum value of 0\nlocation: /foo[*]/bar\ncount: 4\nindexes: 0-1, 3, 5\nsamples: /foo[0]/bar, /foo[1]/bar')
+        error_groups = aggregate_errors(validation_errors, max_ranges=2)
+        self.assertEqual(error_groups[1].ranges, ((0, 1), (3, 3)))
+        self.assertTrue(error_groups[1].ranges_truncated)
+        self.assertEqual(error_groups[1].count, 4)
+        self.assertEqual(aggregate_errors([]), [])
+
+    def test_unique_errors(self):
+        a = ValidationError('a', '/b', [])
+        b = ValidationError('b', '/a', [])
+        c = ValidationError('c', '/b', [])
+        errors = [('type', c), ('required', a), ('type', b), ('anyOf', ValidationError('c', '/b', [])), ('required', a)]
+        self.assertEqual(_unique_errors(errors), [b, c, a])
+        self.assertEqual(_unique_errors([]), [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+import unittest
+from unittest import TestCase
+
+from ties.format_checking import date_time_failures, format_checker, is_date_time
+
+valid_date_times = [
+    '2019-01-01T00:00:00Z',
+    '2019-12-31T23:59:59.999999+05:30',
+    '2020-02-29T12:00:00-00:00',
+    '2000-02-29T12:00:00z',
+    '2016-12-31t23:59:60Z',
+]
+
+invalid_date_times = [
+    '',
+    '2019-01-01',
+    '2019-01-01 00:00:00Z',
+    '2019-01-01T00:00:00',
+    '2019-13-01T00:00:00Z',
+    '2019-00-01T00:00:00Z',
+    '2019-04-31T00:00:00Z',
+    '2019-02-29T00:00:00Z',
+    '1900-02-29T00:00:00Z',
+    '2019-01-01T24:00:00Z',
+    '2019-01-01T00:60:00Z',
+    '2019-01-01T00:00:61Z',
+    '2019-01-01T00:00:00.Z',
+    '2019-01-01T00:00:00+24:00',
+    '2019-01-01T00:00:00+0100',
+    '２０１９-01-01T00:00:00Z',
+]
+
+
+class FormatCheckingTests(TestCase):
+
+    def test_is_date_time(self):
+        for value in valid_date_times:
+            self.assertTrue(is_date_time(value), value)
+        for value in invalid_date_times:
+            self.assertFalse(is_date_time(value), value)
+
+    def test_date_time_failures(self):
+        self.assertEqual(date_time_failures([]), [])
+        self.assertEqual(date_time_failures(valid_date_times * 3), [])
+        values = valid_date_times + invalid_date_times
+        self.assertEqual(date_time_failures(values), list(range(len(valid_date_times), len(values))))
+        self.assertEqual(date_time_failures(['2019-01-01T00:00:00Z\n2019-01-01T00:00:00Z', '2019-01-01T00:00:00Z']), [0])
+        self.assertEqual(date_time_failures(['2020-02-29T00:00:00Z', '2019-02-29T00:00:00Z']), [1])
+
+    def test_format_checker(self):
+        self.assertTrue(format_checker.conforms('2019-01-01T00:00:00Z', 'date-time'))
+        self.assertFalse(format_checker.conforms('2019-02-29T00:00:00Z', 'date-time'))
+        self.assertTrue(format_checker.conforms(1, 'date-time'))
+        self.assertTrue(format_checker.conforms('not an email', 'email'))
+
+
+if __name__ == '__main__':
+    unittest.main()
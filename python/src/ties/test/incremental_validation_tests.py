@@ -0,0 +1,165 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+import random
+import unittest
+from copy import deepcopy
+from unittest import TestCase
+
+from ties.exceptions import ValidationError, ValidationWarning
+from ties.incremental_validation import IncrementalValidationSession
+from ties.index import TiesIndex
+from ties.schema_validation import TiesSchemaValidator, engines
+from ties.semantic_validation import TiesSemanticValidator
+from ties.util.testing import example_export, mutation_patch
+
+
+class IncrementalValidationSessionTests(TestCase):
+
+    def test_matches_full_validation(self):
+        for engine in engines:
+            for seed in range(20):
+                rng = random.Random(seed)
+                session = IncrementalValidationSession(example_export(object_item_count=rng.randint(0, 4)), engine=engine)
+                for _ in range(15):
+                    try:
+                        session.apply_patch(mutation_patch(session.ties, rng))
+                    except ValueError:
+                        pass
+                    self.assertEqual(session.all_errors(), TiesSchemaValidator(engine=engine).all_errors(deepcopy(session.ties)))
+                    try:
+                        warnings = TiesSemanticValidator().all_warnings(session.ties)
+                    except (AttributeError, TypeError):
+                        continue
+                    self.assertEqual(session.all_warnings(), warnings)
+
+    def test_index_matches_ties_index(self):
+        checked = 0
+        for seed in range(20):
+            rng = random.Random(seed)
+            session = IncrementalValidationSession(example_export(object_item_count=rng.randint(0, 6)))
+            for _ in range(10):
+                try:
+                    session.apply_patch(mutation_patch(session.ties, rng))
+                    session.all_warnings()
+                    index = TiesIndex(session.ties)
+                except (AttributeError, TypeError, ValueError):
+                    continue
+                incremental_index = session._semantic_state.index  # pylint: disable=protected-access
+                for query in ('duplicate_object_ids', 'duplicate_group_ids', 'shared_object_and_group_ids', 'duplicate_sha256_hashes', 'duplicate_assertion_ids', 'unresolved_linkage_member_ids', 'unresolved_linkage_assertion_ids'):
+                    self.assertEqual(getattr(incremental_index, query)(), getattr(index, query)())
+                for object_item in session.ties.get('objectItems', []):
+                    self.assertEqual(incremental_index.object_positions(object_item.get('objectId')), index.object_positions(object_item.get('objectId')))
+                    self.assertEqual(incremental_index.md5_hash_positions(object_item.get('md5Hash')), index.md5_hash_positions(object_item.get('md5Hash')))
+                    for annotation in object_item.get('objectAssertions', {}).get('annotations', []):
+                        self.assertEqual(incremental_index.assertion_locations(annotation.get('assertionId')), index.assertion_locations(annotation.get('assertionId')))
+                        self.assertEqual(incremental_index.relationships(annotation.get('assertionId')), index.relationships(annotation.get('assertionId')))
+                checked += 1
+        self.assertGreater(checked, 50)
+
+    def test_object_item_edits(self):
+        session = IncrementalValidationSession(example_export())
+        self.assertEqual(session.all_errors(), [])
+        self.assertEqual(session.all_warnings(), [])
+        session.apply_patch([
+            {'op': 'replace', 'path': '/objectItems/2/objectId', 'value': 'object-0'},
+            {'op': 'add', 'path': '/objectItems/1/authorityInformation/foo', 'value': 1},
+        ])
+        self.assertEqual(session.all_errors(), [ValidationError('additional property foo is not allowed', '/objectItems[1]/authorityInformation', [])])
+        self.assertEqual(session.all_warnings(), [ValidationWarning("objectItems at indexes [0, 2] have duplicate objectId value ('object-0')", '/objectItems')])
+        session.apply_patch([{'op': 'remove', 'path': '/objectItems/0'}])
+        self.assertEqual(session.all_errors(), [ValidationError('additional property foo is not allowed', '/objectItems[0]/authorityInformation', [])])
+        self.assertEqual(session.all_warnings(), [ValidationWarning("objectRelationship has a linkageAssertionId ('annotation-0') that does not reference an assertion in this export", '/objectRelationships[0]/linkageAssertionId')])
+        session.apply_patch([{'op': 'copy', 'from': '/objectItems/1', 'path': '/objectItems/-'}])
+        self.assertEqual(session.all_errors(), [
+            ValidationError('array property objectItems has duplicate items at index [1, 2]', '/objectItems', []),
+            ValidationError('additional property foo is not allowed', '/objectItems[0]/authorityInformation', []),
+        ])
+
+    def test_insert_and_remove_keep_index(self):
+        # elements inserted or removed before the end of an array move the others without reindexing them
+        session = IncrementalValidationSession(example_export(object_item_count=5))
+        session.apply_patch([{'op': 'replace', 'path': '/objectItems/4/objectId', 'value': 'object-3'}])
+        self.assertEqual(session.all_warnings(), [ValidationWarning("objectItems at indexes [3, 4] have duplicate objectId value ('object-3')", '/objectItems')])
+        index = session._semantic_state.index  # pylint: disable=protected-access
+        session.apply_patch([{'op': 'copy', 'from': '/objectItems/1', 'path': '/objectItems/0'}])
+        self.assertEqual(session.all_warnings(), TiesSemanticValidator().all_warnings(session.ties))
+        self.assertEqual(session.all_errors(), TiesSchemaValidator().all_errors(deepcopy(session.ties)))
+        session.apply_patch([{'op': 'remove', 'path': '/objectItems/2'}, {'op': 'remove', 'path': '/objectItems/0'}])
+        self.assertEqual(session.all_warnings(), [ValidationWarning("objectItems at indexes [2, 3] have duplicate objectId value ('object-3')", '/objectItems')])
+        self.assertEqual(session.all_errors(), TiesSchemaValidator().all_errors(deepcopy(session.ties)))
+        self.assertIs(session._semantic_state.index, index)  # pylint: disable=protected-access
+
+    def test_patch_operations(self):
+        session = IncrementalValidationSession({'version': '1.0', 'otherInformation': [{'key': 'a', 'value': 1}]})
+        session.apply_patch([
+            {'op': 'add', 'path': '/otherInformation/0', 'value': {'key': 'a/b', 'value': 2}},
+            {'op': 'copy', 'from': '/otherInformation/1', 'path': '/otherInformation/-'},
+            {'op': 'move', 'from': '/otherInformation/0', 'path': '/otherInformation/2'},
+            {'op': 'replace', 'path': '/version', 'value': '2.0'},
+            {'op': 'add', 'path': '/a~1b', 'value': {}},
+            {'op': 'remove', 'path': '/a~1b'},
+            {'op': 'test', 'path': '/otherInformation/0/value', 'value': 1.0},
+        ])
+        self.assertEqual(session.ties, {'version': '2.0', 'otherInformation': [{'key': 'a', 'value': 1}, {'key': 'a', 'value': 1}, {'key': 'a/b', 'value': 2}]})
+        self.assertEqual(session.all_warnings(), [ValidationWarning("otherInformation array contains duplicate key ('a') at indexes [0, 1]", '/otherInformation')])
+        session.apply_patch([{'op': 'replace', 'path': '', 'value': []}])
+        self.assertEqual(session.ties, [])
+
+    def test_failed_patch_is_undone(self):
+        export = example_export()
+        session = IncrementalValidationSession(deepcopy(export))
+        self.assertEqual(session.all_errors(), [])
+        patch = [
+            {'op': 'remove', 'path': '/objectItems/0'},
+            {'op': 'add', 'path': '/objectItems/0/foo', 'value': 1},
+            {'op': 'move', 'from': '/objectGroups', 'path': '/foo'},
+            {'op': 'test', 'path': '/objectItems/0/foo', 'value': 2},
+        ]
+        with self.assertRaises(ValueError):
+            session.apply_patch(patch)
+        self.assertEqual(session.ties, export)
+        self.assertEqual(session.all_errors(), [])
+        self.assertEqual(session.all_warnings(), [])
+
+    def test_invalid_patch(self):
+        session = IncrementalValidationSession({'a': [1, 2], 'b': {}})
+        for operation in [
+            {'op': 'foo', 'path': '/a'},
+            {'op': 'add', 'path': 'a', 'value': 1},
+            {'op': 'add', 'path': '/a/01', 'value': 1},
+            {'op': 'add', 'path': '/a/3', 'value': 1},
+            {'op': 'add', 'path': '/c/d', 'value': 1},
+            {'op': 'add', 'path': '/a/0'},
+            {'op': 'remove', 'path': '/a/-'},
+            {'op': 'remove', 'path': ''},
+            {'op': 'replace', 'path': '/c', 'value': 1},
+            {'op': 'move', 'from': '/b', 'path': '/b/c'},
+            {'op': 'test', 'path': '/a/0', 'value': True},
+        ]:
+            with self.assertRaises(ValueError):
+                session.apply_patch([operation])
+        self.assertEqual(session.ties, {'a': [1, 2], 'b': {}})
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            IncrementalValidationSession(example_export(), engine='foo')
+
+
+if __name__ == '__main__':
+    unittest.main()
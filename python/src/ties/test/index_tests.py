@@ -0,0 +1,108 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+
+from __future__ import unicode_literals
+
+import unittest
+from unittest import TestCase
+
+from ties.data_binding import Ties
+from ties.index import TiesIndex, _MultiMap
+from ties.util.testing import example_export
+
+
+class TiesIndexTests(TestCase):
+
+    def setUp(self):
+        self.ties = example_export(3)
+        self.ties['objectItems'].append(dict(self.ties['objectItems'][1], objectId='object-3'))
+        self.ties['objectGroups'].append({'groupId': 'object-0', 'groupType': 'a', 'groupMemberIds': ['object-2']})
+        self.ties['objectRelationships'].append({'linkageMemberIds': ['object-2', 'object-9'], 'linkageDirectionality': 'DIRECTED', 'linkageAssertionId': 'annotation-9'})
+
+    def test_multi_map(self):
+        multi_map = _MultiMap()
+        for key, value in [('b', 0), ('a', 1), ('b', 2), ('c', 3), ('a', 4), ('b', 5)]:
+            multi_map.add(key, value)
+        self.assertEqual(list(multi_map), ['b', 'a', 'c'])
+        self.assertEqual(multi_map['b'], [0, 2, 5])
+        self.assertEqual(multi_map['c'], [3])
+        self.assertIn('a', multi_map)
+        self.assertNotIn('d', multi_map)
+        self.assertEqual(multi_map.duplicates(), [('b', [0, 2, 5]), ('a', [1, 4])])
+        self.assertEqual(_MultiMap().duplicates(), [])
+
+    def test_object_and_group_ids(self):
+        index = TiesIndex(self.ties)
+        self.assertEqual(index.object_position('object-2'), 2)
+        self.assertEqual(index.object_positions('object-3'), [3])
+        self.assertIsNone(index.object_position('group-0'))
+        self.assertEqual(index.object_positions('missing'), [])
+        self.assertEqual(index.group_position('group-0'), 0)
+        self.assertEqual(index.group_positions('object-0'), [1])
+        self.assertEqual(index.shared_object_and_group_ids(), [('object-0', [0], [1])])
+        self.assertEqual(index.duplicate_object_ids(), [])
+        self.assertEqual(index.duplicate_group_ids(), [])
+
+    def test_hashes(self):
+        index = TiesIndex(self.ties)
+        self.assertEqual(index.sha256_hash_positions("{:064x}".format(1)), [1, 3])
+        self.assertEqual(index.md5_hash_positions("{:032x}".format(2)), [2])
+        self.assertEqual(index.md5_hash_positions('missing'), [])
+        self.assertEqual(index.duplicate_sha256_hashes(), [("{:064x}".format(1), [1, 3])])
+
+    def test_assertion_ids(self):
+        index = TiesIndex(self.ties)
+        self.assertEqual(index.assertion_location('annotation-2'), '/objectItems[2]/objectAssertions/annotations[0]/assertionId')
+        self.assertEqual(index.assertion_location('group-annotation-0'), '/objectGroups[0]/groupAssertions/annotations[0]/assertionId')
+        self.assertIsNone(index.assertion_location('missing'))
+        self.assertEqual(index.assertion_locations('data-file-1'), [
+            '/objectItems[1]/objectAssertions/supplementalDescriptions[1]/assertionId',
+            '/objectItems[3]/objectAssertions/supplementalDescriptions[1]/assertionId',
+        ])
+        self.assertEqual([assertion_id for assertion_id, _ in index.duplicate_assertion_ids()], ['annotation-1', 'data-object-1', 'data-file-1'])
+
+    def test_relationships(self):
+        index = TiesIndex(self.ties)
+        self.assertEqual(index.relationship_positions('object-0'), [0])
+        self.assertEqual(index.relationship_positions('annotation-0'), [0])
+        self.assertEqual(index.relationship_positions('object-2'), [1])
+        self.assertEqual(index.relationships('object-9'), [self.ties['objectRelationships'][1]])
+        self.assertEqual(index.relationship_positions('object-1'), [])
+        self.assertEqual(index.unresolved_linkage_member_ids(), [(1, 1, 'object-9')])
+        self.assertEqual(index.unresolved_linkage_assertion_ids(), [(1, 'annotation-9')])
+
+    def test_data_binding(self):
+        index = TiesIndex(Ties.from_json(self.ties))
+        self.assertEqual(index.object_position('object-2'), 2)
+        self.assertEqual(index.sha256_hash_positions("{:064x}".format(1)), [1, 3])
+        self.assertEqual(index.relationship_positions('object-9'), [1])
+
+    def test_element_hook(self):
+        elements = []
+        TiesIndex().add_export(self.ties, element_hook=lambda key, position, element: elements.append((key, position, element)))
+        expected = [(key, position, element) for key in ('objectItems', 'objectGroups', 'objectRelationships') for position, element in enumerate(self.ties[key])]
+        self.assertEqual(elements, expected)
+
+    def test_empty(self):
+        index = TiesIndex({})
+        self.assertIsNone(index.object_position('object-0'))
+        self.assertEqual(index.relationships('object-0'), [])
+        self.assertEqual(index.unresolved_linkage_member_ids(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
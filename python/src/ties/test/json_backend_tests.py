@@ -0,0 +1,109 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+import json
+import os
+import unittest
+from io import StringIO
+from mmap import ACCESS_READ, mmap
+from tempfile import mkstemp
+from unittest import TestCase
+
+from ties import json_backend
+from ties.util.testing import example_export
+
+test_values = [
+    example_export(),
+    {'a': 1e16, 'b': [1e-05, -2.5e-07, 0.0001, 1e22, 1.5, -0.0, 100.0], 'c': 123456789012345678901234567890},
+    {'é': 'ünïcødé \x7f \U0001f600', 'x": 1e5': 'a 1e5', 'null': 'null'},
+    {'a': None, 'b': [float('nan'), float('inf')], 'c': {}, 'd': []},
+    [1, 'a', True, False, [], {}],
+    {1: 'a'},
+    1e-05,
+]
+
+
+class JsonBackendTests(TestCase):
+
+    def setUp(self):
+        self._backend_name = json_backend.backend_name()
+
+    def tearDown(self):
+        json_backend.set_backend(self._backend_name)
+
+    def test_default_backend(self):
+        self.assertEqual(json_backend.backend_name(), json_backend.available_backends()[0])
+        self.assertIn('json', json_backend.available_backends())
+
+    def test_set_backend_unknown(self):
+        with self.assertRaises(ValueError):
+            json_backend.set_backend('foo')
+
+    def test_dumps_matches_json(self):
+        for name in json_backend.available_backends():
+            json_backend.set_backend(name)
+            for value in test_values:
+                self.assertEqual(json_backend.dumps(value), json.dumps(value, indent=2))
+                self.assertEqual(json_backend.dumps(value, indent=4), json.dumps(value, indent=4))
+
+    def test_dump(self):
+        for name in json_backend.available_backends():
+            json_backend.set_backend(name)
+            f = StringIO()
+            json_backend.dump(example_export(), f)
+            self.assertEqual(f.getvalue(), json.dumps(example_export(), indent=2))
+
+    def test_loads(self):
+        text = json.dumps(example_export())
+        for name in json_backend.available_backends():
+            json_backend.set_backend(name)
+            self.assertEqual(json_backend.loads(text), example_export())
+            self.assertEqual(json_backend.loads(text.encode('utf-8')), example_export())
+            self.assertEqual(json_backend.loads(bytearray(text.encode('utf-8'))), example_export())
+            self.assertEqual(json_backend.loads(memoryview(text.encode('utf-8'))), example_export())
+            self.assertEqual(json_backend.load(StringIO(text)), example_export())
+
+    def test_loads_mmap(self):
+        fd, path = mkstemp()
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write('{"a": ["é"]}')
+            for name in json_backend.available_backends():
+                json_backend.set_backend(name)
+                with open(path, 'rb') as f:
+                    with mmap(f.fileno(), 0, access=ACCESS_READ) as data:
+                        self.assertEqual(json_backend.loads(data), {'a': ['é']})
+        finally:
+            os.remove(path)
+
+    def test_loads_stdlib_extensions(self):
+        for name in json_backend.available_backends():
+            json_backend.set_backend(name)
+            self.assertEqual(json_backend.loads('[123456789012345678901234567890, "\\ud800"]'), [123456789012345678901234567890, '\ud800'])
+            self.assertTrue(json_backend.loads('[NaN]')[0] != json_backend.loads('[NaN]')[0])
+
+    def test_loads_invalid(self):
+        for name in json_backend.available_backends():
+            json_backend.set_backend(name)
+            with self.assertRaises(ValueError) as context:
+                json_backend.loads('{"a": ')
+            self.assertEqual(str(context.exception), 'Expecting value: line 1 column 7 (char 6)')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+import io
+import json
+import unittest
+from unittest import TestCase
+
+from ties.util.json_stream import JsonStreamReader, iter_events
+
+
+class _ShortReads(io.StringIO):
+
+    def read(self, _=-1):
+        return super(_ShortReads, self).read(3)
+
+
+class JsonStreamTests(TestCase):
+
+    def test_members(self):
+        events = list(iter_events(io.StringIO('{"a": 1, "b": {"c": [true, null]}, "d": -1.5e3}')))
+        self.assertEqual(events, [('member', 'a', 1), ('member', 'b', {'c': [True, None]}), ('member', 'd', -1.5e3)])
+
+    def test_empty_object(self):
+        self.assertEqual(list(iter_events(io.StringIO(' { } '))), [])
+
+    def test_array_elements(self):
+        events = list(iter_events(io.StringIO('{"a": [{"b": 1}, 2], "c": [3]}'), array_properties=['a']))
+        self.assertEqual(events, [('element', 'a', 0, {'b': 1}), ('element', 'a', 1, 2), ('array', 'a', 2), ('member', 'c', [3])])
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_events(io.StringIO('{"a": []}'), array_properties=['a'])), [('array', 'a', 0)])
+
+    def test_array_property_not_an_array(self):
+        self.assertEqual(list(iter_events(io.StringIO('{"a": {"b": 1}}'), array_properties=['a'])), [('member', 'a', {'b': 1})])
+
+    def test_short_reads(self):
+        instance = {'a': [12345678, 1.25e-10, 'xé\\"y', {'b': [False, None]}], 'c': 10.0, 'd': 'e'}
+        events = list(JsonStreamReader(_ShortReads(json.dumps(instance)), chunk_size=3).iter_events(['a']))
+        self.assertEqual(events, [('element', 'a', 0, 12345678), ('element', 'a', 1, 1.25e-10), ('element', 'a', 2, 'xé\\"y'), ('element', 'a', 3, {'b': [False, None]}), ('array', 'a', 4), ('member', 'c', 10.0), ('member', 'd', 'e')])
+
+    def test_bytes(self):
+        text = json.dumps({'a': ['é中' * 10]}, ensure_ascii=False)
+        events = list(JsonStreamReader(io.BytesIO(text.encode('utf-8')), chunk_size=1).iter_events(['a']))
+        self.assertEqual(events, [('element', 'a', 0, 'é中' * 10), ('array', 'a', 1)])
+
+    def test_not_an_object(self):
+        with self.assertRaises(ValueError):
+            list(iter_events(io.StringIO('[1, 2]')))
+
+    def test_invalid_value(self):
+        with self.assertRaises(ValueError):
+            list(iter_events(io.StringIO('{"a": [1, }'), array_properties=['a']))
+
+    def test_truncated(self):
+        with self.assertRaises(ValueError):
+            list(iter_events(io.StringIO('{"a": 1')))
+
+    def test_extra_data(self):
+        with self.assertRaises(ValueError):
+            list(iter_events(io.StringIO('{"a": 1} {}')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+import unittest
+from unittest import TestCase
+
+from ties.exceptions import ValidationError
+from ties.schema_compilation import SchemaCompiler, compile_validator
+from ties.schema_validation import ObjectItemSchemaValidator, TiesSchemaValidator, load_schema, object_item_pointer, schema_cache
+from ties.util.testing import example_export, mutated_exports
+
+
+class SchemaCompilationTests(TestCase):
+
+    def test_compile_all_definitions(self):
+        compiler = SchemaCompiler(load_schema())
+        compiler.compile_all()
+        for name in load_schema()['definitions']:
+            self.assertIn("_v_{}".format(name.replace('-', '_')), compiler.source)
+
+    def test_compiled_validator_valid(self):
+        self.assertEqual(TiesSchemaValidator(engine='compiled').all_errors(example_export()), [])
+
+    def test_compiled_validator_invalid(self):
+        errors = TiesSchemaValidator(engine='compiled').all_errors({})
+        self.assertEqual(errors, [ValidationError('required properties [authorityInformation, objectItems, version] are missing', '/', [])])
+
+    def test_compiled_validator_validate(self):
+        with self.assertRaises(ValidationError):
+            ObjectItemSchemaValidator(engine='compiled').validate({})
+
+    def test_compiled_validator_cached(self):
+        self.assertIs(ObjectItemSchemaValidator(engine='compiled').validator, schema_cache.validator(object_item_pointer, engine='compiled'))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            TiesSchemaValidator(engine='unknown')
+
+    def test_unsupported_keyword(self):
+        with self.assertRaises(ValueError):
+            compile_validator({'type': 'object', 'patternProperties': {}})
+
+    def test_one_of_valid_under_each(self):
+        validator = compile_validator({'oneOf': [{'type': 'string'}, {'minLength': 1}]})
+        errors = list(validator.iter_errors('a'))
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0].message, "'a' is valid under each of {'minLength': 1}, {'type': 'string'}")
+
+    def test_compiled_errors_match_jsonschema_errors(self):
+        jsonschema_validator = TiesSchemaValidator()
+        compiled_validator = TiesSchemaValidator(engine='compiled')
+        for export in mutated_exports(300):
+            self.assertEqual(compiled_validator.all_errors(export), jsonschema_validator.all_errors(export))
+
+    def test_compiled_errors_match_jsonschema_errors_sub_schema(self):
+        jsonschema_validator = ObjectItemSchemaValidator()
+        compiled_validator = ObjectItemSchemaValidator(engine='compiled')
+        for export in mutated_exports(100, seed=1):
+            for object_item in [o for o in export.get('objectItems', []) if isinstance(o, dict)]:
+                self.assertEqual(compiled_validator.all_errors(object_item), jsonschema_validator.all_errors(object_item))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,13 +16,26 @@
 
 from __future__ import unicode_literals
 
+import io
 import json
 import os
+import pickle
 import unittest
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from mmap import ACCESS_READ, mmap
 from tempfile import mkstemp
+from threading import Thread
 from unittest import TestCase
 
-from ties.schema_validation import SchemaValidator, TiesSchemaValidator, load_schema, object_relationship_pointer
+from jsonschema import Draft4Validator
+from jsonschema.validators import extend
+
+from ties.exceptions import ValidationError, make_validation_error
+from ties.schema_compilation import discriminating_properties, predicted_branch
+from ties.schema_validation import ObjectItemSchemaValidator, SchemaValidator, TiesSchemaValidator, MemoInfo, ValidationMemo, assertions_pointer, bulk_column_paths, engines, load_schema, object_item_pointer, object_relationship_pointer, preload, schema_cache
+from ties.util.canonical import duplicate_indexes
+from ties.util.testing import example_export, mutated_exports
 
 test_input_str = """\
 {
@@ -69,6 +82,49 @@ class SchemaValidatorTests(TestCase):
         schema = load_schema(json_pointer=object_relationship_pointer)
         self.assertSetEqual(set(schema['properties'].keys()), {'linkageMemberIds', 'linkageDirectionality', 'linkageType', 'linkageAssertionId', 'otherInformation'})
 
+    def test_load_schema_returns_copy(self):
+        load_schema()['properties'].clear()
+        self.assertIn('objectItems', load_schema()['properties'])
+        self.assertIn('objectItems', schema_cache.schema()['properties'])
+
+    def test_schema_cache_shares_validators(self):
+        self.assertIs(TiesSchemaValidator().validator, TiesSchemaValidator().validator)
+        self.assertIs(ObjectItemSchemaValidator().validator, schema_cache.validator(object_item_pointer))
+        self.assertIsNot(TiesSchemaValidator().validator, ObjectItemSchemaValidator().validator)
+
+    def test_schema_cache_clear(self):
+        validator = TiesSchemaValidator().validator
+        schema_cache.clear()
+        self.assertIsNot(TiesSchemaValidator().validator, validator)
+        self.assertEqual(TiesSchemaValidator().all_errors(self._test_input_dict), [])
+
+    def test_schema_cache_clear_any_of_discriminators(self):
+        schema_text = schema_cache.schema_text()
+        any_of = schema_cache.schema()['definitions']['supplementalDescription-array']['items']['anyOf']
+        self.assertEqual(schema_cache.any_of_discriminators(any_of), (('dataSize', 'sha256DataHash'), ('dataObject',)))
+        self.assertEqual(schema_cache.any_of_discriminators(list(any_of)), (('dataSize', 'sha256DataHash'), ('dataObject',)))
+        try:
+            # the branches swap places in the schema loaded after clear, so must their discriminating properties
+            schema = json.loads(schema_text)
+            schema['definitions']['supplementalDescription-array']['items']['anyOf'].reverse()
+            schema_cache.clear()
+            schema_cache._schema_text = json.dumps(schema)  # pylint: disable=protected-access
+            any_of = schema_cache.schema()['definitions']['supplementalDescription-array']['items']['anyOf']
+            self.assertEqual(schema_cache.any_of_discriminators(any_of), (('dataObject',), ('dataSize', 'sha256DataHash')))
+        finally:
+            schema_cache.clear()
+
+    def test_schema_cache_threads(self):
+        schema_cache.clear()
+        validators = []
+        threads = [Thread(target=lambda: validators.append(ObjectItemSchemaValidator().validator)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(validators), 8)
+        self.assertTrue(all(validator is validators[0] for validator in validators))
+
     def test_validate_json_str(self):
         self._schema_validator.validate(self._test_input_str)
 
@@ -90,6 +146,398 @@ class SchemaValidatorTests(TestCase):
         errors = self._schema_validator.all_errors(self._test_input_dict)
         self.assertEqual(errors, [])
 
+    def test_validate_typed_inputs(self):
+        data = self._test_input_str.encode('utf-8')
+        self._schema_validator.validate_object(self._test_input_dict)
+        self._schema_validator.validate_text(self._test_input_str)
+        self._schema_validator.validate_bytes(data)
+        self._schema_validator.validate_bytes(bytearray(data))
+        self._schema_validator.validate_bytes(memoryview(data))
+        self._schema_validator.validate_path(self._test_input_file_path)
+        with self.assertRaises(ValidationError):
+            self._schema_validator.validate_text('{}')
+
+    def test_all_errors_typed_inputs(self):
+        expected_errors = [ValidationError('required properties [authorityInformation, objectItems, version] are missing', '/', [])]
+        self.assertEqual(self._schema_validator.all_errors_object({}), expected_errors)
+        self.assertEqual(self._schema_validator.all_errors_text('{}'), expected_errors)
+        self.assertEqual(self._schema_validator.all_errors_bytes(b'{}'), expected_errors)
+        self.assertEqual(self._schema_validator.all_errors_bytes(memoryview(b' {} ')[1:3]), expected_errors)
+        self.assertEqual(self._schema_validator.all_errors_path(self._test_input_file_path), [])
+
+    def test_all_errors_mmap(self):
+        with open(self._test_input_file_path, 'rb') as f:
+            with mmap(f.fileno(), 0, access=ACCESS_READ) as data:
+                self.assertEqual(self._schema_validator.all_errors_bytes(data), [])
+                self.assertEqual(self._schema_validator.all_errors(data), [])
+
+    def test_all_errors_bytes(self):
+        self.assertEqual(self._schema_validator.all_errors(self._test_input_str.encode('utf-8')), [])
+
+    def test_typed_inputs_invalid_json(self):
+        with self.assertRaises(ValueError):
+            self._schema_validator.validate_text('{')
+        with self.assertRaises(ValueError):
+            self._schema_validator.all_errors_bytes(b'{')
+
+    def test_all_errors_max_errors(self):
+        self._test_input_dict['authorityInformation'] = {}
+        self._test_input_dict['objectItems'] = []
+        self._test_input_dict['foo'] = 1
+        for engine in engines:
+            schema_validator = SchemaValidator(engine=engine)
+            errors = schema_validator.all_errors(self._test_input_dict)
+            self.assertEqual(len(errors), 3)
+            self.assertFalse(errors.truncated)
+            bounded_errors = schema_validator.all_errors(self._test_input_dict, max_errors=2)
+            self.assertEqual(len(bounded_errors), 2)
+            self.assertTrue(bounded_errors.truncated)
+            self.assertTrue(all(e in errors for e in bounded_errors))
+            self.assertEqual(bounded_errors, sorted(bounded_errors, key=lambda x: x.location))
+            bounded_errors = schema_validator.all_errors(self._test_input_dict, max_errors=3)
+            self.assertEqual(bounded_errors, errors)
+            self.assertFalse(bounded_errors.truncated)
+
+    def test_all_errors_max_errors_subset(self):
+        # which errors are kept depends on the order the engine finds them in, but they are always distinct errors of
+        # the full list in its order and truncated says whether any were left out
+        for engine in engines:
+            schema_validator = TiesSchemaValidator(engine=engine)
+            for export in mutated_exports(50, seed=4, object_item_count=6):
+                errors = schema_validator.all_errors(export)
+                for max_errors in (1, 2, 5):
+                    for bounded_errors in (schema_validator.all_errors(export, max_errors=max_errors), schema_validator.all_errors_stream(io.StringIO(json.dumps(export)), max_errors=max_errors)):
+                        self.assertEqual(len(bounded_errors), min(len(errors), max_errors))
+                        self.assertEqual(bounded_errors, [e for e in errors if e in bounded_errors])
+                        self.assertEqual(bounded_errors.truncated, len(errors) > max_errors)
+
+    def test_all_errors_max_errors_valid(self):
+        errors = self._schema_validator.all_errors(self._test_input_dict, max_errors=1)
+        self.assertEqual(errors, [])
+        self.assertFalse(errors.truncated)
+
+    def test_all_errors_max_errors_invalid(self):
+        with self.assertRaises(ValueError):
+            self._schema_validator.all_errors(self._test_input_dict, max_errors=0)
+
+    def test_all_errors_stream_valid(self):
+        for engine in engines:
+            errors = TiesSchemaValidator(engine=engine).all_errors_stream(io.StringIO(self._test_input_str))
+            self.assertEqual(errors, [])
+        self.assertEqual(TiesSchemaValidator().all_errors_stream(self._test_input_file), [])
+        TiesSchemaValidator().validate_stream(io.BytesIO(self._test_input_str.encode('utf-8')))
+
+    def test_all_errors_stream_duplicate_items(self):
+        export = example_export()
+        export['objectItems'].extend([export['objectItems'][1], export['objectItems'][1]])
+        errors = TiesSchemaValidator().all_errors_stream(io.StringIO(json.dumps(export)))
+        self.assertEqual(errors, [ValidationError('array property objectItems has duplicate items at index [1, 3, 4]', '/objectItems', [])])
+
+    def test_all_errors_stream_not_arrays(self):
+        export = example_export()
+        export['objectItems'] = {}
+        export['objectGroups'] = []
+        export['objectRelationships'] = [1]
+        errors = TiesSchemaValidator().all_errors_stream(io.StringIO(json.dumps(export)))
+        self.assertEqual(errors, TiesSchemaValidator().all_errors(export))
+        self.assertEqual(len(errors), 2)
+
+    def test_all_errors_stream_max_errors(self):
+        export = example_export()
+        for object_item in export['objectItems']:
+            del object_item['objectId']
+        errors = TiesSchemaValidator().all_errors_stream(io.StringIO(json.dumps(export)), max_errors=1)
+        self.assertEqual(errors, [ValidationError('required property objectId is missing', '/objectItems[0]', [])])
+        self.assertTrue(errors.truncated)
+
+    def test_validate_stream(self):
+        with self.assertRaises(ValidationError):
+            TiesSchemaValidator().validate_stream(io.StringIO('{}'))
+
+    def test_all_errors_stream_matches_all_errors(self):
+        for engine in engines:
+            schema_validator = TiesSchemaValidator(engine=engine)
+            for export in mutated_exports(100, seed=2):
+                self.assertEqual(schema_validator.all_errors_stream(io.StringIO(json.dumps(export, indent=2))), schema_validator.all_errors(export))
+
+    def test_all_errors_parallel_valid(self):
+        self.assertEqual(TiesSchemaValidator().all_errors_parallel(self._test_input_str, workers=2), [])
+        TiesSchemaValidator().validate_parallel(self._test_input_dict, workers=2)
+
+    def test_validate_parallel(self):
+        with self.assertRaises(ValidationError):
+            TiesSchemaValidator().validate_parallel({}, workers=2)
+
+    def test_all_errors_parallel_matches_all_errors(self):
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            for engine in engines:
+                schema_validator = TiesSchemaValidator(engine=engine)
+                for export in mutated_exports(50, seed=3, object_item_count=8):
+                    if isinstance(export.get('objectItems'), list) and export['objectItems']:
+                        export['objectItems'].append(export['objectItems'][0])
+                    self.assertEqual(schema_validator.all_errors_parallel(export, workers=2, executor=executor), schema_validator.all_errors(export))
+
+    def test_unique_items_duplicate_indexes(self):
+        self.assertIsNone(duplicate_indexes([{'a': 1}, {'a': True}, {'a': [1]}, {'b': 1}]))
+        self.assertEqual(duplicate_indexes([{'b': 2}, {'a': 1, 'b': [1.0]}, {'b': 2}, {'b': [1], 'a': 1.0}, {'b': 2}]), [0, 2, 4])
+
+    def test_unique_items_large_array(self):
+        export = example_export(object_item_count=2000)
+        export['objectItems'].insert(10, export['objectItems'][1500])
+        for engine in engines:
+            errors = TiesSchemaValidator(engine=engine).all_errors(export)
+            self.assertEqual(errors, [ValidationError('array property objectItems has duplicate items at index [10, 1501]', '/objectItems', [])])
+
+    def test_memo_matches_all_errors(self):
+        for engine in engines:
+            schema_validator = TiesSchemaValidator(engine=engine)
+            memo_schema_validator = TiesSchemaValidator(engine=engine, memo=ValidationMemo(maxsize=16))
+            for export in mutated_exports(100, seed=4):
+                self.assertEqual(memo_schema_validator.all_errors(export), schema_validator.all_errors(export))
+                self.assertEqual(memo_schema_validator.all_errors(export), schema_validator.all_errors(export))
+
+    def test_memo_cache_info(self):
+        for engine in engines:
+            memo = ValidationMemo()
+            export = example_export(object_item_count=10)
+            TiesSchemaValidator(engine=engine, memo=memo).all_errors(export)
+            cache_info = memo.cache_info()
+            self.assertGreater(cache_info.hits, 10)
+            self.assertEqual(cache_info.currsize, cache_info.misses)
+            self.assertEqual(cache_info.maxsize, 4096)
+            memo.cache_clear()
+            self.assertEqual(memo.cache_info(), MemoInfo(0, 0, 4096, 0))
+
+    def test_memo_maxsize(self):
+        memo = ValidationMemo(maxsize=2, pointers=[object_item_pointer])
+        export = example_export(object_item_count=5)
+        errors = TiesSchemaValidator(memo=memo).all_errors(export)
+        self.assertEqual(errors, [])
+        self.assertEqual(memo.cache_info(), MemoInfo(0, 5, 2, 2))
+
+    def test_memo_cached_errors(self):
+        memo = ValidationMemo()
+        export = example_export(object_item_count=2)
+        for object_item in export['objectItems']:
+            object_item['authorityInformation'] = {'securityTag': 'UNCLASSIFIED', 'foo': 1.0}
+        for engine in engines:
+            errors = TiesSchemaValidator(engine=engine, memo=memo).all_errors(export)
+            self.assertEqual(errors, [ValidationError('additional property foo is not allowed', '/objectItems[0]/authorityInformation', []), ValidationError('additional property foo is not allowed', '/objectItems[1]/authorityInformation', [])])
+            errors = ObjectItemSchemaValidator(engine=engine, memo=memo).all_errors(export['objectItems'][0])
+            self.assertEqual(errors, [ValidationError('additional property foo is not allowed', '/authorityInformation', [])])
+
+    def test_memo_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            TiesSchemaValidator(engine='foo', memo=ValidationMemo())
+
+    def test_any_of_discriminated_branch(self):
+        data_file = {'assertionId': 'a', 'informationType': 'a', 'sha256DataHash': 'a' * 64, 'dataSize': 0, 'securityTag': ''}
+        data_object = {'assertionId': 'a', 'informationType': 'a', 'dataObject': {}, 'securityTag': ''}
+        supplemental_descriptions = [
+            data_file,
+            data_object,
+            dict(data_file, dataObject={}),
+            dict(data_object, dataSize=0),
+            dict(data_file, dataSize=-1),
+            dict(data_object, dataObject=None),
+            {'assertionId': 'a', 'securityTag': ''},
+            {},
+            [],
+        ]
+        schema = schema_cache.schema()['definitions']['assertions-object']
+        # the stock anyOf validates every branch in schema order, local references are looked up in the schema's table
+        references = schema_cache.references()
+        reference_validator = extend(Draft4Validator, {'$ref': lambda validator, ref, instance, _: validator.descend(instance, references[ref])})(schema)
+        for supplemental_description in supplemental_descriptions:
+            instance = {'supplementalDescriptions': [supplemental_description]}
+            expected_errors = [make_validation_error(e) for e in reference_validator.iter_errors(instance)]
+            for engine in engines:
+                self.assertEqual(SchemaValidator(assertions_pointer, engine=engine).all_errors(instance), expected_errors)
+
+    def test_any_of_discriminating_properties(self):
+        schema = schema_cache.schema()
+        self.assertEqual(discriminating_properties(schema, schema['definitions']['supplementalDescription-array']['items']['anyOf']), (('dataSize', 'sha256DataHash'), ('dataObject',)))
+        self.assertIsNone(discriminating_properties(schema, [{'type': 'object'}, {'type': 'array'}]))
+        self.assertIsNone(predicted_branch({'dataSize': 0}, None))
+        self.assertIsNone(predicted_branch([], (('dataSize',), ('dataObject',))))
+        self.assertEqual(predicted_branch({'dataObject': {}, 'dataSize': 0}, (('dataSize',), ('dataObject',))), 0)
+        self.assertEqual(predicted_branch({'dataObject': {}}, (('dataSize',), ('dataObject',))), 1)
+
+    def test_all_errors_at(self):
+        for engine in engines:
+            schema_validator = TiesSchemaValidator(engine=engine)
+            self.assertEqual(schema_validator.all_errors_at('/objectItems/17/objectAssertions/annotations/3', {'assertionId': 'a', 'annotationType': 'tag', 'value': 'a', 'securityTag': '', 'foo': 1}), [ValidationError('additional property foo is not allowed', '/objectItems[17]/objectAssertions/annotations[3]', [])])
+            self.assertEqual(schema_validator.all_errors_at('/objectItems/0/objectId', ''), [ValidationError("property value '' for objectId property is too short, minimum length 1", '/objectItems[0]/objectId', [])])
+            self.assertEqual(schema_validator.all_errors_at('/objectItems/0/objectAssertions/supplementalDescriptions/2/dataSize', -1), [ValidationError('property value -1 for dataSize property is less than the minimum value of 0', '/objectItems[0]/objectAssertions/supplementalDescriptions[2]/dataSize', [])])
+            self.assertEqual(schema_validator.all_errors_at('/objectRelationships', []), [])
+            self.assertEqual(schema_validator.all_errors_at('', self._test_input_dict), [])
+            self.assertIsNone(schema_validator.validate_at('/objectItems/0', example_export()['objectItems'][0]))
+            with self.assertRaises(ValidationError):
+                schema_validator.validate_at('/version', '2.0')
+
+    def test_all_errors_at_matches_all_errors(self):
+        for engine in engines:
+            schema_validator = TiesSchemaValidator(engine=engine)
+            for export in mutated_exports(20, seed=6):
+                if not isinstance(export.get('objectItems'), list):
+                    continue
+                errors = schema_validator.all_errors(export)
+                for index, object_item in enumerate(export['objectItems']):
+                    location = "/objectItems[{}]".format(index)
+                    expected_errors = [e for e in errors if e.location == location or e.location.startswith(location + '/')]
+                    self.assertEqual(schema_validator.all_errors_at("/objectItems/{}".format(index), object_item), expected_errors)
+
+    def test_all_errors_at_unknown_location(self):
+        for location in ['/foo', '/objectItems/foo', '/objectItems/01', '/version/0', 'objectItems', '/objectItems/0/objectAssertions/supplementalDescriptions/0/foo']:
+            with self.assertRaises(ValueError):
+                TiesSchemaValidator().all_errors_at(location, {})
+
+    def test_location_index(self):
+        self.assertEqual(schema_cache.locate('/objectItems/17/objectAssertions/annotations/3'), ('/definitions/annotation-object', ['objectItems', 17, 'objectAssertions', 'annotations', 3]))
+        self.assertEqual(schema_cache.locate('/objectGroups/0/groupAssertions/supplementalDescriptions/1/dataObject'), ('/definitions/supplementalDescriptionDataObject-object/properties/dataObject', ['objectGroups', 0, 'groupAssertions', 'supplementalDescriptions', 1, 'dataObject']))
+        self.assertIs(schema_cache.location_index(), schema_cache.location_index())
+
+    def test_pickle(self):
+        export = example_export()
+        export['objectItems'][0]['foo'] = 1
+        for engine in engines:
+            for schema_validator in [TiesSchemaValidator(engine=engine), TiesSchemaValidator(engine=engine, memo=ValidationMemo(maxsize=8)), ObjectItemSchemaValidator(engine=engine), SchemaValidator(object_item_pointer, engine=engine)]:
+                unpickled = pickle.loads(pickle.dumps(schema_validator))
+                self.assertIs(type(unpickled), type(schema_validator))
+                self.assertEqual(unpickled.all_errors(export), schema_validator.all_errors(export))
+                self.assertLess(len(pickle.dumps(schema_validator)), 512)
+
+    def test_pickle_memo(self):
+        memo = ValidationMemo(maxsize=8, pointers=[object_item_pointer])
+        TiesSchemaValidator(memo=memo).all_errors(example_export())
+        unpickled = pickle.loads(pickle.dumps(memo))
+        self.assertEqual(unpickled.pointers, memo.pointers)
+        self.assertEqual(unpickled.cache_info(), MemoInfo(0, 0, 8, 0))
+
+    def test_pickle_schema_mismatch(self):
+        data = pickle.dumps(TiesSchemaValidator())
+        schema_text = schema_cache.schema_text()
+        try:
+            schema_cache.clear()
+            schema_cache._schema_text = schema_text.replace('"1.0"', '"0.9"', 1)  # pylint: disable=protected-access
+            with self.assertRaises(ValueError):
+                pickle.loads(data)
+        finally:
+            schema_cache.clear()
+
+    def test_pickle_process_pool(self):
+        export = example_export()
+        export['version'] = '2.0'
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            for engine in engines:
+                schema_validator = TiesSchemaValidator(engine=engine)
+                self.assertEqual(executor.submit(schema_validator.all_errors, export).result(), schema_validator.all_errors(export))
+
+    def test_preload(self):
+        schema_cache.clear()
+        preload(engines)
+        for engine in engines:
+            validator = schema_cache.validator(object_item_pointer, engine=engine)
+            preload(engines)
+            self.assertIs(schema_cache.validator(object_item_pointer, engine=engine), validator)
+            self.assertIs(ObjectItemSchemaValidator(engine=engine).validator, validator)
+
+    def test_all_errors_bulk(self):
+        export = example_export(object_item_count=6)
+        export['objectItems'][0]['sha256Hash'] = 'g' * 64
+        export['objectItems'][1]['md5Hash'] = 1
+        export['objectItems'][2]['size'] = -1
+        export['objectItems'][3]['size'] = True
+        export['objectItems'][4]['authorityInformation']['collectionUuid'] = '12345678-1234-1234-1234-1234567890a'
+        export['objectItems'][5]['authorityInformation'] = None
+        for engine in engines:
+            schema_validator = TiesSchemaValidator(engine=engine)
+            errors = schema_validator.all_errors_bulk(export)
+            self.assertEqual(errors, schema_validator.all_errors(export))
+            self.assertEqual([e.location for e in errors], ['/objectItems[0]/sha256Hash', '/objectItems[1]/md5Hash', '/objectItems[2]/size', '/objectItems[3]/size', '/objectItems[4]/authorityInformation/collectionUuid', '/objectItems[5]/authorityInformation'])
+            self.assertEqual(schema_validator.all_errors_bulk(example_export(object_item_count=100)), [])
+            with self.assertRaises(ValidationError):
+                schema_validator.validate_bulk(export)
+
+    def test_all_errors_bulk_matches_all_errors(self):
+        for engine in engines:
+            schema_validator = TiesSchemaValidator(engine=engine)
+            for export in mutated_exports(100, seed=9):
+                self.assertEqual(schema_validator.all_errors_bulk(export), schema_validator.all_errors(export))
+
+    def test_bulk_columns(self):
+        column_checks = dict((path, column_check) for path, column_check, _ in schema_cache.bulk_columns())
+        self.assertEqual(set(column_checks), set(bulk_column_paths))
+        self.assertEqual(column_checks[('sha256Hash',)].failures(['a' * 64, 'A' * 63 + 'g', 'a' * 65, None, 'f' * 64]), [1, 2, 3])
+        self.assertEqual(column_checks[('size',)].failures([0, 1, -1, 1.0, False]), [2, 3, 4])
+        self.assertEqual(column_checks[('authorityInformation', 'collectionUuid')].failures(['12345678-1234-1234-1234-1234567890ab', 'a' * 32, 'a' * 36, '']), [2, 3])
+        self.assertEqual(column_checks[('md5Hash',)].failures([]), [])
+        self.assertEqual(column_checks[('authorityInformation', 'registrationDate')].failures(['2019-02-29T00:00:00Z', 1, 'a']), [1])
+        column_checks = dict((path, column_check) for path, column_check, _ in schema_cache.bulk_columns(check_formats=True))
+        self.assertEqual(column_checks[('authorityInformation', 'registrationDate')].failures(['2019-02-29T00:00:00Z', 1, 'a', '2020-02-29T00:00:00Z']), [0, 1, 2])
+
+    def test_check_formats(self):
+        export = example_export(object_item_count=3)
+        export['time'] = '2019-02-29T00:00:00Z'
+        export['objectItems'][1]['authorityInformation']['registrationDate'] = 'yesterday'
+        export['objectItems'][2]['authorityInformation']['expirationDate'] = 1
+        expected_errors = [
+            ValidationError("property value 'yesterday' for registrationDate property is not a valid date-time", '/objectItems[1]/authorityInformation/registrationDate', []),
+            ValidationError('property type integer for property expirationDate is not the allowed type: string', '/objectItems[2]/authorityInformation/expirationDate', []),
+            ValidationError("property value '2019-02-29T00:00:00Z' for time property is not a valid date-time", '/time', []),
+        ]
+        for engine in engines:
+            self.assertEqual([e.location for e in TiesSchemaValidator(engine=engine).all_errors(export)], ['/objectItems[2]/authorityInformation/expirationDate'])
+            schema_validator = TiesSchemaValidator(engine=engine, check_formats=True)
+            self.assertEqual(schema_validator.all_errors(export), expected_errors)
+            self.assertEqual(schema_validator.all_errors_bulk(export), expected_errors)
+            self.assertEqual(schema_validator.all_errors_stream(io.StringIO(json.dumps(export))), expected_errors)
+            self.assertEqual(TiesSchemaValidator(engine=engine, memo=ValidationMemo(), check_formats=True).all_errors(export), expected_errors)
+            self.assertEqual(pickle.loads(pickle.dumps(schema_validator)).all_errors(export), expected_errors)
+            self.assertEqual(schema_validator.all_errors(example_export()), [])
+
+    def test_references(self):
+        schema = schema_cache.schema()
+        references = schema_cache.references()
+        self.assertIs(references['#/definitions/objectItem-object'], schema['definitions']['objectItem-object'])
+        self.assertIs(references['#/definitions/uuid-string'], schema['definitions']['uuid-string'])
+        self.assertIs(schema_cache.references(), references)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            schema_cache.clear()
+            for engine in engines:
+                self.assertEqual(TiesSchemaValidator(engine=engine).all_errors(example_export()), [])
+
+    def test_error_groups(self):
+        export = example_export(object_item_count=100)
+        for object_item in export['objectItems'][10:60]:
+            del object_item['md5Hash']
+        export['objectItems'][70]['size'] = -1
+        for engine in engines:
+            schema_validator = TiesSchemaValidator(engine=engine)
+            error_groups = schema_validator.error_groups(export)
+            self.assertEqual([(g.message, g.location, g.count, g.ranges) for g in error_groups], [
+                ('required property md5Hash is missing', '/objectItems[*]', 50, ((10, 59),)),
+                ('property value <value> for size property is less than the minimum value of 0', '/objectItems[*]/size', 1, ((70, 70),)),
+            ])
+            self.assertEqual([e.location for e in error_groups[0].samples], ['/objectItems[10]', '/objectItems[11]', '/objectItems[12]'])
+            self.assertEqual(schema_validator.error_groups_stream(io.StringIO(json.dumps(export))), error_groups)
+            self.assertEqual(schema_validator.error_groups(example_export()), [])
+
+    def test_error_groups_matches_all_errors(self):
+        for engine in engines:
+            schema_validator = TiesSchemaValidator(engine=engine)
+            for export in mutated_exports(50, seed=19):
+                self.assertEqual(sum(g.count for g in schema_validator.error_groups(export)), len(schema_validator.all_errors(export)))
+
+    def test_first_error(self):
+        self.assertIsNone(self._schema_validator.first_error(self._test_input_str))
+        del self._test_input_dict['version']
+        self._test_input_dict['objectItems'] = []
+        for engine in engines:
+            error = SchemaValidator(engine=engine).first_error(self._test_input_dict)
+            self.assertIn(error, SchemaValidator(engine=engine).all_errors(self._test_input_dict))
+
 
 class AnnotationSchemaTests(TestCase):
 
@@ -17,8 +17,10 @@
 from __future__ import unicode_literals
 
 import unittest
+from concurrent.futures import ProcessPoolExecutor
 from unittest import TestCase
 
+from ties.index import TiesIndex, _MultiMap
 from ties.semantic_validation import TiesSemanticValidator
 from ties.semantic_validation import _check_duplicate_assertion_ids
 from ties.semantic_validation import _check_duplicate_object_group_other_information_keys
@@ -29,6 +31,7 @@ from ties.semantic_validation import _check_duplicate_object_relationship_other_
 from ties.semantic_validation import _check_duplicate_top_level_other_information_keys
 from ties.semantic_validation import _check_object_relationship_linkage_assertion_ids
 from ties.semantic_validation import _check_object_relationship_linkage_member_ids
+from ties.util.testing import example_export, mutated_exports
 
 
 class SemanticValidationTests(TestCase):
@@ -733,6 +736,73 @@ class SemanticValidationTests(TestCase):
         self.assertEqual(warnings[i].message, "otherInformation array contains duplicate key ('foo') at indexes [0, 1]")
         self.assertEqual(warnings[i].location, '/otherInformation')
 
+    def test_validate_single_pass(self):
+        checks = [
+            _check_duplicate_object_item_sha256_hashes,
+            _check_duplicate_object_item_other_information_keys,
+            _check_duplicate_object_group_other_information_keys,
+            _check_duplicate_object_ids_and_group_ids,
+            _check_duplicate_assertion_ids,
+            _check_object_relationship_linkage_member_ids,
+            _check_object_relationship_linkage_assertion_ids,
+            _check_duplicate_object_relationship_other_information_keys,
+            _check_duplicate_top_level_other_information_keys,
+        ]
+        ties = example_export(4)
+        ties['objectItems'].append(ties['objectItems'][0])
+        ties['objectItems'][1]['sha256Hash'] = ties['objectItems'][2]['sha256Hash']
+        ties['objectItems'][3]['otherInformation'] = [{'key': 'foo', 'value': 1}, {'key': 'foo', 'value': 2}]
+        ties['objectGroups'][0]['groupId'] = 'object-1'
+        ties['objectRelationships'].insert(0, {'linkageMemberIds': ['object-9', 'object-3'], 'linkageAssertionId': 'annotation-9', 'otherInformation': [{'key': 'foo', 'value': 1}, {'key': 'foo', 'value': 2}]})
+        ties = dict(reversed(list(ties.items())))
+        warnings = TiesSemanticValidator().all_warnings(ties)
+        self.assertEqual(warnings, [warning for check in checks for warning in check(ties)])
+        self.assertEqual(len(warnings), 15)
+        self.assertEqual(TiesSemanticValidator().all_warnings(ties, index=TiesIndex(ties)), warnings)
+
+    def test_validate_parallel_matches_all_warnings(self):
+        ties = example_export(12)
+        ties['objectItems'].append(ties['objectItems'][0])
+        ties['objectItems'][10]['sha256Hash'] = ties['objectItems'][2]['sha256Hash']
+        ties['objectItems'][11]['otherInformation'] = [{'key': 'foo', 'value': 1}, {'key': 'foo', 'value': 2}]
+        ties['objectGroups'][0]['groupId'] = 'object-9'
+        ties['objectRelationships'].insert(0, {'linkageMemberIds': ['object-99', 'object-3'], 'linkageAssertionId': 'annotation-99'})
+        ties['otherInformation'] = [{'key': 'foo', 'value': 1}, {'key': 'foo', 'value': 2}]
+        semantic_validator = TiesSemanticValidator()
+        self.assertEqual(semantic_validator.all_warnings_parallel(ties, workers=2), semantic_validator.all_warnings(ties))
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            warnings = semantic_validator.all_warnings_parallel(ties, workers=2, executor=executor)
+            self.assertEqual(warnings, semantic_validator.all_warnings(ties))
+            self.assertGreater(len(warnings), 5)
+            # ids that are not strings are compared as they are, 1, 1.0 and True are the same id
+            odd_ids = {'objectItems': [{'objectId': 1, 'sha256Hash': None}, {'objectId': True, 'sha256Hash': None}], 'objectRelationships': [{'linkageMemberIds': [1.0, 2, 'object-9']}]}
+            self.assertEqual(semantic_validator.all_warnings_parallel(odd_ids, workers=2, executor=executor), semantic_validator.all_warnings(odd_ids))
+            for export in mutated_exports(50, seed=3, object_item_count=8):
+                try:
+                    expected = semantic_validator.all_warnings(export)
+                except (AttributeError, TypeError):
+                    continue
+                self.assertEqual(semantic_validator.all_warnings_parallel(export, workers=2, executor=executor), expected)
+
+    def test_validate_duplicate_scaling(self):
+        # the positions of a repeated id are appended to one list, copying the list for each repeat would make
+        # validating n duplicates quadratic
+        multi_map = _MultiMap()
+        multi_map.add('a', 0)
+        multi_map.add('a', 1)
+        positions = multi_map['a']
+        for i in range(2, 1000):
+            multi_map.add('a', i)
+        self.assertIs(multi_map['a'], positions)
+        self.assertEqual(positions, list(range(1000)))
+
+        index = TiesIndex({'objectItems': [{'objectId': 'a'}, {'objectId': 'a'}]})
+        positions = dict(index.duplicate_object_ids())['a']
+        for i in range(2, 1000):
+            index.add_element('objectItems', i, {'objectId': 'a'})
+        self.assertIs(dict(index.duplicate_object_ids())['a'], positions)
+        self.assertEqual(positions, list(range(1000)))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,46 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+
+def canonical_form(item):
+    # hashable form of a JSON value that compares like jsonschema's equality (True != 1, 1 == 1.0), integral floats
+    # are normalized so that the repr of equal values is also equal
+    if isinstance(item, dict):
+        return (1, tuple(sorted((k, canonical_form(v)) for k, v in item.items())))
+    if isinstance(item, list):
+        return (2, tuple(canonical_form(v) for v in item))
+    if isinstance(item, bool):
+        return (3, item)
+    if isinstance(item, float) and item.is_integer():
+        return int(item)
+    return item
+
+
+def duplicate_indexes(items):
+    # the indexes of the first item that occurs more than once, in a single pass over the items
+    item_index = {}
+    for i, item in enumerate(items):
+        item_index.setdefault(canonical_form(item), []).append(i)
+    for indexes in item_index.values():
+        if len(indexes) > 1:
+            return indexes
+    return None
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,133 @@
+################################################################################
+# Copyright 2019 Noblis, Inc                                                   #
+#                                                                              #
+# Licensed under the Apache License, Version 2.0 (the "License");              #
+# you may not use this file except in compliance with the License.             #
+# You may obtain a copy of the License at                                      #
+#                                                                              #
+#    http://www.apache.org/licenses/LICENSE-2.0                                #
+#                                                                              #
+# Unless required by applicable law or agreed to in writing, software          #
+# distributed under the License is distributed on an "AS IS" BASIS,            #
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.     #
+# See the License for the specific language governing permissions and          #
+# limitations under the License.                                               #
+################################################################################
+
+from __future__ import unicode_literals
+
+import codecs
+import json
+
+_NUMBER_CHARACTERS = '+-.0123456789Ee'
+_WHITESPACE = ' \t\n\r'
+
+
+class JsonStreamReader(object):
+
+    def __init__(self, instance_file, chunk_size=1 << 20):
+        self._file = instance_file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._byte_decoder = None
+        self._buffer = ''
+        self._pos = 0
+        self._offset = 0
+        self._eof = False
+
+    def iter_events(self, array_properties=()):
+        array_properties = frozenset(array_properties)
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            while True:
+                key = self._read_value()
+                if not isinstance(key, str):
+                    raise self._error('expected a property name')
+                self._expect(':')
+                if key in array_properties and self._peek() == '[':
+                    for event in self._iter_array_events(key):
+                        yield event
+                else:
+                    yield ('member', key, self._read_value())
+                if self._peek() == ',':
+                    self._pos += 1
+                    continue
+                self._expect('}')
+                break
+        if self._peek() != '':
+            raise self._error('extra data after the JSON object')
+
+    def _iter_array_events(self, key):
+        self._expect('[')
+        count = 0
+        if self._peek() == ']':
+            self._pos += 1
+        else:
+            while True:
+                yield ('element', key, count, self._read_value())
+                count += 1
+                if self._peek() == ',':
+                    self._pos += 1
+                    continue
+                self._expect(']')
+                break
+        yield ('array', key, count)
+
+    def _read_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # a number at the end of the buffer may continue in the next chunk
+                if self._eof or (end < len(self._buffer) and self._buffer[end] not in _NUMBER_CHARACTERS):
+                    self._pos = end
+                    return value
+            except ValueError as e:
+                if self._eof:
+                    raise self._error('invalid JSON value') from e
+            # values larger than a chunk are read with geometrically growing reads to keep parsing linear
+            self._read(max(self._chunk_size, len(self._buffer) - self._pos))
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read(self._chunk_size):
+                return ''
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise self._error("expected '{}'".format(char))
+        self._pos += 1
+
+    def _read(self, size):
+        if self._eof:
+            return False
+        chunk = self._file.read(size)
+        if not chunk:
+            self._eof = True
+            return False
+        if isinstance(chunk, bytes):
+            if self._byte_decoder is None:
+                self._byte_decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = self._byte_decoder.decode(chunk)
+        # drop the consumed part of the buffer so memory stays bounded by the largest value
+        self._offset += self._pos
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, message):
+        return ValueError("{} at character {}".format(message, self._offset + self._pos))
+
+
+def iter_events(instance_file, array_properties=(), chunk_size=1 << 20):
+    return JsonStreamReader(instance_file, chunk_size=chunk_size).iter_events(array_properties)
+
+
+if __name__ == '__main__':
+    pass
@@ -15,7 +15,9 @@
 ################################################################################
 
 import json
+import random
 import sys
+from copy import deepcopy
 from io import StringIO
 
 
@@ -118,5 +120,116 @@ class cli_test(object):
             raise AssertionError('\n' + message)  # pylint: disable=raise-missing-from
 
 
+def example_export(object_item_count=3):
+    object_items = []
+    for i in range(object_item_count):
+        object_items.append({
+            'objectId': "object-{}".format(i),
+            'sha256Hash': "{:064x}".format(i),
+            'md5Hash': "{:032x}".format(i),
+            'size': i,
+            'mimeType': 'text/plain',
+            'authorityInformation': {
+                'collectionUuid': "{:032x}".format(i),
+                'subCollectionUuid': '12345678-1234-1234-1234-1234567890ab',
+                'registrationDate': '2019-01-01T00:00:00Z',
+                'securityTag': 'UNCLASSIFIED',
+            },
+            'objectAssertions': {
+                'annotations': [
+                    {'assertionId': "annotation-{}".format(i), 'annotationType': 'tag', 'value': 'a', 'time': '2019-01-01T00:00:00Z', 'securityTag': ''},
+                ],
+                'supplementalDescriptions': [
+                    {'assertionId': "data-object-{}".format(i), 'informationType': 'a', 'dataObject': {'a': [1, 2]}, 'securityTag': ''},
+                    {'assertionId': "data-file-{}".format(i), 'informationType': 'a', 'sha256DataHash': 'a' * 64, 'dataSize': 1, 'securityTag': ''},
+                ],
+            },
+            'otherInformation': [{'key': 'a', 'value': 'a'}, {'key': 'b', 'value': 1}],
+        })
+    return {
+        'version': '1.0',
+        'id': 'export',
+        'time': '2019-01-01T00:00:00Z',
+        'authorityInformation': {'securityTag': 'UNCLASSIFIED'},
+        'objectItems': object_items,
+        'objectGroups': [
+            {'groupId': 'group-0', 'groupType': 'a', 'groupMemberIds': ['object-0', 'object-1'], 'groupAssertions': {'annotations': [{'assertionId': 'group-annotation-0', 'annotationType': 'tag', 'value': 'a', 'securityTag': ''}]}},
+        ],
+        'objectRelationships': [
+            {'linkageMemberIds': ['object-0', 'group-0'], 'linkageDirectionality': 'DIRECTED', 'linkageAssertionId': 'annotation-0'},
+        ],
+        'otherInformation': [{'key': 'a', 'value': True}],
+    }
+
+
+_mutation_values = [None, True, False, 0, -1, 1.5, '', 'a', 'a' * 64, 'g' * 64, 'A' * 32, '12345678-1234-1234-1234-1234567890ab', [], ['a'], {}, {'key': 'a', 'value': 'a'}, 'DIRECTED']
+
+
+def mutated_exports(count, seed=0, object_item_count=3):
+    # yields randomly broken copies of example_export() for comparing validation implementations
+    rng = random.Random(seed)
+    for _ in range(count):
+        export = example_export(object_item_count)
+        for _ in range(rng.randint(1, 3)):
+            containers = []
+            _collect_containers(export, containers)
+            container = rng.choice(containers)
+            keys = list(container.keys()) if isinstance(container, dict) else list(range(len(container)))
+            operation = rng.random()
+            if keys and operation < 0.3:
+                del container[rng.choice(keys)]
+            elif keys and operation < 0.8:
+                container[rng.choice(keys)] = deepcopy(rng.choice(_mutation_values))
+            elif isinstance(container, dict):
+                container['extra'] = deepcopy(rng.choice(_mutation_values))
+            elif keys:
+                container.append(deepcopy(container[rng.choice(keys)]))
+        yield export
+
+
+def mutation_patch(export, rng):
+    # a random single operation json patch against the current contents of export, for comparing incremental and
+    # full validation
+    containers = []
+    _collect_container_paths(export, '', containers)
+    path, container = rng.choice(containers)
+    keys = list(container.keys()) if isinstance(container, dict) else list(range(len(container)))
+    values = _mutation_values + ['object-0', 'object-1', 'group-0', 'annotation-0', 'data-file-1']
+    operation = rng.random()
+    if keys and operation < 0.2:
+        return [{'op': 'remove', 'path': "{}/{}".format(path, rng.choice(keys))}]
+    if keys and operation < 0.55:
+        return [{'op': 'replace', 'path': "{}/{}".format(path, rng.choice(keys)), 'value': rng.choice(values)}]
+    if keys and isinstance(container, list) and operation < 0.7:
+        return [{'op': 'move', 'from': "{}/{}".format(path, rng.choice(keys)), 'path': "{}/{}".format(path, rng.choice(keys))}]
+    if keys and isinstance(container, list) and operation < 0.85:
+        return [{'op': 'copy', 'from': "{}/{}".format(path, rng.choice(keys)), 'path': "{}/{}".format(path, rng.choice(keys + ['-']))}]
+    if isinstance(container, dict):
+        return [{'op': 'add', 'path': "{}/{}".format(path, rng.choice(keys + ['extra'])), 'value': rng.choice(values)}]
+    return [{'op': 'add', 'path': "{}/{}".format(path, rng.choice(keys + ['-'])), 'value': deepcopy(container[rng.choice(keys)]) if keys else rng.choice(values)}]
+
+
+def _collect_container_paths(value, path, containers):
+    if isinstance(value, dict):
+        containers.append((path, value))
+        for k, v in value.items():
+            _collect_container_paths(v, "{}/{}".format(path, k), containers)
+    elif isinstance(value, list):
+        containers.append((path, value))
+        for i, v in enumerate(value):
+            _collect_container_paths(v, "{}/{}".format(path, i), containers)
+
+
+def _collect_containers(value, containers):
+    if isinstance(value, dict):
+        containers.append(value)
+        for v in value.values():
+            _collect_containers(v, containers)
+    elif isinstance(value, list):
+        containers.append(value)
+        for v in value:
+            _collect_containers(v, containers)
+
+
 if __name__ == '__main__':
     pass